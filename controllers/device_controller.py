@@ -7,6 +7,7 @@ from controllers.state_machine import StateMachine
 from services.usb_connection import USBConnection
 from enums.connection_type import ConnectionType
 from services.stimulation_service import StimulationService
+from services.export_service import ExportService, ExportJob
 
 class DeviceController:
     def __init__(self, state_machine: StateMachine):
@@ -74,6 +75,16 @@ class DeviceController:
         self.stimulationService = None
         self.stimulation_running = False
 
+        # ----------------------------------------------------------------
+        # Export Thread & Service
+        # ----------------------------------------------------------------
+        self.exportThread = QThread()
+        self.exportService = ExportService()
+        self.exportService.moveToThread(self.exportThread)
+        self.exportThread.started.connect(self.exportService.run_exports)
+        self.exportService.finished.connect(self.handle_export_finished)
+        self.exportService.error.connect(self.handle_export_error)
+
     # --------------------------------------------------------------------------
     # SYSTEM CHECK TASK
     # --------------------------------------------------------------------------
@@ -89,6 +100,11 @@ class DeviceController:
         if not self.systemCheckThread.isRunning():
             self.systemCheckThread.start()
 
+    def start_replay(self, file_path: str, speed: float = 1.0):
+        """Connect to a virtual device that replays a saved recording"""
+        self.systemCheckService.set_replay_source(file_path, speed)
+        self.start_system_check(ConnectionType.REPLAY)
+
     def abort_system_check(self):
         """Abort the system check"""
         if self.systemCheckThread.isRunning():
@@ -259,10 +275,10 @@ class DeviceController:
             # Update the state machine
             self.state_machine.stop_acquisition()
 
-    def handle_data_chunk_received(self, chunk):
+    def handle_data_chunk_received(self, chunk, info=None):
         """Handle received data chunks"""
         # Pass the data to the state machine for processing
-        self.state_machine.append_acquisition_data(chunk)
+        self.state_machine.append_acquisition_data(chunk, info)
         
     def handle_acquisition_finished(self):
         """Handle acquisition completion"""
@@ -345,6 +361,31 @@ class DeviceController:
             return self.simulationService.send_data(data)
         return False
 
+    # --------------------------------------------------------------------------
+    # EXPORT TASK
+    # --------------------------------------------------------------------------
+    def queue_export(self, job: ExportJob):
+        """Queue an export; jobs run back to back on the export thread"""
+        self.exportService.enqueue(job)
+        if not self.exportThread.isRunning():
+            self.exportThread.start()
+
+    def cancel_exports(self):
+        """Cancel the running export and drop any queued ones"""
+        self.exportService.cancel()
+
+    def handle_export_finished(self):
+        """Handle the export queue being drained"""
+        self.exportThread.quit()
+        self.exportThread.wait()
+        # Jobs queued while the worker was winding down
+        if self.exportService.has_pending_jobs():
+            self.exportThread.start()
+
+    def handle_export_error(self, error_message):
+        """Handle export errors"""
+        print(f"Export error: {error_message}")
+
     # --------------------------------------------------------------------------
     # OTHER DEVICE TASKS (ACQUISITION, STIMULATION)
     # --------------------------------------------------------------------------
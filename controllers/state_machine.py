@@ -52,10 +52,18 @@ class StateMachine(QObject):
     def transition_to_acquisition_options(self):
         self.transition_to(AppState.ACQUISITION_OPTIONS)
     
-    def update_acquisition_options(self, get_template: bool, sampling_rate: float, circuit_id: int):
+    def update_acquisition_options(self, get_template: bool, sampling_rate: float, circuit_id: int,
+                                   record_to_disk: bool = False, stream_csv: bool = False,
+                                   stream_wfdb: bool = False, store_raw_adc: bool = False,
+                                   stream_compressed: bool = False):
         self.model.get_template = get_template
         self.model.sampling_rate = sampling_rate
         self.model.circuit_id = circuit_id
+        self.model.record_to_disk = record_to_disk
+        self.model.stream_csv = stream_csv
+        self.model.stream_wfdb = stream_wfdb
+        self.model.store_raw_adc = store_raw_adc
+        self.model.stream_compressed = stream_compressed
         self.model.model_changed.emit()
 
     def start_acquisition(self):
@@ -64,16 +72,20 @@ class StateMachine(QObject):
 
     def toggle_acquisition(self):
         self.model.acquisition_running = not self.model.acquisition_running
+        if not self.model.acquisition_running:
+            self.model.flush_session()
         self.model.model_changed.emit()
 
     def stop_acquisition(self):
         self.model.acquisition_running = False
+        self.model.close_session()
         self.model.model_changed.emit()
 
-    def append_acquisition_data(self, chunk):
+    def append_acquisition_data(self, chunk, info=None):
         if not self.model.acquisition_running:
             return
-        self.model.signal_data.append_chunk(chunk)
+        self.model.journal_chunk(chunk)
+        self.model.signal_data.append_chunk(chunk, info)
         self.model.model_changed.emit()
         self.acquisition_chunk_received.emit()
 
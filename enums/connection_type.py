@@ -3,3 +3,4 @@ from enum import Enum
 class ConnectionType(Enum):
     USB = "USB"
     BLUETOOTH = "Bluetooth"
+    REPLAY = "Replay"
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class TemplateMode(Enum):
+    AUTOCORRELATION = "Autocorrelation"
+    BEAT_DETECTION = "Beat Detection"
@@ -0,0 +1,72 @@
+import numpy as np
+
+# Nano 33 BLE analog front end: 12-bit ADC against a 3.3 V reference
+ADC_MAX_CODE = 4095
+ADC_REFERENCE_V = 3.3
+
+# Codes per volt, i.e. V = code / ADC_GAIN
+ADC_GAIN = ADC_MAX_CODE / ADC_REFERENCE_V
+
+# Format 212 holds signed 12-bit samples, so unsigned codes are shifted down
+_FMT212_OFFSET = 2048
+
+
+class AdcScale:
+    """
+    Conversion between stored ADC codes and physical units:
+        physical = (code - baseline) / gain
+
+    Keeping the integer codes and this pair instead of float64 volts stores
+    samples in a quarter of the memory and lets WFDB exports write the codes
+    untouched.
+    """
+
+    def __init__(self, gain: float = ADC_GAIN, baseline: int = 0, dtype=np.uint16):
+        self.gain = float(gain)
+        self.baseline = int(baseline)
+        self.dtype = np.dtype(dtype)
+
+    def to_physical(self, codes: np.ndarray) -> np.ndarray:
+        """Float64 physical values for an array of codes (a new array)."""
+        return (np.asarray(codes, dtype=np.float64) - self.baseline) / self.gain
+
+    def to_codes(self, values) -> np.ndarray:
+        """Validate incoming codes and cast them to the storage dtype."""
+        values = np.asarray(values)
+        if values.dtype.kind == "f":
+            if not np.array_equal(values, np.round(values)):
+                raise ValueError("Raw ADC storage expects integer codes")
+        info = np.iinfo(self.dtype)
+        if values.size and (values.min() < info.min or values.max() > info.max):
+            raise ValueError(f"ADC codes out of range for {self.dtype}")
+        return values.astype(self.dtype)
+
+    # --------------------------------------------------------------------------
+    # WFDB format 212
+    # --------------------------------------------------------------------------
+    @property
+    def wfdb_baseline(self) -> int:
+        """Header baseline that makes the shifted codes decode to the same physical values."""
+        return self.baseline - _FMT212_OFFSET
+
+    @staticmethod
+    def to_212(codes: np.ndarray) -> np.ndarray:
+        """
+        Shift 12-bit codes (0..4095) into format 212's signed range. Code 0
+        lands on -2048, which WFDB reserves for NaN, so it is clipped to the
+        next code up (one LSB at the bottom rail).
+        """
+        return np.clip(np.asarray(codes, dtype=np.int64) - _FMT212_OFFSET, -2047, 2047)
+
+    # --------------------------------------------------------------------------
+    # EDF
+    # --------------------------------------------------------------------------
+    def edf_ranges(self):
+        """((physical_min, physical_max), (digital_min, digital_max)) spanning the full ADC range."""
+        physical = self.to_physical(np.array([0, ADC_MAX_CODE]))
+        return (physical[0], physical[1]), (-_FMT212_OFFSET, ADC_MAX_CODE - _FMT212_OFFSET)
+
+    @staticmethod
+    def to_edf(codes: np.ndarray) -> np.ndarray:
+        """Shift 12-bit codes into EDF's signed 16-bit samples (no code is reserved there)."""
+        return np.asarray(codes, dtype=np.int64) - _FMT212_OFFSET
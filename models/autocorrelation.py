@@ -0,0 +1,80 @@
+import numpy as np
+from scipy import fft as sp_fft
+
+# Up to this window length np.correlate is faster than the FFT route
+# (crossover measured with src/bench_autocorrelation.py)
+DIRECT_MAX_LENGTH = 512
+
+# FFT values closer than this (relative to the zero-lag energy) to the peak
+# are re-checked with exact dot products before picking the peak lag
+_PEAK_TOLERANCE = 1e-9
+_MAX_PEAK_CANDIDATES = 64
+
+
+class Autocorrelator:
+    """
+    Positive-lag autocorrelation of a window, for period estimation.
+
+    Short windows use np.correlate; longer ones use zero-padded real FFTs
+    (O(n log n) instead of O(n^2)). The padded transform size is chosen
+    once per window length with next_fast_len and reused across updates,
+    and scipy.fft keeps its plan cache for that size warm.
+    """
+
+    def __init__(self, method: str = "auto", direct_max_length: int = DIRECT_MAX_LENGTH):
+        if method not in ("auto", "direct", "fft"):
+            raise ValueError(f"Unknown autocorrelation method: {method}")
+        self.method = method
+        self.direct_max_length = direct_max_length
+        self._length = None
+        self._fft_size = None
+
+    def method_for(self, n: int) -> str:
+        if self.method != "auto":
+            return self.method
+        return "direct" if n <= self.direct_max_length else "fft"
+
+    def fft_size(self, n: int) -> int:
+        """Padded transform length for an n-sample window (no circular wrap-around)."""
+        if n != self._length:
+            self._length = n
+            self._fft_size = sp_fft.next_fast_len(2 * n - 1, real=True)
+        return self._fft_size
+
+    def positive_lags(self, x: np.ndarray) -> np.ndarray:
+        """r[k] = sum(x[i] * x[i + k]) for lags k = 0 .. n-1."""
+        x = np.asarray(x, dtype=np.float64)
+        n = len(x)
+        if n == 0:
+            return np.empty(0)
+        if self.method_for(n) == "direct":
+            return np.correlate(x, x, mode="full")[n - 1:]
+        size = self.fft_size(n)
+        spectrum = sp_fft.rfft(x, size)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        return sp_fft.irfft(power, size)[:n]
+
+    def peak_lag(self, x: np.ndarray, min_lag: int = 1):
+        """
+        Lag >= 'min_lag' with the largest autocorrelation (the first one on
+        ties), or None when the window is too short.
+
+        FFT round-off is far below any real difference between lags, but
+        near-ties are settled with exact dot products so the result matches
+        the direct method.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        r = self.positive_lags(x)[min_lag:]
+        if len(r) == 0:
+            return None
+        best = int(np.argmax(r))
+        if self.method_for(len(x)) == "direct":
+            return best + min_lag
+
+        energy = np.dot(x, x)
+        candidates = np.flatnonzero(r >= r[best] - _PEAK_TOLERANCE * energy)
+        if energy == 0 or len(candidates) == 1 or len(candidates) > _MAX_PEAK_CANDIDATES:
+            return best + min_lag
+        lags = candidates + min_lag
+        exact = [np.dot(x[:len(x) - lag], x[lag:]) for lag in lags]
+        return int(lags[int(np.argmax(exact))])
@@ -0,0 +1,200 @@
+from collections import deque
+import numpy as np
+from scipy import signal
+
+from models.ring_buffer import RingBuffer
+
+# Pan-Tompkins constants
+QRS_BAND_HZ = (5.0, 15.0)
+INTEGRATION_WINDOW_S = 0.15
+REFRACTORY_S = 0.2
+LEARNING_S = 2.0
+_SEARCH_BACK_RR = 1.66
+_RR_HISTORY = 8
+# Safety cap on the noise peaks kept for search-back, only reached after a
+# long stretch without beats (the oldest peaks are dropped first)
+_NOISE_PEAK_LIMIT = 256
+
+
+class StreamingBeatDetector:
+    """
+    Chunk-by-chunk QRS detector after Pan & Tompkins (1985).
+
+    Each chunk goes through a band-pass filter, a five-point derivative,
+    squaring and a moving-window integrator; every filter carries its state
+    between chunks, so the result does not depend on how the stream is cut.
+    Peaks of the integrated signal are classified as beats or noise against
+    adaptive thresholds (SPKI / NPKI), with a search-back at half threshold
+    when no beat was found for 1.66 average RR intervals.
+
+    process() returns the sample indices (counted from 'start_index') of the
+    R peaks confirmed by that chunk. A peak is confirmed once 'refractory_s'
+    has passed without a larger one, so beats are reported at most about
+    refractory_s + integration_window_s after they occur (plus the length of
+    one chunk). Beats recovered by search-back come out with the next peak,
+    and during the first 'learning_s' the thresholds are being trained and
+    beats are held until then.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        band_hz=QRS_BAND_HZ,
+        integration_window_s: float = INTEGRATION_WINDOW_S,
+        refractory_s: float = REFRACTORY_S,
+        learning_s: float = LEARNING_S,
+        start_index: int = 0
+    ):
+        self.sample_rate = float(sample_rate)
+        # Keep the pass band below Nyquist for low sampling rates
+        high = min(band_hz[1], 0.45 * self.sample_rate)
+        low = min(band_hz[0], 0.5 * high)
+        self._sos = signal.butter(2, (low, high), btype="bandpass", fs=self.sample_rate, output="sos")
+        # Band-pass delay at the centre of the band, to put beats back on the input's time axis
+        _, delay = signal.group_delay(signal.sos2tf(self._sos), w=[np.sqrt(low * high)], fs=self.sample_rate)
+        self._delay = int(round(delay[0]))
+        self._derivative = np.array([2.0, 1.0, 0.0, -1.0, -2.0]) / 8.0
+        self._window = max(1, int(round(integration_window_s * self.sample_rate)))
+        self._refractory = max(1, int(round(refractory_s * self.sample_rate)))
+        self._learning = max(1, int(round(learning_s * self.sample_rate)))
+
+        self._sos_zi = None
+        self._derivative_zi = np.zeros(len(self._derivative) - 1)
+        self._integrator_zi = np.zeros(self._window - 1)
+        # Band-passed signal, to locate the R peak inside the integration window
+        # (long enough for peaks held through training or a whole chunk)
+        self._history_span = self._learning + 4 * self._refractory + 2 * self._window
+        self._history = RingBuffer(self._history_span)
+        self._tail = np.empty(0)        # Last integrated samples, for peaks at chunk edges
+        self.n_samples = int(start_index)
+        self._start_index = int(start_index)
+
+        # Threshold training over the first 'learning_s'
+        self._learning_max = 0.0
+        self._learning_sum = 0.0
+        self._held = []
+        self.spki = None
+        self.npki = None
+
+        self._pending = None            # (index, value) of the peak waiting out the refractory period
+        # Noise peaks since the last beat, oldest first, for search-back
+        self._noise_peaks = deque(maxlen=_NOISE_PEAK_LIMIT)
+        self._rr = deque(maxlen=_RR_HISTORY)
+        self._last_peak = None          # Integrated-signal index of the last beat
+        self.last_beat = None
+
+    @property
+    def threshold(self) -> float:
+        return self.npki + 0.25 * (self.spki - self.npki)
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Feed the next samples; returns the indices of newly confirmed beats."""
+        chunk = np.nan_to_num(np.asarray(chunk, dtype=np.float64).reshape(-1))
+        if len(chunk) == 0:
+            return np.empty(0, dtype=np.int64)
+        first_index = self.n_samples
+
+        # Band-pass, derivative, squaring, moving-window integration
+        if self._sos_zi is None:
+            # Start as if the first value had always been there (no step transient)
+            self._sos_zi = signal.sosfilt_zi(self._sos) * chunk[0]
+        filtered, self._sos_zi = signal.sosfilt(self._sos, chunk, zi=self._sos_zi)
+        slope, self._derivative_zi = signal.lfilter(self._derivative, 1.0, filtered, zi=self._derivative_zi)
+        integrated, self._integrator_zi = signal.lfilter(
+            np.full(self._window, 1.0 / self._window), 1.0, slope ** 2, zi=self._integrator_zi)
+        if len(chunk) + self._history_span > self._history.capacity:
+            self._history.resize(len(chunk) + self._history_span)
+        self._history.append(filtered)
+        self.n_samples += len(chunk)
+        self._train(integrated, first_index)
+
+        peaks = self._confirm_peaks(self._local_maxima(integrated, first_index))
+        if self.spki is None:
+            self._held.extend(peaks)
+            return np.empty(0, dtype=np.int64)
+        peaks, self._held = self._held + peaks, []
+        beats = []
+        for index, value in peaks:
+            self._classify(index, value, beats)
+        return np.asarray(beats, dtype=np.int64)
+
+    # --------------------------------------------------------------------------
+    # Peak picking on the integrated signal
+    # --------------------------------------------------------------------------
+    def _train(self, integrated: np.ndarray, first_index: int):
+        remaining = self._start_index + self._learning - first_index
+        if self.spki is not None or remaining <= 0:
+            return
+        part = integrated[:remaining]
+        self._learning_max = max(self._learning_max, float(np.max(part)))
+        self._learning_sum += float(np.sum(part))
+        if len(part) == remaining:
+            self.spki = self._learning_max / 3.0
+            self.npki = 0.5 * self._learning_sum / self._learning
+
+    def _local_maxima(self, integrated: np.ndarray, first_index: int):
+        """(index, value) of local maxima, including ones straddling the previous chunk."""
+        extended = np.concatenate([self._tail, integrated])
+        offset = first_index - len(self._tail)
+        self._tail = extended[-2:]
+        centre = extended[1:-1]
+        rising = (centre > extended[:-2]) & (centre >= extended[2:])
+        positions = np.flatnonzero(rising) + 1
+        return [(offset + int(i), float(extended[i])) for i in positions]
+
+    def _confirm_peaks(self, candidates):
+        """Keep the largest peak per refractory period; release those that can no longer be beaten."""
+        confirmed = []
+        for index, value in candidates:
+            if self._pending is not None and index - self._pending[0] < self._refractory:
+                if value > self._pending[1]:
+                    self._pending = (index, value)
+                continue
+            if self._pending is not None:
+                confirmed.append(self._pending)
+            self._pending = (index, value)
+        if self._pending is not None and self.n_samples - 1 - self._pending[0] >= self._refractory:
+            confirmed.append(self._pending)
+            self._pending = None
+        return confirmed
+
+    # --------------------------------------------------------------------------
+    # Adaptive thresholds
+    # --------------------------------------------------------------------------
+    def _classify(self, index: int, value: float, beats: list):
+        if self._last_peak is not None and index - self._last_peak < self._refractory:
+            return
+        # Search back at half the threshold for a beat missed since the last one
+        if self._rr and index - self._last_peak > _SEARCH_BACK_RR * np.mean(self._rr):
+            missed = [peak for peak in self._noise_peaks
+                      if peak[1] > 0.5 * self.threshold and index - peak[0] >= self._refractory]
+            if missed:
+                missed_index, missed_value = max(missed, key=lambda peak: peak[1])
+                self._add_beat(missed_index, missed_value, beats, weight=0.25)
+
+        if value > self.threshold:
+            self._add_beat(index, value, beats, weight=0.125)
+        else:
+            self.npki = 0.125 * value + 0.875 * self.npki
+            self._noise_peaks.append((index, value))
+
+    def _add_beat(self, index: int, value: float, beats: list, weight: float):
+        self.spki = weight * value + (1.0 - weight) * self.spki
+        if self._last_peak is not None:
+            self._rr.append(index - self._last_peak)
+        self._last_peak = index
+        while self._noise_peaks and self._noise_peaks[0][0] <= index:
+            self._noise_peaks.popleft()
+        beat = self._locate_r_peak(index)
+        if self.last_beat is None or beat > self.last_beat:
+            self.last_beat = beat
+            beats.append(beat)
+
+    def _locate_r_peak(self, index: int) -> int:
+        """Largest band-passed deflection in the integration window ending at 'index'."""
+        start = max(self._start_index, index - self._window, self.n_samples - len(self._history))
+        stop = index + 1
+        if stop <= start:
+            return max(self._start_index, index - self._window // 2 - self._delay)
+        filtered = self._history.tail(self.n_samples - start)[:stop - start]
+        return max(self._start_index, start + int(np.argmax(np.abs(filtered))) - self._delay)
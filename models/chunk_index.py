@@ -0,0 +1,129 @@
+import numpy as np
+
+from models.sample_buffer import SampleBuffer
+
+# Columns of the index, one row per appended chunk
+CHUNK_FIELDS = (
+    "receive_time",     # host time.time() when the chunk was handed over by the connection
+    "sample_offset",    # index of the chunk's first sample in SignalData
+    "n_samples",
+    "seq",              # acquisition-side sequence number (gaps mean chunks never arrived)
+    "dropped_samples",  # samples lost on the link since the previous chunk
+    "crc_rejected",     # packets rejected by the CRC check since the previous chunk
+)
+_COLUMN = {name: i for i, name in enumerate(CHUNK_FIELDS)}
+
+def lossy_rows(rows: np.ndarray) -> np.ndarray:
+    """Rows (of an index snapshot) that follow dropped samples, rejected packets or a sequence gap."""
+    lossy = (rows[:, _COLUMN["dropped_samples"]] > 0) | (rows[:, _COLUMN["crc_rejected"]] > 0)
+    lossy[1:] |= np.diff(rows[:, _COLUMN["seq"]]) != 1
+    return rows[lossy]
+
+def loss_description(row) -> str:
+    """Human-readable note for one lossy row, e.g. for file annotations."""
+    parts = []
+    if row[_COLUMN["dropped_samples"]] > 0:
+        parts.append(f"{int(row[_COLUMN['dropped_samples']])} samples dropped")
+    if row[_COLUMN["crc_rejected"]] > 0:
+        parts.append(f"{int(row[_COLUMN['crc_rejected']])} packets rejected")
+    return ", ".join(parts) or "chunk sequence gap"
+
+
+class ChunkIndex:
+    """
+    Compact side index describing every chunk appended to a SignalData.
+
+    Rows live in a growable float64 array (integers are exact up to 2**53),
+    so recording costs one small row per chunk and queries are vectorized.
+    """
+
+    def __init__(self):
+        self._rows = SampleBuffer(len(CHUNK_FIELDS), initial_capacity=256)
+        self._next_seq = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def record(self, sample_offset: int, n_samples: int, info: dict = None):
+        """Add the row for a chunk. Missing info fields default to NaN time, no losses and the next seq."""
+        info = info or {}
+        seq = info.get("seq", self._next_seq)
+        self._next_seq = seq + 1
+        self._rows.append([
+            info.get("receive_time", np.nan),
+            sample_offset,
+            n_samples,
+            seq,
+            info.get("dropped_samples", 0),
+            info.get("crc_rejected", 0),
+        ])
+
+    # --------------------------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------------------------
+    def rows(self) -> np.ndarray:
+        """Read-only (n_chunks, len(CHUNK_FIELDS)) view of the index."""
+        return self._rows.view()
+
+    def column(self, name: str) -> np.ndarray:
+        return self.rows()[:, _COLUMN[name]]
+
+    def chunk_at(self, sample_index: int) -> dict:
+        """The row of the chunk that contains 'sample_index'."""
+        row = int(np.searchsorted(self.column("sample_offset"), sample_index, side="right")) - 1
+        if row < 0:
+            raise IndexError(f"No chunk contains sample {sample_index}")
+        return self._row_dict(row)
+
+    def between(self, start_time: float, stop_time: float) -> np.ndarray:
+        """Rows received in [start_time, stop_time) (host clock)."""
+        times = self.column("receive_time")
+        return self.rows()[(times >= start_time) & (times < stop_time)]
+
+    def seq_gaps(self) -> np.ndarray:
+        """Rows whose sequence number skips ahead of the previous chunk's."""
+        seq = self.column("seq")
+        gap = np.zeros(len(seq), dtype=bool)
+        gap[1:] = np.diff(seq) != 1
+        return self.rows()[gap]
+
+    def lossy_chunks(self) -> np.ndarray:
+        """Rows that follow dropped samples, rejected packets or a sequence gap."""
+        return lossy_rows(self.rows())
+
+    def summary(self) -> dict:
+        """Totals and timing statistics for diagnosing link throughput."""
+        rows = self.rows()
+        times = rows[:, _COLUMN["receive_time"]]
+        intervals = np.diff(times[np.isfinite(times)])
+        span = intervals.sum() if len(intervals) else 0.0
+        n_samples = rows[:, _COLUMN["n_samples"]]
+        return {
+            "n_chunks": len(rows),
+            "n_samples": int(n_samples.sum()),
+            "dropped_samples": int(rows[:, _COLUMN["dropped_samples"]].sum()),
+            "crc_rejected": int(rows[:, _COLUMN["crc_rejected"]].sum()),
+            "seq_gaps": len(self.seq_gaps()),
+            "mean_interval_s": float(intervals.mean()) if len(intervals) else None,
+            "max_interval_s": float(intervals.max()) if len(intervals) else None,
+            # Samples per second actually delivered, chunk to chunk
+            "delivered_rate": float(n_samples[1:].sum() / span) if span > 0 else None,
+        }
+
+    def _row_dict(self, row: int) -> dict:
+        values = self.rows()[row]
+        return {name: (float(v) if name == "receive_time" else int(v)) for name, v in zip(CHUNK_FIELDS, values)}
+
+    # --------------------------------------------------------------------------
+    # Export
+    # --------------------------------------------------------------------------
+    def save_csv(self, filename: str):
+        self.write_csv(filename, self.rows())
+
+    @staticmethod
+    def write_csv(filename: str, rows: np.ndarray):
+        """Write index rows (e.g. a snapshot from rows()) as CSV with one column per field."""
+        with open(filename, "w") as f:
+            f.write(",".join(CHUNK_FIELDS) + "\n")
+            for row in rows.tolist():
+                f.write(f"{row[0]!r}," + ",".join(str(int(v)) for v in row[1:]) + "\n")
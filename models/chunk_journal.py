@@ -0,0 +1,207 @@
+import glob
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+
+from models.adc import AdcScale
+from models.signal_data import SignalData
+
+JOURNAL_MAGIC = b"BMEJ"
+JOURNAL_EXT = ".journal"
+
+# Per-chunk record header: magic, sequence number, payload bytes, crc32 of payload
+_RECORD = struct.Struct("<4sQII")
+_RECORD_MAGIC = b"CHNK"
+# Written by close(): the session ended normally (it may still be unsaved)
+_END_MAGIC = b"DONE"
+# File header: magic, length of the JSON metadata that follows
+_HEADER = struct.Struct("<4sI")
+
+
+class ChunkJournal:
+    """
+    Append-only write-ahead journal of acquisition chunks.
+
+    Every chunk is stored as it arrives with a sequence number and a CRC32 of
+    its payload, so a session interrupted by a crash can be rebuilt up to the
+    last intact chunk. append() only enqueues; encoding and writing happen on
+    a background thread so the GUI thread never waits on the disk.
+    """
+
+    def __init__(self, path: str, sample_rate: float, channel_labels=("Signal",), units=None,
+                 dtype=np.float64, adc_scale=None, fsync_interval_s: float = 1.0):
+        self.path = path
+        self.n_channels = len(channel_labels)
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.fsync_interval_s = fsync_interval_s
+        self._seq = 0
+        self._queue = queue.Queue()
+
+        meta = {
+            "sample_rate": sample_rate,
+            "channel_labels": list(channel_labels),
+            "units": list(units) if units is not None else ["V"] * self.n_channels,
+            "dtype": self.dtype.str,
+            "adc_gain": adc_scale.gain if adc_scale is not None else None,
+            "adc_baseline": adc_scale.baseline if adc_scale is not None else None,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        meta_bytes = json.dumps(meta).encode()
+        self._file.write(_HEADER.pack(JOURNAL_MAGIC, len(meta_bytes)) + meta_bytes)
+        self._file.flush()
+
+        self._thread = threading.Thread(target=self._writer_loop, name="ChunkJournal", daemon=True)
+        self._thread.start()
+
+    @property
+    def n_chunks(self) -> int:
+        """Chunks appended so far."""
+        return self._seq
+
+    def append(self, chunk):
+        """Queue one chunk ((n,) or (n, n_channels)) for journaling."""
+        if self._file is None:
+            return
+        self._queue.put((self._seq, chunk))
+        self._seq += 1
+
+    def close(self):
+        """Write everything still queued, mark the journal as closed cleanly and close the file."""
+        if self._file is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._file = None
+
+    def discard(self):
+        """Close and delete the journal (the session was saved or abandoned)."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    # --------------------------------------------------------------------------
+    # Writer thread
+    # --------------------------------------------------------------------------
+    def _writer_loop(self):
+        last_sync = 0.0
+        while True:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval_s)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                self._file.write(_RECORD.pack(_END_MAGIC, self._seq, 0, 0))
+                break
+            if item:
+                seq, chunk = item
+                payload = np.asarray(chunk, dtype=self.dtype).reshape(-1, self.n_channels).tobytes()
+                self._file.write(_RECORD.pack(_RECORD_MAGIC, seq, len(payload), zlib.crc32(payload)))
+                self._file.write(payload)
+                # Reaching the OS cache is enough to survive an application crash
+                self._file.flush()
+
+            now = time.monotonic()
+            if now - last_sync >= self.fsync_interval_s:
+                os.fsync(self._file.fileno())
+                last_sync = now
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+class RecoveredSession:
+    """A session rebuilt from a journal: its metadata plus the intact frames."""
+
+    def __init__(self, path: str, meta: dict, frames: np.ndarray, n_chunks: int, error: str = None,
+                 clean: bool = False):
+        self.path = path
+        self.sample_rate = meta["sample_rate"]
+        self.channel_labels = meta["channel_labels"]
+        self.units = meta["units"]
+        self.adc_gain = meta.get("adc_gain")
+        self.adc_baseline = meta.get("adc_baseline")
+        self.frames = frames
+        self.n_chunks = n_chunks
+        # Why reading stopped early (torn tail, bad checksum, sequence gap), if it did
+        self.error = error
+        # True when the journal was closed normally (the app did not crash), but never saved
+        self.clean = clean
+
+    @property
+    def n_samples(self) -> int:
+        return len(self.frames)
+
+    @property
+    def duration_s(self) -> float:
+        return self.n_samples / self.sample_rate
+
+    def to_signal_data(self) -> SignalData:
+        """Load the recovered frames into a SignalData so the normal save paths apply."""
+        adc_scale = None
+        if self.adc_gain is not None:
+            adc_scale = AdcScale(self.adc_gain, self.adc_baseline, dtype=self.frames.dtype)
+        signal_data = SignalData(self.sample_rate, channel_labels=self.channel_labels,
+                                 units=self.units, adc_scale=adc_scale)
+        signal_data.append_chunk(self.frames)
+        return signal_data
+
+
+def read_journal(path: str) -> RecoveredSession:
+    """
+    Rebuild a session from a journal file, keeping every chunk up to the first
+    one that is truncated, fails its checksum, or breaks the sequence.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    magic, meta_len = _HEADER.unpack_from(raw, 0)
+    if magic != JOURNAL_MAGIC:
+        raise ValueError(f"{path} is not a chunk journal")
+    offset = _HEADER.size
+    meta = json.loads(raw[offset:offset + meta_len])
+    offset += meta_len
+
+    dtype = np.dtype(meta["dtype"])
+    n_channels = len(meta["channel_labels"])
+    payloads = []
+    error = None
+    clean = False
+    expected_seq = 0
+    while offset < len(raw):
+        if offset + _RECORD.size > len(raw):
+            error = "truncated chunk header"
+            break
+        record_magic, seq, n_bytes, crc = _RECORD.unpack_from(raw, offset)
+        if record_magic == _END_MAGIC:
+            clean = True
+            break
+        start = offset + _RECORD.size
+        payload = raw[start:start + n_bytes]
+        if record_magic != _RECORD_MAGIC or len(payload) != n_bytes:
+            error = f"truncated chunk {seq}"
+            break
+        if zlib.crc32(payload) != crc:
+            error = f"checksum mismatch in chunk {seq}"
+            break
+        if seq != expected_seq:
+            error = f"expected chunk {expected_seq}, found {seq}"
+            break
+        payloads.append(payload)
+        expected_seq += 1
+        offset = start + n_bytes
+
+    frames = np.frombuffer(b"".join(payloads), dtype=dtype).reshape(-1, n_channels)
+    return RecoveredSession(path, meta, frames, len(payloads), error, clean)
+
+
+def find_journals(journal_dir: str):
+    """Journals left behind by sessions that were never saved (crashed or not), oldest first."""
+    return sorted(glob.glob(os.path.join(journal_dir, "*" + JOURNAL_EXT)))
@@ -0,0 +1,324 @@
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+import zstandard
+
+from models.adc import AdcScale
+from models.session_file import SESSION_FORMAT, SessionReader, session_paths
+
+COMPRESSED_SESSION_VERSION = 2
+COMPRESSED_CODEC = "delta-shuffle-zstd"
+COMPRESSED_DATA_EXT = ".zst"
+
+def _delta_dtype(dtype: np.dtype) -> np.dtype:
+    """Signed integer type with the same width, used to difference the raw bits."""
+    return np.dtype(f"<i{np.dtype(dtype).itemsize}")
+
+def encode_frame(frames: np.ndarray, compressor) -> bytes:
+    """
+    Losslessly compress (n, n_channels) samples as one independent frame.
+
+    Each channel is differenced over time on the integer view of its bits
+    (wrapping arithmetic, so float64 works too), the bytes of the deltas are
+    shuffled so high and low bytes sit together, and the result is zstd
+    compressed. The first delta of a frame is the sample itself, so frames
+    decode without their neighbours.
+    """
+    ints = np.ascontiguousarray(frames.T).view(_delta_dtype(frames.dtype))
+    deltas = np.empty_like(ints)
+    deltas[:, 0] = ints[:, 0]
+    np.subtract(ints[:, 1:], ints[:, :-1], out=deltas[:, 1:])
+    shuffled = deltas.view(np.uint8).reshape(-1, deltas.dtype.itemsize).T
+    return compressor.compress(np.ascontiguousarray(shuffled).tobytes())
+
+def decode_frame(data: bytes, n_samples: int, n_channels: int, dtype, decompressor) -> np.ndarray:
+    """Inverse of encode_frame; returns (n_samples, n_channels) samples of 'dtype'."""
+    dtype = np.dtype(dtype)
+    delta_dtype = _delta_dtype(dtype)
+    raw = decompressor.decompress(data, max_output_size=n_samples * n_channels * dtype.itemsize)
+    shuffled = np.frombuffer(raw, dtype=np.uint8).reshape(delta_dtype.itemsize, -1)
+    deltas = np.ascontiguousarray(shuffled.T).view(delta_dtype).reshape(n_channels, n_samples)
+    return np.cumsum(deltas, axis=1, dtype=delta_dtype).view(dtype).T
+
+
+class CompressedSessionWriter:
+    """
+    Session container with delta + zstd compressed sample frames.
+
+    Samples are collected into frames of 'frame_samples' and each frame is
+    encoded independently (see encode_frame), so any range can be read back
+    by decompressing only the frames that cover it. The JSON header carries
+    the usual session fields plus a frame index (sample offset, byte offset,
+    sample count, byte count per frame).
+
+    Compression and file writes run on a background thread; write_chunk only
+    copies the chunk into the pending frame. If the thread hits an error
+    (e.g. a full disk), it keeps draining its queue without writing, and the
+    error is raised from the next write_chunk, flush or close. With
+    'adc_scale', chunks are raw ADC codes and are stored as such (decoded to
+    physical units on read).
+    """
+
+    def __init__(self, filename: str, sample_rate: float, channel_labels=("Signal",), units=None,
+                 circuit_id=None, adc_scale: AdcScale = None, frame_samples: int = 65536,
+                 level: int = 3, flush_interval_s: float = 1.0):
+        self.header_path, _ = session_paths(filename)
+        self.data_path = os.path.splitext(self.header_path)[0] + COMPRESSED_DATA_EXT
+        self.sample_rate = sample_rate
+        self.channel_labels = list(channel_labels)
+        self.units = list(units) if units is not None else ["V"] * len(self.channel_labels)
+        self.circuit_id = circuit_id
+        self.adc_scale = adc_scale
+        self.dtype = adc_scale.dtype.newbyteorder("<") if adc_scale is not None else np.dtype("<f8")
+        self.frame_samples = int(frame_samples)
+        self.level = level
+        self.flush_interval_s = flush_interval_s
+
+        self._file = open(self.data_path, "wb")
+        self._pending = []
+        self._n_pending = 0
+        self._n_samples = 0
+        self._frame_index = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        # First exception raised on the compression thread
+        self.error = None
+        self._thread = threading.Thread(target=self._compress_loop, name="CompressedSession", daemon=True)
+        self._thread.start()
+        self._write_header()
+
+    @property
+    def n_channels(self) -> int:
+        return len(self.channel_labels)
+
+    def write_chunk(self, chunk: np.ndarray):
+        if self._file is None:
+            return
+        self._raise_error()
+        frames = np.asarray(chunk, dtype=self.dtype).reshape(-1, self.n_channels)
+        if len(frames) == 0:
+            return
+        self._pending.append(frames.copy())
+        self._n_pending += len(frames)
+
+        if self._n_pending >= self.frame_samples:
+            pending = np.concatenate(self._pending)
+            n_full = len(pending) // self.frame_samples * self.frame_samples
+            for start in range(0, n_full, self.frame_samples):
+                self._queue_frame(pending[start:start + self.frame_samples])
+            self._pending = [pending[n_full:]] if n_full < len(pending) else []
+            self._n_pending = len(pending) - n_full
+
+        if time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self._queue.put("flush")
+            self._last_flush = time.monotonic()
+
+    def flush(self):
+        """Compress the partial frame and wait until everything is on disk."""
+        if self._file is None:
+            return
+        if self._n_pending:
+            self._queue_frame(np.concatenate(self._pending))
+            self._pending = []
+            self._n_pending = 0
+        self._queue.put("flush")
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """Write everything still pending and close the file; raises the compression thread's error, if any."""
+        if self._file is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._queue.put(None)
+            self._thread.join()
+            self._file.close()
+            self._file = None
+        print(f"Compressed session saved as {self.header_path} + {os.path.basename(self.data_path)}")
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise OSError(f"Compressed session {self.data_path} failed: {self.error}") from self.error
+
+    def _queue_frame(self, frames: np.ndarray):
+        self._queue.put((self._n_samples, frames))
+        self._n_samples += len(frames)
+
+    # --------------------------------------------------------------------------
+    # Compression thread
+    # --------------------------------------------------------------------------
+    def _compress_loop(self):
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is not None:
+                    # Writing already failed; only drain the queue so flush() does not hang
+                    continue
+                if item == "flush":
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    self._write_header()
+                    continue
+                sample_offset, frames = item
+                data = encode_frame(frames, compressor)
+                byte_offset = self._file.tell()
+                self._file.write(data)
+                with self._lock:
+                    self._frame_index.append([sample_offset, byte_offset, len(frames), len(data)])
+            except Exception as e:
+                self.error = e
+            finally:
+                self._queue.task_done()
+
+    def _write_header(self):
+        with self._lock:
+            frame_index = list(self._frame_index)
+        header = {
+            "format": SESSION_FORMAT,
+            "version": COMPRESSED_SESSION_VERSION,
+            "codec": COMPRESSED_CODEC,
+            "data_file": os.path.basename(self.data_path),
+            "dtype": self.dtype.str,
+            "sample_rate": self.sample_rate,
+            "circuit_id": self.circuit_id,
+            "channel_labels": self.channel_labels,
+            "units": self.units,
+            "adc_gain": self.adc_scale.gain if self.adc_scale is not None else None,
+            "adc_baseline": self.adc_scale.baseline if self.adc_scale is not None else None,
+            # Only samples whose frame is on disk count
+            "n_samples": sum(entry[2] for entry in frame_index),
+            "frames": frame_index,
+        }
+        tmp_path = self.header_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, self.header_path)
+
+
+class CompressedSessionReader:
+    """
+    Random-access reader for compressed sessions, with the same read API as
+    SessionReader. Only the frames overlapping a requested range are
+    decompressed; the most recently decoded frames are kept in a small cache
+    so sequential reads decode each frame once.
+    """
+
+    CACHE_FRAMES = 4
+
+    def __init__(self, filename: str):
+        header_path, _ = session_paths(filename)
+        with open(header_path, "r") as f:
+            header = json.load(f)
+        if header.get("format") != SESSION_FORMAT or header.get("codec") != COMPRESSED_CODEC:
+            raise ValueError(f"{header_path} is not a compressed {SESSION_FORMAT} header")
+
+        self.sample_rate = header["sample_rate"]
+        self.circuit_id = header.get("circuit_id")
+        self.channel_labels = header["channel_labels"]
+        self.units = header.get("units", ["V"] * len(self.channel_labels))
+        self.dtype = np.dtype(header["dtype"])
+        self.adc_scale = None
+        if header.get("adc_gain") is not None:
+            self.adc_scale = AdcScale(header["adc_gain"], header["adc_baseline"], dtype=self.dtype)
+        self.n_samples = header["n_samples"]
+
+        frames = np.asarray(header["frames"], dtype=np.int64).reshape(-1, 4)
+        self._sample_offsets = frames[:, 0]
+        self._byte_offsets = frames[:, 1]
+        self._frame_lengths = frames[:, 2]
+        self._byte_lengths = frames[:, 3]
+        self.chunk_offsets = self._sample_offsets
+
+        # Map the compressed file; only the frames that are read get paged in
+        data_path = os.path.join(os.path.dirname(header_path), header["data_file"])
+        if os.path.getsize(data_path) > 0:
+            self._data = np.memmap(data_path, dtype=np.uint8, mode="r")
+        else:
+            self._data = np.empty(0, dtype=np.uint8)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._cache = {}
+
+    def __len__(self):
+        return self.n_samples
+
+    @property
+    def n_frames(self) -> int:
+        return len(self._sample_offsets)
+
+    @property
+    def duration_s(self) -> float:
+        return self.n_samples / self.sample_rate
+
+    def channel_index(self, channel) -> int:
+        if isinstance(channel, str):
+            return self.channel_labels.index(channel)
+        return int(channel)
+
+    def read_raw(self, start: int = 0, stop: int = None, channel=None) -> np.ndarray:
+        """Samples [start, stop) as stored (ADC codes for raw recordings)."""
+        start, stop, _ = slice(start, stop).indices(self.n_samples)
+        stop = max(start, stop)
+        n_channels = len(self.channel_labels)
+        if stop == start:
+            out = np.empty((0, n_channels), dtype=self.dtype)
+        else:
+            first = int(np.searchsorted(self._sample_offsets, start, side="right")) - 1
+            last = int(np.searchsorted(self._sample_offsets, stop, side="left"))
+            parts = [self._decode(i) for i in range(first, last)]
+            out = parts[0] if len(parts) == 1 else np.concatenate(parts)
+            base = self._sample_offsets[first]
+            out = out[start - base:stop - base]
+        return out if channel is None else out[:, self.channel_index(channel)]
+
+    def read(self, start: int = 0, stop: int = None, channel=None) -> np.ndarray:
+        """Samples [start, stop) in physical units, (n, n_channels) or 1-D for one channel."""
+        raw = self.read_raw(start, stop, channel)
+        if self.adc_scale is None:
+            return raw
+        return self.adc_scale.to_physical(raw)
+
+    def read_time(self, start_s: float, stop_s: float = None, channel=None) -> np.ndarray:
+        """Samples between two times (in seconds from the start of the session)."""
+        start = max(0, int(np.floor(start_s * self.sample_rate)))
+        stop = None if stop_s is None else max(start, int(np.ceil(stop_s * self.sample_rate)))
+        return self.read(start, stop, channel)
+
+    def iter_blocks(self, channel=0, start_s: float = 0.0, block_samples: int = 65536):
+        """Yield (time, signal) float64 blocks of one channel from 'start_s' on, reading lazily."""
+        start = min(self.n_samples, max(0, int(round(start_s * self.sample_rate))))
+        for block_start in range(start, self.n_samples, block_samples):
+            signal_data = np.asarray(self.read(block_start, block_start + block_samples, channel), dtype=np.float64)
+            time_data = np.arange(block_start, block_start + len(signal_data)) / self.sample_rate
+            yield time_data, signal_data
+
+    def _decode(self, frame: int) -> np.ndarray:
+        cached = self._cache.get(frame)
+        if cached is not None:
+            return cached
+        byte_offset = self._byte_offsets[frame]
+        data = self._data[byte_offset:byte_offset + self._byte_lengths[frame]].tobytes()
+        decoded = decode_frame(data, int(self._frame_lengths[frame]), len(self.channel_labels),
+                               self.dtype, self._decompressor)
+        if len(self._cache) >= self.CACHE_FRAMES:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[frame] = decoded
+        return decoded
+
+
+def open_session(filename: str):
+    """Open a session header with the reader matching its container (plain or compressed)."""
+    header_path, _ = session_paths(filename)
+    with open(header_path, "r") as f:
+        header = json.load(f)
+    if header.get("codec") == COMPRESSED_CODEC:
+        return CompressedSessionReader(filename)
+    return SessionReader(filename)
@@ -0,0 +1,250 @@
+import numpy as np
+
+COMMA = ord(",")
+NEWLINE = ord("\n")
+MINUS = ord("-")
+DOT = ord(".")
+ZERO = ord("0")
+
+# Decimals tried when looking for a value's shortest exact fixed-point form;
+# 10**22 is the largest power of ten that is exact in float64
+MAX_DECIMALS = 22
+_POW10 = np.array([float(10 ** k) for k in range(MAX_DECIMALS + 1)])
+# Scaled values stay below this (18 digits), so they split into two 9-digit halves
+_MAX_SCALED = 1e18
+# Veltkamp splitting constant (2**27 + 1) for exact float64 products
+_SPLITTER = 134217729.0
+
+def _split(a: np.ndarray):
+    c = _SPLITTER * a
+    high = c - (c - a)
+    return high, a - high
+
+_POW10_HIGH, _POW10_LOW = _split(_POW10)
+_EXPONENT_BITS = np.int64(0x7FF0000000000000)
+_MANTISSA_BITS = np.int64(0x000FFFFFFFFFFFFF)
+
+def _scale_exact(a: np.ndarray, decimals: np.ndarray):
+    """
+    Nearest integer S to a * 10**decimals (a >= 0), and whether the decimal
+    S / 10**decimals parses back to exactly 'a'. The product is evaluated
+    without rounding error (Dekker's two-product), so the check is exact.
+    """
+    power = _POW10[decimals]
+    product = a * power
+    in_range = product < _MAX_SCALED
+    # Out-of-range rows are zeroed: their result is discarded anyway
+    a = np.where(in_range, a, 0.0)
+    product = np.where(in_range, product, 0.0)
+    a_high, a_low = _split(a)
+    power_high, power_low = _POW10_HIGH[decimals], _POW10_LOW[decimals]
+    error = ((a_high * power_high - product) + a_high * power_low + a_low * power_high) + a_low * power_low
+    rounded = np.rint(product)
+    residual = (product - rounded) + error
+    carry = np.rint(residual)
+    residual -= carry
+    scaled = rounded.astype(np.int64) + carry.astype(np.int64)
+
+    # Round trip if the decimal lies inside the interval that rounds to 'a':
+    # half an ulp, or a quarter below a power of two where the gap halves
+    bits = a.view(np.int64)
+    ulp = (bits & _EXPONENT_BITS).view(np.float64) * 2.0 ** -52
+    half_gap = ulp * np.where(bits & _MANTISSA_BITS, 0.5, 0.25)
+    exact = in_range & ((residual == 0) | (np.abs(residual) < half_gap * power * (1.0 - 1e-9)))
+    return scaled, exact
+
+def _shortest_decimals(a: np.ndarray):
+    """
+    Fewest decimals (0..MAX_DECIMALS) whose fixed-point text round-trips each
+    finite a >= 0, found by bisection (if d decimals round-trip, so do d + 1).
+    Returns (decimals, scaled integers, exact); rows without an exact form
+    (too small, too large or non-finite) have exact False.
+    """
+    finite = np.isfinite(a)
+    a = np.where(finite, a, 0.0)
+    positive = a > 0
+    log_a = np.log10(np.where(positive, a, 1.0))
+    # Decimals for 'digits' significant digits, within int64 and 10**22
+    exponent = np.where(positive, np.floor(log_a), 0).astype(np.int64)
+    top = np.where(positive, np.floor(np.log10(_MAX_SCALED) - log_a), MAX_DECIMALS).astype(np.int64)
+    def decimals_for(digits, rows):
+        # Values of 1e18 and up have a negative 'top'; they fall back to repr()
+        return np.clip(digits - 1 - exponent[rows], 0, np.clip(top[rows], 0, MAX_DECIMALS))
+
+    # Most values need 15 digits or fewer; the rest 16, 17 or (at worst) 18
+    rows = np.arange(len(a))
+    high = decimals_for(15, rows)
+    scaled, exact = _scale_exact(a, high)
+    for digits in (16, 17, 18):
+        rows = np.flatnonzero(~exact & finite)
+        if len(rows) == 0:
+            break
+        high[rows] = decimals_for(digits, rows)
+        scaled[rows], exact[rows] = _scale_exact(a[rows], high[rows])
+    exact &= finite
+
+    # Bisect below the bracket (15 digits or fewer) for the shortest form
+    low = np.where(exact & (high == decimals_for(15, np.arange(len(a)))), -1, high - 1)
+    while True:
+        rows = np.flatnonzero(exact & (high - low > 1))
+        if len(rows) == 0:
+            break
+        mid = (low[rows] + high[rows]) // 2
+        mid_scaled, ok = _scale_exact(a[rows], mid)
+        high[rows[ok]] = mid[ok]
+        scaled[rows[ok]] = mid_scaled[ok]
+        low[rows[~ok]] = mid[~ok]
+    return high, scaled, exact
+
+def _format_column(values: np.ndarray):
+    """
+    Render a float column as the shortest fixed-point decimal text that
+    parses back to the same float, without going through Python strings.
+    Returns a (n, width) uint8 character matrix, a mask of the characters
+    that belong in the output (leading padding and unused decimals masked
+    out, keeping at least one decimal like repr), and which rows have such
+    an exact form (the others are left for repr()).
+    """
+    n = len(values)
+    decimals, scaled, exact = _shortest_decimals(np.abs(values))
+    decimals = np.where(exact, decimals, 0)
+    scaled = np.where(exact, scaled, 0)
+    negative = np.signbit(values) & exact
+
+    # Decimal digits of 'scaled', least significant first (the last column stays 0),
+    # taken from its two 9-digit halves in cheaper 32-bit arithmetic
+    digits = np.zeros((n, 20), dtype=np.uint8)
+    n_digits = np.zeros(n, dtype=np.int64)
+    high_half, low_half = np.divmod(scaled, 10 ** 9)
+    for base, rest in ((0, low_half.astype(np.uint32)), (9, high_half.astype(np.uint32))):
+        for k in range(base, base + 9):
+            if not rest.any():
+                break
+            digits[:, k] = rest % 10
+            n_digits = np.where(rest > 0, k + 1, n_digits)
+            rest //= 10
+    n_int = np.maximum(n_digits - decimals, 1)
+    w_int = int(n_int.max()) if n else 1
+    w_frac = max(1, int(decimals.max())) if n else 1
+
+    # Column c of the digits shows the digit at power decimals + offset[c]
+    offsets = np.arange(w_int - 1, -w_frac - 1, -1)
+    power = decimals[:, None] + offsets
+    power = np.where((power >= 0) & (power < 19), power, 19)
+    body = ZERO + np.take_along_axis(digits, power, axis=1)
+
+    width = 1 + w_int + 1 + w_frac
+    chars = np.empty((n, width), dtype=np.uint8)
+    mask = np.empty((n, width), dtype=bool)
+
+    chars[:, 0] = MINUS
+    mask[:, 0] = negative
+
+    chars[:, 1:w_int + 1] = body[:, :w_int]
+    mask[:, 1:w_int + 1] = np.arange(w_int) >= (w_int - n_int)[:, None]
+
+    chars[:, w_int + 1] = DOT
+    mask[:, w_int + 1] = True
+
+    chars[:, w_int + 2:] = body[:, w_int:]
+    mask[:, w_int + 2:] = np.arange(w_frac) < np.maximum(decimals, 1)[:, None]
+
+    return chars, mask, exact
+
+def _repr_value(v: float) -> str:
+    # Same spelling pandas uses for missing values
+    return "" if v != v else repr(v)
+
+
+class CsvEncoder:
+    """
+    Vectorized CSV encoder for the 'Time_s,<label>[,<label>...]' layout used
+    by the save and streaming paths (one value column per channel). Rows are
+    rendered in numpy character matrices one block at a time, so no
+    DataFrame, time column or per-value Python string is ever built for the
+    whole signal.
+
+    Times (index / sample_rate) and values are written as the shortest
+    fixed-point text that reads back as the same float64, so the output is
+    lossless. Rows holding NaN/inf or values out of fixed-point range
+    (magnitudes from 1e18 up, or too small for 22 decimals) are written with repr().
+    """
+
+    BLOCK_ROWS = 65536
+
+    def __init__(self, sample_rate: float):
+        self.sample_rate = sample_rate
+
+    @staticmethod
+    def header(channel_labels="Signal") -> bytes:
+        if isinstance(channel_labels, str):
+            channel_labels = [channel_labels]
+        return ("Time_s," + ",".join(channel_labels) + "\n").encode()
+
+    @staticmethod
+    def _as_frames(values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        return values.reshape(-1, 1) if values.ndim == 1 else values
+
+    def encode(self, values: np.ndarray, start_index: int = 0) -> bytes:
+        """
+        Encode rows for 'values' ((n,) or (n, n_channels)), whose first
+        sample has index 'start_index'.
+        """
+        values = self._as_frames(values)
+        return b"".join(
+            self._encode_block(values[start:start + self.BLOCK_ROWS], start_index + start)
+            for start in range(0, len(values), self.BLOCK_ROWS)
+        )
+
+    def write(self, f, values: np.ndarray, start_index: int = 0):
+        """Encode and write block by block to a binary file object."""
+        values = self._as_frames(values)
+        for start in range(0, len(values), self.BLOCK_ROWS):
+            f.write(self._encode_block(values[start:start + self.BLOCK_ROWS], start_index + start))
+
+    def _encode_block(self, values: np.ndarray, start_index: int) -> bytes:
+        n = len(values)
+        if n == 0:
+            return b""
+        times = (start_index + np.arange(n)) / self.sample_rate
+
+        separator = np.full((n, 1), COMMA, dtype=np.uint8)
+        newline = np.full((n, 1), NEWLINE, dtype=np.uint8)
+        always = np.ones((n, 1), dtype=bool)
+
+        t_chars, t_mask, exact = _format_column(times)
+        char_parts, mask_parts = [t_chars], [t_mask]
+        for ch in range(values.shape[1]):
+            v_chars, v_mask, v_exact = _format_column(values[:, ch])
+            char_parts += [separator, v_chars]
+            mask_parts += [always, v_mask]
+            exact &= v_exact
+        char_parts.append(newline)
+        mask_parts.append(always)
+
+        chars = np.hstack(char_parts)
+        mask = np.hstack(mask_parts)
+        # Boolean indexing walks rows in order, so this compacts each row in place
+        text = chars[mask].tobytes()
+        if exact.all():
+            return text
+
+        # Splice in repr() rows where some value has no exact fixed-point form
+        row_ends = np.cumsum(mask.sum(axis=1))
+        parts, position = [], 0
+        for row in np.flatnonzero(~exact):
+            row_start = row_ends[row - 1] if row else 0
+            parts.append(text[position:row_start])
+            parts.append((_repr_value(float(times[row])) + ","
+                          + ",".join(_repr_value(v) for v in values[row].tolist()) + "\n").encode())
+            position = row_ends[row]
+        parts.append(text[position:])
+        return b"".join(parts)
+
+def write_csv(filename: str, values: np.ndarray, sample_rate: float, channel_labels="Signal"):
+    """Write a whole (n,) or (n, n_channels) signal as CSV with constant extra memory."""
+    encoder = CsvEncoder(sample_rate)
+    with open(filename, "wb") as f:
+        f.write(CsvEncoder.header(channel_labels))
+        encoder.write(f, values)
@@ -0,0 +1,134 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from models.sample_buffer import SampleBuffer
+
+def iter_csv_blocks(file_path: str, block_rows: int = 16384):
+    """
+    Yield (time, signal) float64 arrays of at most 'block_rows' rows from a
+    'Time_s,<signal>' CSV, parsing the file lazily. The signal column is
+    'Signal' when present (saved data) and otherwise the second column
+    (e.g. 'Template' in saved templates).
+    """
+    columns = list(pd.read_csv(file_path, nrows=0).columns)
+    signal_column = "Signal" if "Signal" in columns else columns[1]
+    reader = pd.read_csv(file_path, usecols=["Time_s", signal_column], dtype=np.float64,
+                         chunksize=block_rows)
+    for block in reader:
+        yield block["Time_s"].to_numpy(), block[signal_column].to_numpy()
+
+def resample_blocks(blocks, sample_rate: float):
+    """
+    Linearly resample a stream of (time, signal) blocks onto a uniform grid
+    of 'sample_rate' starting at the first timestamp, yielding the new
+    samples block by block.
+
+    The last input sample of each block is carried into the next one, so
+    output samples falling between two blocks are interpolated exactly as
+    if the whole signal had been resampled at once.
+    """
+    step = 1.0 / sample_rate
+    t0 = None
+    next_index = 0
+    carry_t = carry_v = None
+    for time_data, signal_data in blocks:
+        if len(time_data) == 0:
+            continue
+        if t0 is None:
+            t0 = time_data[0]
+        if carry_t is not None:
+            time_data = np.concatenate(([carry_t], time_data))
+            signal_data = np.concatenate(([carry_v], signal_data))
+
+        last_index = int(np.floor((time_data[-1] - t0) / step + 1e-9))
+        if last_index >= next_index:
+            new_time = t0 + np.arange(next_index, last_index + 1) * step
+            yield np.interp(new_time, time_data, signal_data)
+            next_index = last_index + 1
+        carry_t, carry_v = time_data[-1], signal_data[-1]
+
+
+class StreamingSignal:
+    """
+    Array-like signal that is filled on demand from a block generator.
+
+    len() is the number of samples produced so far; indexing or slicing
+    first pulls blocks until the requested samples exist (or the source
+    runs out), so a consumer can start with the first block while the rest
+    of the file has not been parsed yet. Indices are absolute sample
+    positions. Samples below the position passed to release() are dropped,
+    so a forward-only reader keeps about one block of read-ahead in memory
+    instead of the whole signal. Safe to read from the generation thread
+    and the GUI thread at the same time.
+    """
+
+    # Released samples are dropped once they make up this much of the buffer
+    COMPACT_SAMPLES = 1 << 14
+
+    def __init__(self, blocks):
+        self._blocks = iter(blocks)
+        self._buffer = SampleBuffer(1)
+        self._offset = 0            # Absolute index of the first buffered sample
+        self._released = 0
+        self._lock = threading.Lock()
+        self.exhausted = False
+
+    def __len__(self):
+        return self._offset + len(self._buffer)
+
+    def ensure(self, n_samples: int) -> int:
+        """Pull blocks until at least 'n_samples' exist; returns how many are available."""
+        with self._lock:
+            return self._pull(n_samples)
+
+    def release(self, n_samples: int):
+        """The first 'n_samples' will not be read again and may be freed."""
+        with self._lock:
+            self._released = max(self._released, int(n_samples))
+            drop = min(self._released, len(self)) - self._offset
+            if drop >= max(self.COMPACT_SAMPLES, len(self._buffer) // 2):
+                kept = self._buffer.view()[drop:]
+                buffer = SampleBuffer(1, initial_capacity=max(len(kept), 4096))
+                buffer.append(kept)
+                self._buffer = buffer
+                self._offset += drop
+
+    def __getitem__(self, key):
+        with self._lock:
+            if isinstance(key, slice):
+                if key.stop is None or key.stop < 0 or (key.start or 0) < 0:
+                    self._pull(np.iinfo(np.int64).max)
+                else:
+                    self._pull(max(key.start or 0, key.stop) + 1)
+                indices = range(*key.indices(len(self)))
+                if len(indices) == 0:
+                    return np.empty(0)
+                self._check_available(min(indices[0], indices[-1]))
+                local = self._buffer.view()[:, 0]
+                if indices.step > 0:
+                    return local[indices.start - self._offset:indices.stop - self._offset:indices.step]
+                return local[np.asarray(indices) - self._offset]
+            if key >= 0:
+                self._pull(key + 1)
+            else:
+                self._pull(np.iinfo(np.int64).max)
+                key += len(self)
+            if key >= len(self):
+                raise IndexError("StreamingSignal index out of range")
+            self._check_available(key)
+            return self._buffer.view()[key - self._offset, 0]
+
+    def _check_available(self, index: int):
+        if index < self._offset:
+            raise IndexError(f"Sample {index} was already released")
+
+    def _pull(self, n_samples: int) -> int:
+        # Caller holds self._lock
+        while len(self) < n_samples and not self.exhausted:
+            block = next(self._blocks, None)
+            if block is None:
+                self.exhausted = True
+            else:
+                self._buffer.append(block)
+        return len(self)
@@ -0,0 +1,66 @@
+import os
+import time
+import numpy as np
+
+from models.csv_encoder import CsvEncoder
+from models.file_syncer import FileSyncer
+
+class CsvStreamSink:
+    """
+    Appends acquired chunks to an open CSV file as they arrive.
+
+    Connect write_chunk to SignalData.new_chunk_appended. Rows use the same
+    'Time_s,<label>[,<label>...]' layout as SignalData.save_csv. The file is flushed to
+    disk at most every 'flush_interval_s' seconds, so a crash loses at most
+    one interval of data and close() only has to write the last few rows.
+    Those periodic flushes run on a FileSyncer thread; flush() and close()
+    wait for the data to reach the disk.
+    """
+
+    def __init__(self, filename: str, sample_rate: float, channel_labels=("Signal",), flush_interval_s: float = 1.0):
+        self.filename = filename
+        self.sample_rate = sample_rate
+        self.flush_interval_s = flush_interval_s
+
+        self._encoder = CsvEncoder(sample_rate)
+        self._file = open(filename, "wb")
+        self._file.write(CsvEncoder.header(channel_labels))
+        self._n_written = 0
+        self._last_flush = time.monotonic()
+        self._syncer = FileSyncer("CsvStreamSink")
+
+    def write_chunk(self, chunk: np.ndarray):
+        if self._file is None:
+            return
+        n = len(chunk)
+        if n == 0:
+            return
+
+        self._encoder.write(self._file, chunk, start_index=self._n_written)
+        self._n_written += n
+
+        if time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self._syncer.request(self._sync)
+            self._last_flush = time.monotonic()
+
+    def flush(self):
+        if self._file is None:
+            return
+        self._syncer.request(self._sync)
+        self._syncer.wait()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self._syncer.close(self._sync)
+        finally:
+            self._file.close()
+            self._file = None
+        print(f"Streamed {self._n_written} samples to {self.filename}")
+
+    def _sync(self):
+        # Runs on the syncer thread; the buffered file serializes it with writes
+        self._file.flush()
+        os.fsync(self._file.fileno())
@@ -0,0 +1,85 @@
+import numpy as np
+from scipy import fft as sp_fft
+
+# Cycles may move by up to this fraction of their length to line up
+MAX_SHIFT_FRACTION = 0.1
+ALIGN_ITERATIONS = 2
+
+
+class CycleAligner:
+    """
+    Averages signal cycles after lining each one up with a reference.
+
+    Every cycle is cut with a margin of 'max_shift' samples on both sides
+    and cross-correlated against the zero-mean reference (the plain average
+    at first, then the aligned average of the previous pass). The best lag
+    is refined to a fraction of a sample with a parabola through the peak,
+    and the cycle is shifted by it with a phase ramp before the margin is
+    cropped. All cycles go through the same batched real FFTs, so the cost
+    per update is a few transforms of shape (n_cycles, fft_size).
+    """
+
+    def __init__(self, max_shift_fraction: float = MAX_SHIFT_FRACTION, iterations: int = ALIGN_ITERATIONS):
+        self.max_shift_fraction = max_shift_fraction
+        self.iterations = iterations
+        self.shifts = np.empty(0)       # Lag applied to each cycle in the last average()
+        self._segment_length = None
+        self._fft_size = None
+
+    def max_shift(self, length: int) -> int:
+        return max(1, int(self.max_shift_fraction * length))
+
+    def fft_size(self, segment_length: int) -> int:
+        if segment_length != self._segment_length:
+            self._segment_length = segment_length
+            self._fft_size = sp_fft.next_fast_len(segment_length, real=True)
+        return self._fft_size
+
+    def average(self, data: np.ndarray, starts: np.ndarray, length: int) -> np.ndarray:
+        """Aligned mean of the cycles data[start:start + length] for each start."""
+        starts = np.asarray(starts, dtype=np.int64)
+        margin = self.max_shift(length)
+        if len(starts) < 2:
+            self.shifts = np.zeros(len(starts))
+            return data[starts[:, None] + np.arange(length)].mean(axis=0)
+
+        # Cycles with 'margin' extra samples each side (edge values past the ends of 'data')
+        padded = np.pad(np.asarray(data, dtype=np.float64), margin, mode="edge")
+        segments = padded[starts[:, None] + np.arange(length + 2 * margin)]
+        size = self.fft_size(length + 2 * margin)
+        spectra = sp_fft.rfft(segments, size, axis=1)
+        phase = 2j * np.pi * np.arange(spectra.shape[1]) / size
+
+        shifts = np.zeros(len(starts))
+        cycles = segments[:, margin:margin + length]
+        for _ in range(self.iterations):
+            reference = cycles.mean(axis=0)
+            reference -= reference.mean()
+
+            # correlation[:, j] = sum_i reference[i] * segment[j + i], i.e. lag j - margin
+            correlation = sp_fft.irfft(spectra * np.conj(sp_fft.rfft(reference, size)), size, axis=1)
+            correlation = correlation[:, :2 * margin + 1]
+            peaks = np.argmax(correlation, axis=1)
+            shifts = peaks - margin + self._parabolic_offset(correlation, peaks)
+
+            # segment(n + margin + shift) for n in [0, length)
+            shifted = sp_fft.irfft(spectra * np.exp(np.outer(shifts, phase)), size, axis=1)
+            cycles = shifted[:, margin:margin + length]
+
+        self.shifts = shifts
+        return cycles.mean(axis=0)
+
+    @staticmethod
+    def _parabolic_offset(correlation: np.ndarray, peaks: np.ndarray) -> np.ndarray:
+        """Sub-sample position of each row's peak, from a parabola through it and its neighbours."""
+        rows = np.arange(len(peaks))
+        interior = (peaks > 0) & (peaks < correlation.shape[1] - 1)
+        centre = np.clip(peaks, 1, correlation.shape[1] - 2)
+        left = correlation[rows, centre - 1]
+        middle = correlation[rows, centre]
+        right = correlation[rows, centre + 1]
+        curvature = left - 2 * middle + right
+        offset = np.zeros(len(peaks))
+        valid = interior & (curvature < 0)
+        offset[valid] = 0.5 * (left[valid] - right[valid]) / curvature[valid]
+        return offset
@@ -0,0 +1,227 @@
+import os
+import time
+from datetime import datetime
+import numpy as np
+
+EDF_DIGITAL_MIN = -32768
+EDF_DIGITAL_MAX = 32767
+ANNOTATION_LABEL = "EDF Annotations"
+
+def _ascii(text: str, width: int) -> bytes:
+    """Left-aligned, space-padded printable ASCII field of exactly 'width' bytes."""
+    cleaned = "".join(c if 32 <= ord(c) < 127 else "_" for c in str(text))
+    return cleaned[:width].ljust(width).encode("ascii")
+
+def _number(value, width: int = 8) -> str:
+    """Shortest decimal spelling of 'value' that fits an EDF number field."""
+    value = float(value)
+    if value.is_integer() and len(str(int(value))) <= width:
+        return str(int(value))
+    for precision in range(width, 0, -1):
+        text = f"{value:.{precision}g}"
+        if len(text) <= width:
+            return text
+    raise ValueError(f"{value} does not fit in {width} characters")
+
+def _edf_time(seconds: float) -> str:
+    """Signed onset/duration as EDF+ spells it, e.g. '+0', '+12.5'."""
+    return f"{seconds:+.4f}".rstrip("0").rstrip(".")
+
+def _time_stamp(record_onset_s: float) -> bytes:
+    """Time-keeping TAL that opens every data record."""
+    return (_edf_time(record_onset_s) + "\x14\x14\x00").encode("ascii")
+
+def _tal(onset_s: float, duration_s, text: str) -> bytes:
+    """One time-stamped annotation list entry."""
+    tal = _edf_time(onset_s)
+    if duration_s is not None:
+        tal += "\x15" + _edf_time(duration_s).lstrip("+")
+    return (tal + "\x14" + text + "\x14\x00").encode("utf-8")
+
+def physical_range(data: np.ndarray):
+    """(min, max) of 'data' with 1 % headroom, usable as an EDF physical range."""
+    data = np.asarray(data)
+    low, high = (float(np.nanmin(data)), float(np.nanmax(data))) if data.size else (0.0, 0.0)
+    if not (np.isfinite(low) and np.isfinite(high)):
+        low, high = 0.0, 0.0
+    margin = max(1e-3, 0.01 * (high - low))
+    return low - margin, high + margin
+
+
+class EdfWriter:
+    """
+    Incremental EDF+ (continuous, "EDF+C") writer.
+
+    Samples are buffered until one fixed-duration data record is complete and
+    then written out, so only a single record is ever held in memory. Each
+    record carries an 'EDF Annotations' signal with its time-keeping stamp and
+    any annotations queued with add_annotation(). The header (record count)
+    is rewritten on every flush and on close; the final partial record is
+    padded with its last sample and its true end is marked by an annotation.
+    Annotations that do not fit in the last record go into extra padding
+    records, so none is ever dropped.
+
+    EDF stores 16-bit integers per channel, scaled linearly between
+    physical_min/max and digital_min/max, so the physical range has to be
+    known up front (values outside it are clipped).
+    """
+
+    def __init__(self, filename: str, sample_rate: float, channel_labels=("Signal",), units=None,
+                 physical_min=-3.3, physical_max=3.3, digital_min=EDF_DIGITAL_MIN,
+                 digital_max=EDF_DIGITAL_MAX, record_duration_s: float = 1.0,
+                 start_datetime: datetime = None, patient_id: str = "X X X X",
+                 equipment: str = "BME70B", annotation_bytes: int = 256, flush_interval_s: float = 1.0):
+        self.filename = filename
+        self.sample_rate = sample_rate
+        self.channel_labels = list(channel_labels)
+        n_sig = len(self.channel_labels)
+        self.units = list(units) if units is not None else ["V"] * n_sig
+        self.record_duration_s = record_duration_s
+        self.samples_per_record = int(round(sample_rate * record_duration_s))
+        if abs(self.samples_per_record - sample_rate * record_duration_s) > 1e-6 or self.samples_per_record < 1:
+            raise ValueError(f"{sample_rate} Hz does not give a whole number of samples per "
+                             f"{record_duration_s} s data record")
+        self.start_datetime = start_datetime or datetime.now()
+        self.patient_id = patient_id
+        self.equipment = equipment
+        self.annotation_bytes = annotation_bytes + annotation_bytes % 2
+        self.flush_interval_s = flush_interval_s
+
+        # Round-trip the ranges through their header spelling so scaling matches readers
+        broadcast = lambda v: np.broadcast_to(np.asarray(v, dtype=np.float64), (n_sig,))
+        self.physical_min = np.array([float(_number(v)) for v in broadcast(physical_min)])
+        self.physical_max = np.array([float(_number(v)) for v in broadcast(physical_max)])
+        self.digital_min = broadcast(digital_min).astype(np.int64)
+        self.digital_max = broadcast(digital_max).astype(np.int64)
+        if np.any(self.physical_max <= self.physical_min) or np.any(self.digital_max <= self.digital_min):
+            raise ValueError("EDF physical and digital ranges must be non-empty")
+        self._gain = (self.digital_max - self.digital_min) / (self.physical_max - self.physical_min)
+
+        self._file = open(filename, "w+b")
+        self._pending = np.empty((0, n_sig), dtype=np.int64)
+        self._n_records = 0
+        self._n_samples = 0
+        # Encoded TALs waiting for room in a record
+        self._annotations = []
+        # Last digital frame written, repeated by padding records
+        self._last_frame = np.clip(np.zeros((1, n_sig), dtype=np.int64), self.digital_min, self.digital_max)
+        self._last_flush = time.monotonic()
+        self._write_header()
+
+    @property
+    def n_sig(self) -> int:
+        return len(self.channel_labels)
+
+    def add_annotation(self, onset_s: float, text: str, duration_s: float = None):
+        """Queue an annotation (seconds from the start); it goes into the next record written."""
+        tal = _tal(onset_s, duration_s, text)
+        stamp = _time_stamp(max(onset_s, self._n_records * self.record_duration_s))
+        if len(stamp) + len(tal) > self.annotation_bytes:
+            raise ValueError(f"Annotation '{text[:40]}' does not fit in {self.annotation_bytes} annotation bytes per record")
+        self._annotations.append(tal)
+
+    def write_chunk(self, chunk: np.ndarray):
+        """Digitize and append physical samples, shape (n,) or (n, n_channels)."""
+        p_signal = np.asarray(chunk, dtype=np.float64).reshape(-1, self.n_sig)
+        d_signal = np.round((p_signal - self.physical_min) * self._gain + self.digital_min)
+        d_signal = np.where(np.isnan(p_signal), self.digital_min, d_signal)
+        self.write_digital(np.clip(d_signal, self.digital_min, self.digital_max).astype(np.int64))
+
+    def write_digital(self, d_signal: np.ndarray):
+        """Append already-digitized samples, shape (n,) or (n, n_channels)."""
+        if self._file is None:
+            return
+        d_signal = np.asarray(d_signal, dtype=np.int64).reshape(-1, self.n_sig)
+        if len(d_signal) == 0:
+            return
+        self._n_samples += len(d_signal)
+
+        if len(self._pending):
+            d_signal = np.concatenate([self._pending, d_signal])
+        n_records = len(d_signal) // self.samples_per_record
+        for i in range(n_records):
+            self._write_record(d_signal[i * self.samples_per_record:(i + 1) * self.samples_per_record])
+        self._pending = d_signal[n_records * self.samples_per_record:].copy()
+
+        if time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self):
+        if self._file is None:
+            return
+        self._write_header()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._file is None:
+            return
+        if len(self._pending) or self._annotations:
+            end_s = self._n_samples / self.sample_rate
+            self.add_annotation(end_s, "Recording ends (rest of record is padding)")
+        if len(self._pending):
+            padding = np.repeat(self._pending[-1:], self.samples_per_record - len(self._pending), axis=0)
+            self._write_record(np.concatenate([self._pending, padding]))
+            self._pending = self._pending[:0]
+        # Annotations still queued go into records that repeat the last sample
+        while self._annotations:
+            self._write_record(np.repeat(self._last_frame, self.samples_per_record, axis=0))
+        self.flush()
+        self._file.close()
+        self._file = None
+        print(f"EDF+ file saved as {self.filename}")
+
+    # --------------------------------------------------------------------------
+    # Records and header
+    # --------------------------------------------------------------------------
+    def _write_record(self, d_record: np.ndarray):
+        # Signals are stored one after another within the record, little-endian int16
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(np.ascontiguousarray(d_record.T).astype("<i2").tobytes())
+        self._file.write(self._annotation_block(self._n_records * self.record_duration_s))
+        self._last_frame = d_record[-1:]
+        self._n_records += 1
+
+    def _annotation_block(self, record_onset_s: float) -> bytes:
+        # The first TAL of every record is its time-keeping stamp
+        block = _time_stamp(record_onset_s)
+        while self._annotations and len(block) + len(self._annotations[0]) <= self.annotation_bytes:
+            block += self._annotations.pop(0)
+        if self._annotations and len(block) + len(self._annotations[0]) > self.annotation_bytes \
+                and block == _time_stamp(record_onset_s):
+            raise ValueError(f"Annotation does not fit in {self.annotation_bytes} annotation bytes per record")
+        return block.ljust(self.annotation_bytes, b"\x00")
+
+    def _write_header(self):
+        signals = self.channel_labels + [ANNOTATION_LABEL]
+        n = len(signals)
+        start = self.start_datetime
+        recording_id = f"Startdate {start.strftime('%d-%b-%Y').upper()} X X {self.equipment}"
+
+        header = b"".join([
+            _ascii("0", 8),
+            _ascii(self.patient_id, 80),
+            _ascii(recording_id, 80),
+            _ascii(start.strftime("%d.%m.%y"), 8),
+            _ascii(start.strftime("%H.%M.%S"), 8),
+            _ascii(str(256 * (n + 1)), 8),
+            _ascii("EDF+C", 44),
+            _ascii(str(self._n_records), 8),
+            _ascii(_number(self.record_duration_s), 8),
+            _ascii(str(n), 4),
+        ])
+        header += b"".join(_ascii(label, 16) for label in signals)
+        header += b"".join(_ascii("", 80) for _ in signals)
+        header += b"".join(_ascii(unit, 8) for unit in self.units) + _ascii("", 8)
+        header += b"".join(_ascii(_number(v), 8) for v in self.physical_min) + _ascii("-1", 8)
+        header += b"".join(_ascii(_number(v), 8) for v in self.physical_max) + _ascii("1", 8)
+        header += b"".join(_ascii(str(v), 8) for v in self.digital_min) + _ascii(str(EDF_DIGITAL_MIN), 8)
+        header += b"".join(_ascii(str(v), 8) for v in self.digital_max) + _ascii(str(EDF_DIGITAL_MAX), 8)
+        header += b"".join(_ascii("", 80) for _ in signals)
+        header += b"".join(_ascii(str(self.samples_per_record), 8) for _ in self.channel_labels)
+        header += _ascii(str(self.annotation_bytes // 2), 8)
+        header += b"".join(_ascii("", 32) for _ in signals)
+
+        self._file.seek(0)
+        self._file.write(header)
@@ -0,0 +1,71 @@
+import threading
+
+class FileSyncer:
+    """
+    Runs the periodic flush + fsync of a streaming sink on a background
+    thread, so the sink's write_chunk (a slot on the GUI thread) only does
+    buffered writes and never waits on a slow disk.
+
+    request() hands over a job (a callable doing the flush/fsync, and e.g. a
+    header rewrite) and returns at once; a job requested while another is
+    waiting replaces it, since the newer one covers everything the older one
+    would have synced. wait() blocks until the latest job has run. The first
+    exception raised by a job is kept in 'error' and raised again from
+    request(), wait() and close().
+    """
+
+    def __init__(self, name: str = "FileSyncer"):
+        self.error = None
+        self._job = None
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def request(self, job):
+        with self._cond:
+            self._raise_error()
+            self._job = job
+            self._cond.notify_all()
+
+    def wait(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._job is None and not self._busy)
+            self._raise_error()
+
+    def close(self, job=None):
+        """Run the pending job (or 'job', if given), then stop the thread."""
+        try:
+            if job is not None:
+                with self._cond:
+                    self._job = job
+                    self._cond.notify_all()
+            self.wait()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self._thread.join()
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise OSError(f"Syncing to disk failed: {self.error}") from self.error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._job is not None or self._closed)
+                if self._job is None:
+                    return
+                job, self._job = self._job, None
+                self._busy = True
+            try:
+                if self.error is None:
+                    job()
+            except Exception as e:
+                self.error = e
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -1,5 +1,13 @@
+import os
+from datetime import datetime
 from PyQt5.QtCore import QObject, pyqtSignal
 from models.signal_data import SignalData
+from models.csv_stream_sink import CsvStreamSink
+from models.wfdb_writer import Wfdb212Writer
+from models.adc import AdcScale
+from models.chunk_journal import ChunkJournal, JOURNAL_EXT
+from models.compressed_session import CompressedSessionWriter
+from models.session_catalog import SessionCatalog
 from models.template_processor import TemplateProcessor
 from models.template_model import TemplateModel
 from enums.connection_type import ConnectionType
@@ -63,27 +71,206 @@ class Model(QObject):
     # PUBLIC METHODS - Acquisition
     # --------------------------------------------------------------------------
     def start_acquisition(self):
-        self.signal_data = SignalData(sample_rate=self.sampling_rate)
-        # Create TemplateProcessor
+        self.close_session()
+        session_dir = None
+        if self.record_to_disk or self.stream_csv or self.stream_wfdb or self.stream_compressed:
+            session_dir = self._new_session_dir()
+            os.makedirs(session_dir, exist_ok=True)
+        self.session_dir = session_dir
+
+        adc_scale = AdcScale() if self.acquire_raw_adc else None
+        self.signal_data = SignalData(
+            sample_rate=self.sampling_rate,
+            session_dir=session_dir if self.record_to_disk else None,
+            channel_labels=self.channel_labels,
+            units=self.channel_units,
+            adc_scale=adc_scale
+        )
+        if self.stream_csv:
+            self._attach_sink(CsvStreamSink(
+                os.path.join(session_dir, "signal.csv"),
+                self.sampling_rate,
+                channel_labels=self.channel_labels,
+                flush_interval_s=self.stream_flush_interval_s
+            ))
+        if self.stream_wfdb and adc_scale is not None:
+            # Stream the codes straight into the record
+            sink = Wfdb212Writer(
+                os.path.join(session_dir, "signal.dat"),
+                self.sampling_rate,
+                sig_names=self.channel_labels,
+                units=self.channel_units,
+                adc_gain=adc_scale.gain,
+                baseline=adc_scale.wfdb_baseline,
+                flush_interval_s=self.stream_flush_interval_s
+            )
+            self._attach_sink(sink, lambda codes: sink.write_digital(adc_scale.to_212(codes)), raw=True)
+        elif self.stream_wfdb:
+            self._attach_sink(Wfdb212Writer(
+                os.path.join(session_dir, "signal.dat"),
+                self.sampling_rate,
+                sig_names=self.channel_labels,
+                units=self.channel_units,
+                flush_interval_s=self.stream_flush_interval_s
+            ))
+        if self.stream_compressed:
+            # Fed the stored samples, so raw ADC codes are compressed losslessly as codes
+            self._attach_sink(CompressedSessionWriter(
+                os.path.join(session_dir, "signal.json"),
+                self.sampling_rate,
+                channel_labels=self.channel_labels,
+                units=self.channel_units,
+                circuit_id=self.circuit_id,
+                adc_scale=adc_scale,
+                flush_interval_s=self.stream_flush_interval_s
+            ), raw=True)
+        # The previous session's journal stays on disk (closed) until it is saved or discarded;
+        # this session's journal is opened with its first chunk
+        self.journal = None
+        # Create TemplateProcessor (stopping the previous one's worker thread)
         if self.get_template:
+            self.template_processor.close()
             self.template_processor = TemplateProcessor(
                 sample_rate=self.sampling_rate,
                 look_back_time_s=4.0,
-                update_interval_s=4.0
+                update_interval_s=4.0,
+                source=self.signal_data
+            )
+            # Connect the signal from SignalData to the processor's slot
+            self.signal_data.new_chunk_appended.connect(
+                self.template_processor.append_data
             )
-        # Connect the signal from SignalData to the processor's slot
-        self.signal_data.new_chunk_appended.connect(
-            self.template_processor.append_data
-        )
         self.acquisition_running = True
         self.model_changed.emit()
 
+    def journal_chunk(self, chunk):
+        """Hand a chunk to the crash-recovery journal (returns immediately)."""
+        if self.journal is None and self.journal_enabled:
+            self.journal = ChunkJournal(
+                self._new_journal_path(),
+                self.sampling_rate,
+                channel_labels=self.channel_labels,
+                units=self.channel_units,
+                dtype=self.signal_data.raw_frames.dtype,
+                adc_scale=self.signal_data.adc_scale
+            )
+        if self.journal is not None:
+            self.journal.append(chunk)
+
+    def journal_saved(self, journal, n_chunks: int):
+        """
+        Delete a journal once its first 'n_chunks' chunks were saved, unless more
+        arrived since. Chunks acquired after that go to a new journal.
+        """
+        if journal is None or journal.n_chunks != n_chunks:
+            return
+        journal.discard()
+        if journal is self.journal:
+            self.journal = None
+
+    def shutdown(self):
+        """Close everything on application exit; an unsaved journal is kept, marked as closed cleanly."""
+        self.acquisition_running = False
+        self.close_session()
+        self.template_processor.close()
+
+    def flush_session(self):
+        """Push everything recorded so far to disk (e.g. when pausing)."""
+        self.signal_data.flush()
+        for sink in list(self.recording_sinks):
+            try:
+                sink.flush()
+            except Exception as e:
+                self._detach_sink(sink, e)
+
+    def close_session(self):
+        """Finalize the recording sinks and release the sample store's file."""
+        for sink, signal, slot in self._sink_connections:
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                pass
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"Recording sink {type(sink).__name__} failed: {e}")
+        self.recording_sinks = []
+        self._sink_connections = []
+        self.signal_data.close()
+        # Keep the per-chunk timing/loss log with the streamed files
+        if self.session_dir and len(self.signal_data.chunk_index):
+            self.signal_data.chunk_index.save_csv(os.path.join(self.session_dir, "chunks.csv"))
+        # Keep the journal file until the session is saved, so it can still be
+        # recovered after a crash or an exit without saving
+        if self.journal is not None:
+            self.journal.close()
+
+    @property
+    def acquire_raw_adc(self) -> bool:
+        """Raw codes are only delivered by the Bluetooth (and replay) connection."""
+        return self.store_raw_adc and self.connection_type in (ConnectionType.BLUETOOTH, ConnectionType.REPLAY)
+
+    def _attach_sink(self, sink, slot=None, raw=False):
+        """Feed a recording sink from SignalData (physical chunks, or stored chunks if 'raw')."""
+        signal = self.signal_data.raw_chunk_appended if raw else self.signal_data.new_chunk_appended
+        write = slot or sink.write_chunk
+
+        def slot(chunk):
+            # An exception must not escape a Qt slot; a failing sink is dropped instead
+            try:
+                write(chunk)
+            except Exception as e:
+                self._detach_sink(sink, e)
+
+        signal.connect(slot)
+        self.recording_sinks.append(sink)
+        self._sink_connections.append((sink, signal, slot))
+
+    def _detach_sink(self, sink, error):
+        """Stop feeding a sink that failed; acquisition and the other sinks carry on."""
+        print(f"Recording sink {type(sink).__name__} failed, stopped streaming to it: {error}")
+        for connection in [c for c in self._sink_connections if c[0] is sink]:
+            _, signal, slot = connection
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                pass
+            self._sink_connections.remove(connection)
+        if sink in self.recording_sinks:
+            self.recording_sinks.remove(sink)
+        try:
+            sink.close()
+        except Exception:
+            pass
+
+    def _new_session_dir(self) -> str:
+        return os.path.join(self.session_root, self._session_stamp())
+
+    def _new_journal_path(self) -> str:
+        # Unsaved journals of earlier sessions stay around, so never reuse a name
+        stem = os.path.join(self.journal_dir, self._session_stamp())
+        path, n = stem + JOURNAL_EXT, 1
+        while os.path.exists(path):
+            path, n = f"{stem}_{n}{JOURNAL_EXT}", n + 1
+        return path
+
+    @staticmethod
+    def _session_stamp() -> str:
+        return "session_" + datetime.now().strftime("%Y%m%d_%H%M%S")
+
     def set_simulation_type(self, simulation_type: SimulationType):
         self.simulation_type = simulation_type
         self.model_changed.emit()
 
     def reset_model(self):
+        if hasattr(self, 'signal_data'):
+            self.close_session()
+        if hasattr(self, 'template_processor'):
+            self.template_processor.close()
+        self.journal = None
         self.signal_data = SignalData()
+        self.recording_sinks = []
+        self._sink_connections = []
         self.template_processor = TemplateProcessor()
 
         # Connection
@@ -102,6 +289,27 @@ class Model(QObject):
         self.sampling_rate = None
         self.circuit_id = None
         self.acquisition_running = False
+        # One entry per acquired channel; chunks arrive as (n, n_channels) frames
+        self.channel_labels = ["Signal"]
+        self.channel_units = ["V"]
+        # Keep 12-bit ADC codes (uint16) instead of float64 volts
+        self.store_raw_adc = False
+        # Spill samples to a memory-mapped file in a per-session directory
+        self.record_to_disk = False
+        # Stream to <session_dir>/signal.csv and/or signal.dat/.hea while acquiring
+        self.stream_csv = False
+        self.stream_wfdb = False
+        # Delta + zstd compressed session at <session_dir>/signal.json/.zst
+        self.stream_compressed = False
+        self.stream_flush_interval_s = 1.0
+        self.session_root = os.path.join(os.path.expanduser("~"), "BME70B_Sessions")
+        self.session_dir = None
+        # Write-ahead journal of every acquired chunk, recovered on next launch after a crash
+        self.journal_enabled = True
+        self.journal_dir = os.path.join(self.session_root, "journal")
+        # SQLite index of every saved recording/template, searchable from the simulation options
+        # (the database is only created on the first save or search)
+        self.catalog = SessionCatalog(os.path.join(self.session_root, "catalog.sqlite"))
 
         # Simulation
         self.template_model = TemplateModel()
@@ -0,0 +1,57 @@
+import numpy as np
+
+class RingBuffer:
+    """
+    Fixed-capacity store of the most recent samples.
+
+    Every sample is written twice, 'capacity' apart, into an array of twice
+    the capacity, so the latest n samples are always one contiguous slice:
+    tail() returns a view without copying and appends cost O(chunk) no
+    matter how long the stream has been running.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        self._dtype = np.dtype(dtype)
+        self._allocate(max(1, int(capacity)))
+
+    def _allocate(self, capacity: int):
+        self.capacity = capacity
+        self._array = np.empty(2 * capacity, dtype=self._dtype)
+        self._end = 0        # Position one past the newest sample, in [0, capacity)
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def append(self, chunk):
+        chunk = np.asarray(chunk, dtype=self._dtype).reshape(-1)
+        if len(chunk) > self.capacity:
+            chunk = chunk[-self.capacity:]
+        n = len(chunk)
+        first = min(n, self.capacity - self._end)
+        for offset in (0, self.capacity):
+            self._array[offset + self._end:offset + self._end + first] = chunk[:first]
+            self._array[offset:offset + n - first] = chunk[first:]
+        self._end = (self._end + n) % self.capacity
+        self._length = min(self.capacity, self._length + n)
+
+    def tail(self, n: int) -> np.ndarray:
+        """Read-only contiguous view of the newest min(n, len) samples, oldest first."""
+        n = min(max(0, int(n)), self._length)
+        stop = self._end + self.capacity
+        view = self._array[stop - n:stop]
+        view.flags.writeable = False
+        return view
+
+    def resize(self, capacity: int):
+        """Change the capacity, keeping as many of the newest samples as fit."""
+        capacity = max(1, int(capacity))
+        if capacity == self.capacity:
+            return
+        kept = self.tail(capacity).copy()
+        self._allocate(capacity)
+        self.append(kept)
+
+    def clear(self):
+        self._end = 0
+        self._length = 0
@@ -0,0 +1,122 @@
+import numpy as np
+
+class SampleBuffer:
+    """
+    Growable sample store with amortized O(1) appends.
+
+    Frames of 'n_channels' samples live in a single (capacity, n_channels)
+    numpy array whose capacity doubles whenever it runs out of room, so
+    appending a chunk only copies the chunk itself (plus an occasional
+    geometric regrow) instead of the whole history.
+    """
+
+    def __init__(self, n_channels: int = 1, dtype=np.float64, initial_capacity: int = 4096):
+        self.n_channels = n_channels
+        self._dtype = np.dtype(dtype)
+        self._array = np.empty((initial_capacity, n_channels), dtype=self._dtype)
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def capacity(self) -> int:
+        return len(self._array)
+
+    def append(self, chunk):
+        """Append frames shaped (n, n_channels), or (n,) for a single channel."""
+        chunk = np.asarray(chunk, dtype=self._dtype).reshape(-1, self.n_channels)
+        new_length = self._length + len(chunk)
+        if new_length > self.capacity:
+            self._grow(new_length)
+        self._array[self._length:new_length] = chunk
+        self._length = new_length
+
+    def view(self) -> np.ndarray:
+        """Read-only contiguous (n, n_channels) view of every stored frame (no copy)."""
+        return self._read_only(self._array[:self._length])
+
+    def tail(self, n: int) -> np.ndarray:
+        """Read-only view of the last 'n' frames (no copy)."""
+        start = max(0, self._length - max(0, int(n)))
+        return self._read_only(self._array[start:self._length])
+
+    def clear(self):
+        self._length = 0
+
+    def flush(self):
+        """Nothing to persist for an in-memory buffer."""
+        pass
+
+    def close(self):
+        pass
+
+    def _grow(self, min_capacity: int):
+        new_capacity = max(min_capacity, 2 * self.capacity)
+        new_array = np.empty((new_capacity, self.n_channels), dtype=self._dtype)
+        new_array[:self._length] = self._array[:self._length]
+        self._array = new_array
+
+    @staticmethod
+    def _read_only(view: np.ndarray) -> np.ndarray:
+        view.flags.writeable = False
+        return view
+
+
+class MappedSampleBuffer(SampleBuffer):
+    """
+    SampleBuffer backed by a memory-mapped file instead of process memory.
+
+    The file grows in fixed-size extents, so resident memory is bounded by the
+    pages the OS keeps cached rather than by the length of the recording.
+    Views returned by view()/tail() are slices of the mapping.
+    """
+
+    def __init__(self, path: str, n_channels: int = 1, dtype=np.float64, extent_samples: int = 1 << 20):
+        self.n_channels = n_channels
+        self._path = path
+        self._dtype = np.dtype(dtype)
+        self._extent = int(extent_samples)
+        self._length = 0
+        self._closed = False
+        self._array = np.memmap(path, dtype=self._dtype, mode="w+", shape=(self._extent, n_channels))
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def flush(self):
+        if not self._closed:
+            self._array.flush()
+
+    def close(self):
+        """
+        Flush the mapping and trim the file to the samples actually written.
+        The recorded samples stay readable through a read-only mapping.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self._array = None
+        try:
+            with open(self._path, "r+b") as f:
+                f.truncate(self._length * self.n_channels * self._dtype.itemsize)
+        except OSError as e:
+            # Another view may still hold the mapping open (e.g. on Windows)
+            print(f"Could not trim {self._path}: {e}")
+
+        if self._length > 0:
+            self._array = np.memmap(
+                self._path, dtype=self._dtype, mode="r", shape=(self._length, self.n_channels)
+            )
+        else:
+            self._array = np.empty((0, self.n_channels), dtype=self._dtype)
+
+    def _grow(self, min_capacity: int):
+        # Round up to the next whole extent and remap the (extended) file
+        n_extents = -(-min_capacity // self._extent)
+        self._array.flush()
+        self._array = np.memmap(
+            self._path, dtype=self._dtype, mode="r+", shape=(n_extents * self._extent, self.n_channels)
+        )
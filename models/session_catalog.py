@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    path          TEXT NOT NULL,
+    name          TEXT NOT NULL,
+    kind          TEXT NOT NULL,       -- 'data' or 'template'
+    file_format   TEXT NOT NULL,       -- 'csv', 'wfdb', 'session', ...
+    saved_at      REAL NOT NULL,       -- time.time() of the save
+    sample_rate   REAL NOT NULL,
+    circuit_id    INTEGER,
+    n_samples     INTEGER NOT NULL,
+    duration_s    REAL NOT NULL,
+    channel_labels TEXT NOT NULL,      -- JSON list
+    mean          REAL,
+    std           REAL,
+    min           REAL,
+    max           REAL,
+    preview       BLOB                 -- float32 bin means of the first channel
+);
+CREATE INDEX IF NOT EXISTS recordings_saved_at ON recordings (saved_at);
+"""
+
+_COLUMNS = ("id", "path", "name", "kind", "file_format", "saved_at", "sample_rate", "circuit_id",
+            "n_samples", "duration_s", "channel_labels", "mean", "std", "min", "max")
+
+
+class RecordingSummary:
+    """
+    Statistics and a downsampled preview of the first channel, accumulated
+    block by block while a recording is written (so no second pass is needed).
+    """
+
+    def __init__(self, n_samples: int, preview_points: int = 500):
+        self.n_samples = n_samples
+        self.bin_size = max(1, -(-n_samples // preview_points))
+        n_bins = max(1, -(-n_samples // self.bin_size))
+        self._bin_sums = np.zeros(n_bins)
+        self._bin_counts = np.zeros(n_bins)
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, start: int, values: np.ndarray):
+        """Fold in physical samples of the first channel starting at index 'start'."""
+        values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)[:, 0]
+        finite = np.isfinite(values)
+        if not finite.all():
+            values = values[finite]
+            positions = (start + np.flatnonzero(finite)) // self.bin_size
+        else:
+            positions = (start + np.arange(len(values))) // self.bin_size
+        if len(values) == 0:
+            return
+        self._bin_sums += np.bincount(positions, weights=values, minlength=len(self._bin_sums))[:len(self._bin_sums)]
+        self._bin_counts += np.bincount(positions, minlength=len(self._bin_counts))[:len(self._bin_counts)]
+        self._count += len(values)
+        self._sum += values.sum()
+        self._sum_sq += np.dot(values, values)
+        block_min, block_max = values.min(), values.max()
+        self.min = block_min if self.min is None else min(self.min, block_min)
+        self.max = block_max if self.max is None else max(self.max, block_max)
+
+    @property
+    def mean(self):
+        return self._sum / self._count if self._count else None
+
+    @property
+    def std(self):
+        if not self._count:
+            return None
+        return float(np.sqrt(max(0.0, self._sum_sq / self._count - self.mean ** 2)))
+
+    def preview(self) -> np.ndarray:
+        with np.errstate(invalid="ignore"):
+            return (self._bin_sums / self._bin_counts).astype(np.float32)
+
+
+class CatalogEntry:
+    """One catalogued save, as returned by SessionCatalog.search()."""
+
+    def __init__(self, row):
+        for column, value in zip(_COLUMNS, row):
+            setattr(self, column, value)
+        self.channel_labels = json.loads(self.channel_labels)
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def describe(self) -> str:
+        saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.saved_at))
+        circuit = f"circuit {self.circuit_id}" if self.circuit_id is not None else "no circuit"
+        return (f"{saved} | {self.kind} | {self.file_format.upper()} | {self.sample_rate:g} Hz | "
+                f"{circuit} | {self.duration_s:.1f} s | {self.name}")
+
+
+class SessionCatalog:
+    """
+    Local SQLite index of saved recordings and templates.
+
+    Every successful save adds a row with the recording's metadata, summary
+    statistics and a small preview, so saved sources can be searched and
+    shown without opening the files. A connection is opened per call, which
+    keeps the catalog usable from the export thread and the GUI thread alike.
+    Nothing touches the disk until the first save or search, so creating a
+    catalog never fails and costs nothing if it is not used.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._ready = False
+
+    @contextmanager
+    def _connect(self):
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.db_path, timeout=5.0)
+        try:
+            if not self._ready:
+                with db:
+                    db.executescript(_SCHEMA)
+                self._ready = True
+            with db:  # commits on success, rolls back on error
+                yield db
+        finally:
+            db.close()
+
+    def add(self, path: str, kind: str, file_format: str, sample_rate: float, n_samples: int,
+            channel_labels, circuit_id=None, summary: RecordingSummary = None) -> int:
+        """Record a save and return its catalog id. Re-saving a path replaces its entry."""
+        path = os.path.abspath(path)
+        preview = summary.preview().tobytes() if summary is not None else None
+        stats = (summary.mean, summary.std, summary.min, summary.max) if summary is not None else (None,) * 4
+        with self._connect() as db:
+            db.execute("DELETE FROM recordings WHERE path = ?", (path,))
+            cursor = db.execute(
+                "INSERT INTO recordings (path, name, kind, file_format, saved_at, sample_rate, circuit_id, "
+                "n_samples, duration_s, channel_labels, mean, std, min, max, preview) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, os.path.basename(path), kind, file_format, time.time(), float(sample_rate),
+                 circuit_id, int(n_samples), n_samples / sample_rate, json.dumps(list(channel_labels)),
+                 *(None if v is None else float(v) for v in stats), preview)
+            )
+            return cursor.lastrowid
+
+    def search(self, text: str = "", kind: str = None, file_formats=None, circuit_id: int = None,
+               min_duration_s: float = None, limit: int = 200):
+        """Entries matching all given filters, newest first. 'text' matches name, path or labels."""
+        clauses, params = [], []
+        if text:
+            # '_' and '%' are common in file names; match them literally
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(name LIKE ? ESCAPE '\\' OR path LIKE ? ESCAPE '\\' OR channel_labels LIKE ? ESCAPE '\\')")
+            params += [pattern] * 3
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if file_formats:
+            clauses.append(f"file_format IN ({','.join('?' * len(file_formats))})")
+            params += list(file_formats)
+        if circuit_id is not None:
+            clauses.append("circuit_id = ?")
+            params.append(circuit_id)
+        if min_duration_s is not None:
+            clauses.append("duration_s >= ?")
+            params.append(min_duration_s)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM recordings {where} ORDER BY saved_at DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [CatalogEntry(row) for row in rows]
+
+    def preview(self, entry_id: int) -> np.ndarray:
+        with self._connect() as db:
+            row = db.execute("SELECT preview FROM recordings WHERE id = ?", (entry_id,)).fetchone()
+        if row is None or row[0] is None:
+            return np.empty(0, dtype=np.float32)
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def remove(self, entry_id: int):
+        with self._connect() as db:
+            db.execute("DELETE FROM recordings WHERE id = ?", (entry_id,))
+
+    def prune_missing(self) -> int:
+        """Drop entries whose file has been moved or deleted; returns how many."""
+        missing = [entry.id for entry in self.search(limit=-1) if not entry.exists]
+        with self._connect() as db:
+            db.executemany("DELETE FROM recordings WHERE id = ?", [(i,) for i in missing])
+        return len(missing)
@@ -0,0 +1,159 @@
+import json
+import os
+import time
+import numpy as np
+
+SESSION_FORMAT = "bme70b-session"
+SESSION_VERSION = 1
+SESSION_DTYPE = "<f8"
+
+def session_paths(filename: str):
+    """Return the (header .json, samples .bin) paths for a session filename."""
+    base, _ = os.path.splitext(filename)
+    return base + ".json", base + ".bin"
+
+
+class SessionWriter:
+    """
+    Writes the native session container: raw little-endian float64 frames in
+    '<name>.bin' plus a JSON header in '<name>.json' holding the sample rate,
+    circuit id, channel labels/units and the sample offset of every chunk.
+
+    Chunks are appended as they arrive and the header is rewritten on each
+    flush and on close, so it can be used as a live recording sink.
+    """
+
+    def __init__(self, filename: str, sample_rate: float, channel_labels=("Signal",), units=None,
+                 circuit_id=None, flush_interval_s: float = 1.0):
+        self.header_path, self.data_path = session_paths(filename)
+        self.sample_rate = sample_rate
+        self.channel_labels = list(channel_labels)
+        self.units = list(units) if units is not None else ["V"] * len(self.channel_labels)
+        self.circuit_id = circuit_id
+        self.flush_interval_s = flush_interval_s
+
+        self._file = open(self.data_path, "wb")
+        self._n_samples = 0
+        self._chunk_offsets = []
+        self._last_flush = time.monotonic()
+        self._write_header()
+
+    @property
+    def n_channels(self) -> int:
+        return len(self.channel_labels)
+
+    def write_chunk(self, chunk: np.ndarray):
+        if self._file is None:
+            return
+        frames = np.asarray(chunk, dtype=SESSION_DTYPE).reshape(-1, self.n_channels)
+        if len(frames) == 0:
+            return
+        self._chunk_offsets.append(self._n_samples)
+        self._file.write(frames.tobytes())
+        self._n_samples += len(frames)
+
+        if time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._write_header()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        print(f"Session saved as {self.header_path} + {os.path.basename(self.data_path)}")
+
+    def _write_header(self):
+        header = {
+            "format": SESSION_FORMAT,
+            "version": SESSION_VERSION,
+            "data_file": os.path.basename(self.data_path),
+            "dtype": SESSION_DTYPE,
+            "sample_rate": self.sample_rate,
+            "circuit_id": self.circuit_id,
+            "channel_labels": self.channel_labels,
+            "units": self.units,
+            "n_samples": self._n_samples,
+            "chunk_offsets": self._chunk_offsets,
+        }
+        tmp_path = self.header_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, self.header_path)
+
+
+class SessionReader:
+    """
+    Random-access reader for session containers. The sample file is
+    memory-mapped, so reading any time range costs the same regardless of
+    where it sits in the recording and nothing is parsed up front.
+    """
+
+    def __init__(self, filename: str):
+        header_path, _ = session_paths(filename)
+        with open(header_path, "r") as f:
+            header = json.load(f)
+        if header.get("format") != SESSION_FORMAT:
+            raise ValueError(f"{header_path} is not a {SESSION_FORMAT} header")
+        if header.get("codec"):
+            raise ValueError(f"{header_path} is a compressed session ({header['codec']})")
+
+        self.sample_rate = header["sample_rate"]
+        self.circuit_id = header.get("circuit_id")
+        self.channel_labels = header["channel_labels"]
+        self.units = header.get("units", ["V"] * len(self.channel_labels))
+        self.chunk_offsets = np.asarray(header.get("chunk_offsets", []), dtype=np.int64)
+        self.n_samples = header["n_samples"]
+
+        data_path = os.path.join(os.path.dirname(header_path), header["data_file"])
+        if self.n_samples > 0:
+            self._frames = np.memmap(
+                data_path, dtype=header["dtype"], mode="r",
+                shape=(self.n_samples, len(self.channel_labels))
+            )
+        else:
+            self._frames = np.empty((0, len(self.channel_labels)), dtype=header["dtype"])
+
+    def __len__(self):
+        return self.n_samples
+
+    @property
+    def duration_s(self) -> float:
+        return self.n_samples / self.sample_rate
+
+    def channel_index(self, channel) -> int:
+        if isinstance(channel, str):
+            return self.channel_labels.index(channel)
+        return int(channel)
+
+    def read(self, start: int = 0, stop: int = None, channel=None) -> np.ndarray:
+        """
+        Samples [start, stop) as a view of the mapped file. Returns
+        (n, n_channels) frames, or a 1-D array when 'channel' is given.
+        """
+        frames = self._frames[start:stop]
+        if channel is None:
+            return frames
+        return frames[:, self.channel_index(channel)]
+
+    def read_time(self, start_s: float, stop_s: float = None, channel=None) -> np.ndarray:
+        """Samples between two times (in seconds from the start of the session)."""
+        start = max(0, int(np.floor(start_s * self.sample_rate)))
+        stop = None if stop_s is None else max(start, int(np.ceil(stop_s * self.sample_rate)))
+        return self.read(start, stop, channel)
+
+    def iter_blocks(self, channel=0, start_s: float = 0.0, block_samples: int = 65536):
+        """Yield (time, signal) float64 blocks of one channel from 'start_s' on, reading lazily."""
+        start = min(self.n_samples, max(0, int(round(start_s * self.sample_rate))))
+        for block_start in range(start, self.n_samples, block_samples):
+            signal_data = np.asarray(self.read(block_start, block_start + block_samples, channel), dtype=np.float64)
+            time_data = np.arange(block_start, block_start + len(signal_data)) / self.sample_rate
+            yield time_data, signal_data
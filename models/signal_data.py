@@ -1,66 +1,311 @@
 import os
-import re
-import pandas as pd
-import wfdb
 import numpy as np
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from models.sample_buffer import SampleBuffer, MappedSampleBuffer
+from models.signal_pyramid import MinMaxPyramid
+from models.wfdb_writer import Wfdb212Writer
+from models.session_file import SessionWriter
+from models.edf_writer import EdfWriter, physical_range as edf_physical_range
+from models.chunk_index import ChunkIndex, lossy_rows, loss_description
+from models.csv_encoder import CsvEncoder, write_csv
+from models.adc import AdcScale
+
 class SignalData(QObject):
+    # Emits each appended chunk as (n, n_channels) frames in physical units
     new_chunk_appended = pyqtSignal(np.ndarray)
+    # Emits each appended chunk as stored (ADC codes when adc_scale is set)
+    raw_chunk_appended = pyqtSignal(np.ndarray)
 
-    def __init__(self, sample_rate=100):
+    def __init__(self, sample_rate=100, session_dir=None, channel_labels=("Signal",), units=None,
+                 adc_scale: AdcScale = None, start_time: float = 0.0):
         super().__init__()
-        self.reset(sample_rate)
+        self._buffer = None
+        self.reset(sample_rate, session_dir, channel_labels, units, adc_scale, start_time)
 
-    def reset(self, sample_rate):
+    def reset(self, sample_rate, session_dir=None, channel_labels=("Signal",), units=None,
+              adc_scale: AdcScale = None, start_time: float = 0.0):
+        """
+        :param sample_rate: Samples per second of the recorded signal (shared by all channels).
+        :param session_dir: If given, samples are spilled to a memory-mapped
+                            file in this directory instead of kept in RAM.
+        :param channel_labels: One label per channel, e.g. ["ECG I", "ECG II"].
+        :param units: Physical unit per channel (defaults to volts).
+        :param adc_scale: If given, chunks are raw ADC codes and are stored
+                          as integers; physical values are computed on read.
+        :param start_time: Time in seconds of the first sample. Sample times
+                           are implicit: start_time + index / sample_rate.
+        """
+        self.close()
         self.sample_rate = sample_rate
-        self.data = np.empty((0,))
+        self.start_time = start_time
+        self.session_dir = session_dir
+        self.channel_labels = list(channel_labels)
+        self.units = list(units) if units is not None else ["V"] * len(self.channel_labels)
+        if len(self.units) != len(self.channel_labels):
+            raise ValueError("Need one unit per channel label")
+        self.adc_scale = adc_scale
+
+        dtype = adc_scale.dtype if adc_scale is not None else np.dtype(np.float64)
+        if session_dir:
+            os.makedirs(session_dir, exist_ok=True)
+            path = os.path.join(session_dir, f"signal.{dtype.kind}{8 * dtype.itemsize}")
+            self._buffer = MappedSampleBuffer(path, self.n_channels, dtype=dtype)
+        else:
+            self._buffer = SampleBuffer(self.n_channels, dtype=dtype)
+        self.pyramid = MinMaxPyramid(self.n_channels, dtype=dtype, directory=session_dir or None)
+        # One row per appended chunk: receive time, offset, seq, link losses
+        self.chunk_index = ChunkIndex()
+
+    def flush(self):
+        self._buffer.flush()
+        self.pyramid.flush()
+
+    def close(self):
+        """Flush and release any file backing the sample store."""
+        if self._buffer is not None:
+            self._buffer.close()
+            self.pyramid.close()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    @property
+    def n_channels(self) -> int:
+        return len(self.channel_labels)
+
+    @property
+    def is_raw(self) -> bool:
+        return self.adc_scale is not None
+
+    def channel_index(self, channel) -> int:
+        if isinstance(channel, str):
+            return self.channel_labels.index(channel)
+        return int(channel)
+
+    def to_physical(self, stored: np.ndarray) -> np.ndarray:
+        """Convert stored samples to physical units (identity for float storage)."""
+        if self.adc_scale is None:
+            return stored
+        return self.adc_scale.to_physical(stored)
+
+    @property
+    def raw_frames(self) -> np.ndarray:
+        """Read-only (n_samples, n_channels) view of the samples as stored (no copy)."""
+        return self._buffer.view()
+
+    @property
+    def frames(self) -> np.ndarray:
+        """
+        (n_samples, n_channels) physical values. A read-only view for float
+        storage; for raw ADC storage this converts the whole history, so
+        prefer last()/last_frames() or raw_frames for long recordings.
+        """
+        return self.to_physical(self._buffer.view())
+
+    def channel(self, channel) -> np.ndarray:
+        """1-D physical values of one channel, by index or label."""
+        return self.to_physical(self.raw_frames[:, self.channel_index(channel)])
+
+    @property
+    def data(self) -> np.ndarray:
+        """Physical values of the primary (first) channel."""
+        return self.channel(0)
+
+    def last(self, n: int, channel=0) -> np.ndarray:
+        """The most recent 'n' samples of one channel (converts only those samples)."""
+        return self.to_physical(self._buffer.tail(n)[:, self.channel_index(channel)])
+
+    def last_frames(self, n: int) -> np.ndarray:
+        """The most recent 'n' frames, shape (n, n_channels)."""
+        return self.to_physical(self._buffer.tail(n))
+
+    # --------------------------------------------------------------------------
+    # Time axis: t = start_time + index / sample_rate, never stored
+    # --------------------------------------------------------------------------
+    @property
+    def duration_s(self) -> float:
+        return len(self) / self.sample_rate
+
+    def time_at(self, index):
+        """Time in seconds of a sample index (scalar or array)."""
+        return self.start_time + index / self.sample_rate
+
+    def index_at(self, t: float) -> int:
+        """Index of the first sample at or after time 't', clipped to the recording."""
+        index = int(np.ceil(round((t - self.start_time) * self.sample_rate, 9)))
+        return min(max(index, 0), len(self))
 
-    def append_chunk(self, chunk):
-        self.data = np.concatenate([self.data, chunk])
-        self.new_chunk_appended.emit(chunk)
+    def time_slice(self, start_s: float, stop_s: float = None) -> slice:
+        """Sample slice covering [start_s, stop_s) in seconds."""
+        stop = len(self) if stop_s is None else self.index_at(stop_s)
+        return slice(self.index_at(start_s), max(self.index_at(start_s), stop))
 
-    def save_csv(self, filename: str, channel_label="Signal"):
-        n_points = len(self.data)
-        if n_points == 0:
+    def frames_between(self, start_s: float, stop_s: float = None) -> np.ndarray:
+        """Physical frames recorded in [start_s, stop_s) seconds."""
+        return self.to_physical(self.raw_frames[self.time_slice(start_s, stop_s)])
+
+    def envelope(self, start: int, stop: int, max_points: int):
+        """
+        Plot-ready view of samples [start, stop) with at most about
+        'max_points' points per channel, whatever the length of the range.
+
+        Short ranges return the samples themselves. Longer ones return the
+        min and max of each bin from the pyramid, interleaved so the curve
+        traces the signal's envelope. Points are evenly spaced, so the x axis
+        is returned implicitly as (first_index, index_step, values), with the
+        point j at sample position first_index + j * index_step and values
+        shaped (n_points, n_channels).
+        """
+        start = max(0, int(start))
+        stop = min(len(self), int(stop))
+        if stop <= start:
+            return start, 1.0, np.empty((0, self.n_channels))
+
+        level = self.pyramid.level_for(stop - start, max(1, max_points // 2))
+        if stop - start <= max_points or level is None:
+            return start, 1.0, self.to_physical(self.raw_frames[start:stop])
+
+        bin_size = 1 << level
+        first_bin = start // bin_size
+        last_bin = min(-(-stop // bin_size), self.pyramid.n_bins(level))
+        mins, maxs = self.pyramid.bins(level, first_bin, last_bin)
+
+        # Samples past the last complete bin are reduced on the fly (< 2 bins' worth)
+        tail_start = max(start, last_bin * bin_size)
+        if tail_start < stop:
+            tail = self.raw_frames[tail_start:stop]
+            edges = np.arange(0, len(tail), bin_size)
+            mins = np.concatenate([mins, np.minimum.reduceat(tail, edges, axis=0).astype(mins.dtype)])
+            maxs = np.concatenate([maxs, np.maximum.reduceat(tail, edges, axis=0).astype(maxs.dtype)])
+        # Bins hold stored values; a negative ADC gain would swap min and max
+        mins, maxs = self.to_physical(mins), self.to_physical(maxs)
+        mins, maxs = np.minimum(mins, maxs), np.maximum(mins, maxs)
+
+        # Min at the first quarter of each bin, max at the third
+        values = np.empty((2 * len(mins), self.n_channels))
+        values[0::2] = mins
+        values[1::2] = maxs
+        return first_bin * bin_size + bin_size / 4, bin_size / 2, values
+
+    def iter_blocks(self, block_size: int = 65536):
+        """
+        Yield (start_index, stored_frames) in fixed-size blocks, so exports of
+        raw ADC data only ever convert one block to physical units at a time.
+        """
+        raw = self.raw_frames
+        for start in range(0, len(raw), block_size):
+            yield start, raw[start:start + block_size]
+
+    def append_chunk(self, chunk, info: dict = None):
+        """
+        Append a (n,) chunk for single-channel data or an (n, n_channels) chunk.
+        'info' (receive_time, seq, dropped_samples, crc_rejected) goes into chunk_index.
+        """
+        if self.adc_scale is not None:
+            chunk = self.adc_scale.to_codes(chunk)
+        else:
+            chunk = np.asarray(chunk, dtype=np.float64)
+        if chunk.ndim == 1 and self.n_channels == 1:
+            chunk = chunk.reshape(-1, 1)
+        if chunk.ndim != 2 or chunk.shape[1] != self.n_channels:
+            raise ValueError(f"Expected chunk of shape (n, {self.n_channels}), got {chunk.shape}")
+
+        self.chunk_index.record(len(self._buffer), len(chunk), info)
+        self._buffer.append(chunk)
+        self.pyramid.append(chunk)
+        physical = self.to_physical(chunk)
+        self.raw_chunk_appended.emit(chunk)
+        self.new_chunk_appended.emit(physical)
+
+    def save_csv(self, filename: str, channel_labels=None):
+        if len(self) == 0:
             # No data to save
             return
 
-        times = np.linspace(0, (n_points - 1)/self.sample_rate, n_points)
-        df = pd.DataFrame({
-            "Time_s": times,
-            channel_label: self.data
-        })
-        df.to_csv(filename, index=False)
+        labels = channel_labels or self.channel_labels
+        if self.adc_scale is None:
+            write_csv(filename, self.frames, self.sample_rate, labels)
+        else:
+            encoder = CsvEncoder(self.sample_rate)
+            with open(filename, "wb") as f:
+                f.write(CsvEncoder.header(labels))
+                for start, block in self.iter_blocks():
+                    encoder.write(f, self.to_physical(block), start)
         print(f"Data saved as CSV to {filename}")
 
-    def save_wfdb(self, filename: str, channel_label="Signal"):
-        n_points = len(self.data)
-        if n_points == 0:
+    def save_wfdb(self, filename: str, channel_labels=None):
+        if len(self) == 0:
+            return
+
+        if self.adc_scale is None:
+            writer = Wfdb212Writer(
+                filename,
+                sample_rate=self.sample_rate,
+                sig_names=channel_labels or self.channel_labels,
+                units=self.units,
+                adc_gain=200,
+                baseline=0
+            )
+            writer.write_chunk(self.frames)
+        else:
+            # The ADC codes are already digital samples: write them as-is
+            writer = Wfdb212Writer(
+                filename,
+                sample_rate=self.sample_rate,
+                sig_names=channel_labels or self.channel_labels,
+                units=self.units,
+                adc_gain=self.adc_scale.gain,
+                baseline=self.adc_scale.wfdb_baseline
+            )
+            for _, block in self.iter_blocks():
+                writer.write_digital(self.adc_scale.to_212(block))
+        writer.close()
+
+    def save_edf(self, filename: str, channel_labels=None, annotations=()):
+        """
+        Write an EDF+ file one data record at a time. Link losses from the
+        chunk index are annotated, along with any extra (onset_s, text) pairs.
+        """
+        if len(self) == 0:
+            return
+
+        if self.adc_scale is not None:
+            physical_range, digital_range = self.adc_scale.edf_ranges()
+            extra = {"digital_min": digital_range[0], "digital_max": digital_range[1]}
+        else:
+            physical_range, extra = edf_physical_range(self.frames), {}
+        writer = EdfWriter(
+            filename,
+            sample_rate=self.sample_rate,
+            channel_labels=channel_labels or self.channel_labels,
+            units=self.units,
+            physical_min=physical_range[0],
+            physical_max=physical_range[1],
+            **extra
+        )
+        for row in lossy_rows(self.chunk_index.rows()):
+            writer.add_annotation(row[1] / self.sample_rate, loss_description(row))
+        for onset_s, text in annotations:
+            writer.add_annotation(onset_s, text)
+        for _, block in self.iter_blocks():
+            if self.adc_scale is None:
+                writer.write_chunk(block)
+            else:
+                writer.write_digital(self.adc_scale.to_edf(block))
+        writer.close()
+
+    def save_session(self, filename: str, channel_labels=None, circuit_id=None):
+        if len(self) == 0:
             return
 
-        # Extract directory and base filename
-        dir_name = os.path.dirname(filename)  # e.g., "C:\Users\Your Name\Documents"
-        base_name = os.path.basename(filename)  # e.g., "my_template.dat"
-        
-        # Remove the .dat extension from base_name
-        record_name, _ = os.path.splitext(base_name)  # "my_template"
-        
-        # If necessary, sanitize record_name to remove spaces or other chars
-        # (WFDB only allows letters, numbers, and hyphens)
-        record_name = re.sub(r'[^A-Za-z0-9-]+', '-', record_name)
-        
-        # Reshape template
-        p_signal = self.data.reshape(-1, 1)
-        wfdb.wrsamp(
-            record_name=record_name,
-            fs=self.sample_rate,
-            sig_name=[channel_label],
-            units=["V"],
-            p_signal=p_signal,
-            fmt=["212"],
-            adc_gain=[200],
-            baseline=[0],
-            write_dir=dir_name
+        writer = SessionWriter(
+            filename,
+            sample_rate=self.sample_rate,
+            channel_labels=channel_labels or self.channel_labels,
+            units=self.units,
+            circuit_id=circuit_id
         )
-        print(f"WFDB record saved as {record_name}.dat + {record_name}.hea")
+        for _, block in self.iter_blocks():
+            writer.write_chunk(self.to_physical(block))
+        writer.close()
@@ -0,0 +1,120 @@
+import os
+import numpy as np
+
+from models.sample_buffer import SampleBuffer, MappedSampleBuffer
+
+# Bins per file extent of a memory-mapped level
+_LEVEL_EXTENT = 1 << 16
+
+class MinMaxPyramid:
+    """
+    Min/max summaries of a growing multi-channel signal at power-of-two
+    decimation levels. Level L holds one bin per 2**L samples; the finest
+    stored level is 'base_level' (finer views read raw samples instead).
+
+    Chunks are folded in as they arrive: samples are reduced into base bins,
+    and every complete pair of bins at one level becomes a bin of the next,
+    so each append costs O(chunk) and the whole pyramid is about 2/2**base_level
+    of the raw size (times two for min and max).
+
+    Bins are kept in the samples' own dtype when it is an integer type (raw
+    ADC codes, so min/max stay exact) and as float32 otherwise; the pyramid
+    only feeds the plot. With a 'directory', every level is a memory-mapped
+    file there instead of process memory.
+    """
+
+    def __init__(self, n_channels: int = 1, base_level: int = 4, dtype=np.float64, directory: str = None):
+        self.n_channels = n_channels
+        self.base_level = base_level
+        self.directory = directory
+        dtype = np.dtype(dtype)
+        self.dtype = dtype if dtype.kind in "iu" else np.dtype(np.float32)
+        self._length = 0
+        # levels[i] is level base_level + i: (min, max) buffers, shape (n_bins, n_channels)
+        self._levels = []
+        # Per level, at most one finished bin still waiting for its partner
+        self._carry = []
+        # Samples that do not fill a base bin yet
+        self._raw_pending = np.empty((0, n_channels), dtype=self.dtype)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def top_level(self) -> int:
+        return self.base_level + len(self._levels) - 1
+
+    def n_bins(self, level: int) -> int:
+        """Number of complete bins stored at 'level'."""
+        index = level - self.base_level
+        if index < 0 or index >= len(self._levels):
+            return 0
+        return len(self._levels[index][0])
+
+    def append(self, chunk: np.ndarray):
+        """Fold an (n, n_channels) chunk of stored samples into the pyramid."""
+        chunk = np.asarray(chunk, dtype=self.dtype).reshape(-1, self.n_channels)
+        self._length += len(chunk)
+
+        samples = np.concatenate([self._raw_pending, chunk]) if len(self._raw_pending) else chunk
+        bin_size = 1 << self.base_level
+        n_full = len(samples) // bin_size
+        self._raw_pending = samples[n_full * bin_size:].copy()
+        if n_full == 0:
+            return
+
+        blocks = samples[:n_full * bin_size].reshape(n_full, bin_size, self.n_channels)
+        bins = (blocks.min(axis=1), blocks.max(axis=1))
+
+        index = 0
+        while len(bins[0]):
+            if index == len(self._levels):
+                self._levels.append((self._new_level(index, "min"), self._new_level(index, "max")))
+                self._carry.append(None)
+            for buffer, values in zip(self._levels[index], bins):
+                buffer.append(values)
+            bins = self._pair_up(index, bins)
+            index += 1
+
+    def bins(self, level: int, start_bin: int, stop_bin: int):
+        """(min, max) arrays for complete bins [start_bin, stop_bin) at 'level'."""
+        mins, maxs = (buffer.view()[start_bin:stop_bin] for buffer in self._levels[level - self.base_level])
+        return mins, maxs
+
+    def flush(self):
+        for level in self._levels:
+            for buffer in level:
+                buffer.flush()
+
+    def close(self):
+        """Flush and trim any memory-mapped levels (they stay readable)."""
+        for level in self._levels:
+            for buffer in level:
+                buffer.close()
+
+    def level_for(self, n_samples: int, max_bins: int) -> int:
+        """
+        Finest level that covers 'n_samples' in at most 'max_bins' bins, or
+        None when that would be finer than base_level (read raw samples then).
+        """
+        needed = int(np.ceil(np.log2(max(1, n_samples) / max(1, max_bins))))
+        if needed < self.base_level:
+            return None
+        return min(needed, max(self.top_level, self.base_level))
+
+    def _new_level(self, index: int, kind: str) -> SampleBuffer:
+        if self.directory is None:
+            return SampleBuffer(self.n_channels, dtype=self.dtype, initial_capacity=256)
+        name = f"pyramid_{self.base_level + index}_{kind}.{self.dtype.kind}{8 * self.dtype.itemsize}"
+        path = os.path.join(self.directory, name)
+        return MappedSampleBuffer(path, self.n_channels, dtype=self.dtype, extent_samples=_LEVEL_EXTENT)
+
+    def _pair_up(self, index: int, bins):
+        """Combine new bins at level 'index' pairwise into bins for the next level."""
+        carry = self._carry[index]
+        if carry is not None:
+            bins = tuple(np.concatenate([c, b]) for c, b in zip(carry, bins))
+        n_pairs = len(bins[0]) // 2
+        self._carry[index] = tuple(b[2 * n_pairs:].copy() for b in bins) if len(bins[0]) % 2 else None
+        mins, maxs = (b[:2 * n_pairs].reshape(n_pairs, 2, self.n_channels) for b in bins)
+        return mins.min(axis=1), maxs.max(axis=1)
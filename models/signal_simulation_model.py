@@ -1,8 +1,12 @@
 import numpy as np
-import pandas as pd
 from PyQt5.QtCore import QObject, pyqtSignal, QThread
+import os
 import time
 
+from models.compressed_session import open_session
+from models.csv_stream_reader import StreamingSignal, iter_csv_blocks, resample_blocks
+from models.wfdb_reader import WfdbRecordReader
+
 class DataGenerationThread(QThread):
     data_ready = pyqtSignal(float)  # Signal for sending data to device
     buffer_ready = pyqtSignal()     # Signal for updating visualization
@@ -59,7 +63,7 @@ class DataGenerationThread(QThread):
             if self._template_mode:
                 value = self._signal_data[self._current_index % len(self._signal_data)]
             else:
-                if self._current_index >= len(self._signal_data):
+                if not self._has_sample(self._current_index):
                     self._running = False
                     break
                 value = self._signal_data[self._current_index]
@@ -77,6 +81,12 @@ class DataGenerationThread(QThread):
             # Sleep for exactly the interval needed for the desired transmission rate
             time.sleep(1.0 / self._transmission_rate)
 
+    def _has_sample(self, index):
+        if isinstance(self._signal_data, StreamingSignal):
+            # Parses the next block of the source only when playback reaches it
+            return self._signal_data.ensure(index + 1) > index
+        return index < len(self._signal_data)
+
     def stop(self):
         self._running = False
         self._paused = True
@@ -157,32 +167,79 @@ class SignalSimulationModel(QObject):
         self._signal_data = template_data
         self._generation_thread.set_data(self._time_data, self._signal_data, True, template_data)
 
-    def load_csv_data(self, file_path: str, transmission_rate: int):
-        """Load signal data from a CSV file"""
+    def load_signal_file(self, file_path: str, transmission_rate: int, channel=0, start_s: float = 0.0):
+        """
+        Load a full-signal source, picking the reader from the file extension.
+        'channel' and 'start_s' apply to multi-channel sources (sessions, WFDB).
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension == ".json":
+            self.load_session_data(file_path, transmission_rate, channel, start_s)
+        elif extension in (".dat", ".hea"):
+            self.load_wfdb_data(file_path, transmission_rate, channel, start_s)
+        else:
+            self.load_csv_data(file_path, transmission_rate)
+
+    @staticmethod
+    def source_channels(file_path: str):
+        """Channel labels and duration (s) of a session or WFDB source; ([], None) for CSV."""
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension == ".json":
+            reader = open_session(file_path)
+        elif extension in (".dat", ".hea"):
+            reader = WfdbRecordReader(file_path)
+        else:
+            return [], None
+        return list(reader.channel_labels), reader.duration_s
+
+    def load_session_data(self, file_path: str, transmission_rate: int, channel=0, start_s: float = 0.0):
+        """
+        Stream one channel of a native session container (plain or
+        compressed), reading and resampling block by block as playback
+        reaches it.
+        """
         self.reset()
         self._transmission_rate = transmission_rate
-        data = pd.read_csv(file_path)
-        self._time_data = data['Time_s'].values
-        self._signal_data = data['Signal'].values
+        reader = open_session(file_path)
+        self._time_data = np.array([])
+        self._signal_data = StreamingSignal(resample_blocks(reader.iter_blocks(channel, start_s), transmission_rate))
+        self._signal_data.ensure(1)
 
-        self._resample_signal(self._time_data, self._signal_data)
         self._generation_thread.set_data(self._time_data, self._signal_data)
         self._generation_thread.set_transmission_rate(transmission_rate)
 
-    def _resample_signal(self, time_data: np.ndarray, signal_data: np.ndarray):
-        """Resample the signal to match the desired transmission rate"""
-        # Calculate original sampling rate
-        original_sampling_rate = 1 / np.mean(np.diff(time_data))
-        
-        # Calculate number of points needed for new sampling rate
-        num_points = int(len(time_data) * (self._transmission_rate / original_sampling_rate))
-        
-        # Create new time array with desired transmission rate
-        new_time_data = np.linspace(time_data[0], time_data[-1], num_points)
-        
-        # Interpolate signal to new sampling rate
-        self._signal_data = np.interp(new_time_data, time_data, signal_data)
-        self._time_data = new_time_data
+    def load_wfdb_data(self, file_path: str, transmission_rate: int, channel=0, start_s: float = 0.0):
+        """
+        Stream one channel of a format-212 WFDB record. The .dat file is
+        memory-mapped and decoded block by block as playback reaches it.
+        """
+        self.reset()
+        self._transmission_rate = transmission_rate
+        reader = WfdbRecordReader(file_path)
+        # Missing samples (WFDB's NaN code) are played as zero
+        blocks = ((time_data, np.nan_to_num(signal_data, nan=0.0))
+                  for time_data, signal_data in reader.iter_blocks(channel, start_s))
+        self._time_data = np.array([])
+        self._signal_data = StreamingSignal(resample_blocks(blocks, transmission_rate))
+        self._signal_data.ensure(1)
+
+        self._generation_thread.set_data(self._time_data, self._signal_data)
+        self._generation_thread.set_transmission_rate(transmission_rate)
+
+    def load_csv_data(self, file_path: str, transmission_rate: int):
+        """
+        Stream signal data from a CSV file. Blocks are parsed and resampled
+        only as playback reaches them, so large files start immediately.
+        """
+        self.reset()
+        self._transmission_rate = transmission_rate
+        self._time_data = np.array([])
+        self._signal_data = StreamingSignal(resample_blocks(iter_csv_blocks(file_path), transmission_rate))
+        # Parse the first block now so a malformed file fails on load
+        self._signal_data.ensure(1)
+
+        self._generation_thread.set_data(self._time_data, self._signal_data)
+        self._generation_thread.set_transmission_rate(transmission_rate)
 
     def _handle_buffer_ready(self):
         """Handle buffer ready for visualization"""
@@ -202,8 +259,7 @@ class SignalSimulationModel(QObject):
             
             start_idx = self._current_transfer_index
             end_idx = start_idx + buffer_size
-            if end_idx > len(self._signal_data):
-                end_idx = len(self._signal_data)
+            # Slicing clamps at the end of the signal (and pulls streamed blocks as needed)
             new_signal = self._signal_data[start_idx:end_idx].copy()
             
             if len(new_signal) < buffer_size:
@@ -223,6 +279,9 @@ class SignalSimulationModel(QObject):
             self._time_transferred_data = np.append(self._time_transferred_data, new_time)
 
         self._current_transfer_index += self._generation_thread._buffer_size
+        if isinstance(self._signal_data, StreamingSignal):
+            # Neither the playback thread nor the next transfer goes back before this
+            self._signal_data.release(min(self._generation_thread._current_index, self._current_transfer_index))
         self.simulation_chunk_ready.emit()
 
     def _generate_muscle_artifact(self, num_points: int) -> np.ndarray:
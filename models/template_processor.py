@@ -1,17 +1,33 @@
-import os
-import re
+import threading
+from collections import deque
 import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
 
-import pandas as pd
-import wfdb
+from models.wfdb_writer import Wfdb212Writer
+from models.session_file import SessionWriter
+from models.csv_encoder import write_csv
+from models.autocorrelation import Autocorrelator
+from models.ring_buffer import RingBuffer
+from models.beat_detector import StreamingBeatDetector
+from models.cycle_alignment import CycleAligner
+from enums.template_mode import TemplateMode
+
+class TemplateProcessor(QObject):
+    # Emitted with each new template (from the worker thread; queued to GUI slots)
+    template_updated = pyqtSignal(object)
 
-class TemplateProcessor:
     def __init__(
         self,
         sample_rate: float = 100.0,
         look_back_time_s: float = 4.0,
         update_interval_s: float = 4.0,
-        min_template_length_s: float = 0.2
+        min_template_length_s: float = 0.2,
+        source=None,
+        source_channel=0,
+        autocorrelation_method: str = "auto",
+        threaded: bool = True,
+        template_mode: TemplateMode = TemplateMode.AUTOCORRELATION,
+        align_cycles: bool = False
     ):
         """
         :param sample_rate: Samples per second of incoming data.
@@ -19,22 +35,67 @@ class TemplateProcessor:
                                  before the first template computation.
         :param update_interval_s: How often to (re-)compute the template.
         :param min_template_length_s: Minimum length of the template in seconds.
+        :param source: Optional SignalData that already stores the incoming
+                       samples. The look-back window is then read as a view
+                       of it instead of being copied into a private buffer.
+        :param source_channel: Channel of 'source' to build templates from.
+        :param autocorrelation_method: "direct", "fft" or "auto" (picked by
+                                       window length).
+        :param threaded: Compute templates on a worker thread from snapshots
+                         of the window, so append_data never blocks on it.
+        :param template_mode: AUTOCORRELATION averages cycles of one period
+                              found by autocorrelation; BEAT_DETECTION
+                              averages windows centred on detected beats,
+                              which follows heart-rate variability.
+        :param align_cycles: Line cycles up by cross-correlation (to a
+                             fraction of a sample) before averaging them.
+                             Off by default, which keeps plain averaging.
         """
+        super().__init__()
         self.sample_rate = sample_rate
         self.look_back_time = look_back_time_s
         self.update_interval_s = update_interval_s
         self.min_template_length = min_template_length_s
 
-        self.buffer = np.array([], dtype=np.float64)
+        self.source = source
+        self.source_channel = source_channel
+        # Only used without a source: holds just the look-back window
+        self.buffer = RingBuffer(self._window_samples())
+        self.n_samples = 0
         self.last_update_time = 0.0
         self.current_template = None
         self.estimated_period = None
+        self.autocorrelator = Autocorrelator(autocorrelation_method)
+        self._hann = np.empty(0)
+        self.cycle_aligner = CycleAligner() if align_cycles else None
+
+        # Beat detection mode: R-peak sample indices inside the look-back window
+        self.template_mode = None
+        self.beat_detector = None
+        self.beats = deque()
+        self.set_template_mode(template_mode)
+
+        self.threaded = threaded
+        self.skipped_jobs = 0
+        self._job = None
+        self._job_ready = threading.Condition()
+        self._worker = None
+        self._closed = False
 
     def append_data(self, new_data: np.ndarray):
-        self.buffer = np.concatenate([self.buffer, new_data])
+        new_data = np.asarray(new_data)
+        self.n_samples += len(new_data)
+        if new_data.ndim == 2:
+            # Multi-channel frames: templates are built from the primary channel
+            channel = 0 if self.source is None else self.source.channel_index(self.source_channel)
+            new_data = new_data[:, channel]
+        if self.source is None:
+            self.buffer.append(new_data)
+        if self.beat_detector is not None:
+            self._add_beats(self.beat_detector.process(new_data))
 
         # Compute how many seconds of data we have so far
-        current_buffer_time = len(self.buffer) / self.sample_rate
+        current_buffer_time = self.n_samples / self.sample_rate
 
         # If we haven't reached the required initial wait time, do nothing
         if current_buffer_time < self.look_back_time:
@@ -42,80 +103,202 @@ class TemplateProcessor:
 
         # Check if it's time to update the template
         if (current_buffer_time - self.last_update_time) >= self.update_interval_s:
-            self._compute_template()
+            self._request_template()
             self.last_update_time = current_buffer_time
 
     def _compute_template(self):
+        """Compute the template from the current window right away, on the calling thread."""
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            self._publish(*self._template_from(*snapshot))
+
+    def _request_template(self):
         """
-        1. Take the last 'samples_to_analyze' samples from the buffer.
-        2. Remove DC offset (mean).
-        3. Apply a window (Hanning) to reduce edge artifacts.
-        4. Compute the full autocorrelation of that windowed data.
-        5. Find the first peak in the positive-lag region beyond
-           'min_template_length_s'.
-        6. Use that as the estimated period for creating a template.
-        7. Average across multiple cycles of that period to form the final template.
+        Hand a snapshot of the window to the worker thread. A job still
+        waiting when the next one arrives is stale and gets replaced, so
+        under load the worker always computes from the newest data.
         """
-
-        # Determine how many samples we will analyze
-        samples_to_analyze = int(self.look_back_time * self.sample_rate)
-        if len(self.buffer) < samples_to_analyze:
-            # Not enough data to do anything
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return
+        if not self.threaded:
+            self._publish(*self._template_from(*snapshot))
             return
+        with self._job_ready:
+            if self._closed:
+                return
+            if self._job is not None:
+                self.skipped_jobs += 1
+            self._job = snapshot
+            self._job_ready.notify()
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._worker_loop, name="TemplateProcessor", daemon=True)
+            self._worker.start()
+
+    def _snapshot(self):
+        """
+        A private copy of the look-back window plus the beats inside it (None
+        outside beat detection mode), or None if there is not enough data yet.
+        """
+        samples_to_analyze = self._window_samples()
+        if self._available_samples() < samples_to_analyze:
+            return None
+        data_chunk = np.array(self.get_window(samples_to_analyze), dtype=np.float64)
+        if self.beat_detector is None:
+            return data_chunk, None
+        window_start = self.n_samples - samples_to_analyze
+        beats = np.fromiter(self.beats, dtype=np.int64, count=len(self.beats)) - window_start
+        return data_chunk, beats[beats >= 0]
 
-        # Take the last 'samples_to_analyze' samples
-        data_chunk = self.buffer[-samples_to_analyze:]
+    def _add_beats(self, beats: np.ndarray):
+        self.beats.extend(beats.tolist())
+        # Forget beats that have left the look-back window
+        window_start = self.n_samples - self._window_samples()
+        while self.beats and self.beats[0] < window_start:
+            self.beats.popleft()
+
+    def _worker_loop(self):
+        while True:
+            with self._job_ready:
+                while self._job is None and not self._closed:
+                    self._job_ready.wait()
+                if self._closed:
+                    return
+                snapshot, self._job = self._job, None
+            try:
+                result = self._template_from(*snapshot)
+            except Exception as e:
+                print(f"Template computation failed: {e}")
+                continue
+            self._publish(*result)
+
+    def _publish(self, estimated_period, template):
+        if estimated_period is not None:
+            self.estimated_period = estimated_period
+        if template is not None:
+            self.current_template = template
+            self.template_updated.emit(template)
+
+    def _template_from(self, data_chunk: np.ndarray, beats: np.ndarray = None):
+        """
+        Returns (estimated_period, template); either may be None. With
+        'beats' (beat detection mode) the template is built from them,
+        otherwise:
+
+        1. Remove DC offset (mean) from the look-back window.
+        2. Apply a window (Hanning) to reduce edge artifacts.
+        3. Compute the autocorrelation of that windowed data (directly for
+           short windows, via FFT for long ones).
+        4. Find the highest peak in the positive-lag region beyond
+           'min_template_length_s'.
+        5. Use that as the estimated period for creating a template.
+        6. Align the cycles of that period with each other and average them
+           to form the final template.
+        """
+        if beats is not None:
+            return self._template_from_beats(data_chunk, beats)
 
         # 1) Remove DC offset
         data_chunk = data_chunk - np.mean(data_chunk)
 
-        # 2) Window the data to reduce edge effects
-        w = np.hanning(len(data_chunk))
-        data_windowed = data_chunk * w
+        # 2) Window the data to reduce edge effects (same length every update)
+        if len(self._hann) != len(data_chunk):
+            self._hann = np.hanning(len(data_chunk))
+        data_windowed = data_chunk * self._hann
 
-        # 3) Compute full autocorrelation
-        autocorr = np.correlate(data_windowed, data_windowed, mode='full')
+        # 3-4) Autocorrelate and find the peak, skipping lags up to
+        # 'min_lag_offset' to avoid too-small periods
+        min_lag_offset = int(self.min_template_length * self.sample_rate)
+        estimated_period = self.autocorrelator.peak_lag(data_windowed, min_lag_offset + 1)
+        if estimated_period is None:
+            # Window shorter than the minimum template length
+            return None, None
 
-        # The autocorrelation array is length 2*len(data_chunk)-1
-        # 'mid_point' is the index in 'autocorr' corresponding to zero-lag
-        mid_point = len(data_chunk) - 1
+        # 5) Figure out how many full periods fit into 'data_chunk'
+        num_full_periods = len(data_chunk) // estimated_period
+        if num_full_periods < 1:
+            # Not even one full period
+            return estimated_period, None
 
-        # 4) Skip up to 'min_lag_offset' to avoid too-small lags
-        min_lag_offset = int(self.min_template_length * self.sample_rate)
+        # We'll only keep data that covers an integer multiple of the period,
+        # taking the cycles from the end of the chunk
+        valid_length = num_full_periods * estimated_period
+        starts = len(data_chunk) - valid_length + estimated_period * np.arange(num_full_periods)
 
-        # Region: from mid_point+1+min_lag_offset to the end
-        ac_half_plus_min = autocorr[mid_point + 1 + min_lag_offset :]
+        # 6) Align and average the cycles
+        return estimated_period, self._average_cycles(data_chunk, starts, estimated_period)
 
-        # 5) Find local peak in that subarray
-        peak_lag_local = np.argmax(ac_half_plus_min)
+    def _template_from_beats(self, data_chunk: np.ndarray, beats: np.ndarray):
+        """
+        Average windows centred on the detected beats. The template spans
+        the median RR interval with the R peak a third of the way in, so
+        each cycle is cut at its own beat instead of at a fixed period.
+        """
+        if len(beats) < 2:
+            return None, None
+        estimated_period = int(np.median(np.diff(beats)))
+        if estimated_period < 1:
+            return None, None
+        before = estimated_period // 3
+        after = estimated_period - before
+        beats = beats[(beats >= before) & (beats + after <= len(data_chunk))]
+        if len(beats) == 0:
+            return estimated_period, None
 
-        # Convert that local index into an absolute lag in samples
-        peak_lag_abs = peak_lag_local + min_lag_offset + 1
+        data_chunk = data_chunk - np.mean(data_chunk)
+        return estimated_period, self._average_cycles(data_chunk, beats - before, estimated_period)
 
-        # Store as the estimated period
-        self.estimated_period = peak_lag_abs
+    def _average_cycles(self, data_chunk: np.ndarray, starts: np.ndarray, length: int) -> np.ndarray:
+        """Mean of the cycles data_chunk[start:start + length], aligned first if enabled."""
+        # Read once: the GUI thread may toggle alignment while the worker runs
+        cycle_aligner = self.cycle_aligner
+        if cycle_aligner is not None:
+            return cycle_aligner.average(data_chunk, starts, length)
+        return data_chunk[starts[:, None] + np.arange(length)].mean(axis=0)
 
-        if self.estimated_period <= 0:
+    def set_template_mode(self, template_mode: TemplateMode):
+        """Switch how cycles are found; beat detection starts from the next chunk."""
+        if template_mode == self.template_mode:
             return
+        self.template_mode = template_mode
+        self.beats.clear()
+        if template_mode == TemplateMode.BEAT_DETECTION:
+            self.beat_detector = StreamingBeatDetector(self.sample_rate, start_index=self.n_samples)
+        else:
+            self.beat_detector = None
 
-        # 6) Figure out how many full periods fit into 'data_chunk'
-        num_full_periods = len(data_chunk) // self.estimated_period
-        if num_full_periods < 1:
-            # Not even one full period
-            return
+    def set_align_cycles(self, enabled: bool):
+        """Turn cross-correlation alignment of cycles on or off (from the next template)."""
+        if enabled != (self.cycle_aligner is not None):
+            self.cycle_aligner = CycleAligner() if enabled else None
+
+    def close(self):
+        """Stop the worker thread; pending jobs are dropped."""
+        with self._job_ready:
+            self._closed = True
+            self._job = None
+            self._job_ready.notify()
+        if self._worker is not None:
+            self._worker.join(timeout=1.0)
+            self._worker = None
 
-        # We'll only keep data that covers an integer multiple of the period
-        valid_length = num_full_periods * self.estimated_period
+    def set_look_back_time(self, look_back_time_s: float):
+        """Change the analysis window; the private buffer is resized to match."""
+        self.look_back_time = look_back_time_s
+        self.buffer.resize(self._window_samples())
 
-        # Extract that many samples from the end of the chunk
-        valid_data = data_chunk[-valid_length:]
+    def _window_samples(self) -> int:
+        return int(self.look_back_time * self.sample_rate)
 
-        # 7) Reshape so each row is one period
-        reshaped = valid_data.reshape(num_full_periods, self.estimated_period)
+    def _available_samples(self) -> int:
+        # After the look-back grows, the private buffer has to refill first
+        return self.n_samples if self.source is not None else len(self.buffer)
 
-        # Average across all rows to form the template
-        template = reshaped.mean(axis=0)
-        self.current_template = template
+    def get_window(self, n: int) -> np.ndarray:
+        """The most recent 'n' samples, as a view of the source when one is attached."""
+        if self.source is not None:
+            return self.source.last(n, self.source_channel)
+        return self.buffer.tail(n)
 
     def get_template(self) -> np.ndarray:
         if self.current_template is None:
@@ -131,15 +314,7 @@ class TemplateProcessor:
             print("No template to save.")
             return
 
-        n_points = len(template)
-        # Build a time axis for the template
-        times = np.linspace(0, (n_points - 1) / self.sample_rate, n_points)
-
-        df = pd.DataFrame({
-            "Time_s": times,
-            channel_label: template
-        })
-        df.to_csv(filename, index=False)
+        write_csv(filename, template, self.sample_rate, channel_label)
         print(f"Template saved as CSV to {filename}")
 
     def save_wfdb(self, filename: str, channel_label="Template"):
@@ -147,31 +322,24 @@ class TemplateProcessor:
         if template.size == 0:
             print("No template to save.")
             return
-        
-        # Extract directory and base filename
-        dir_name = os.path.dirname(filename)  # e.g., "C:\Users\Your Name\Documents"
-        base_name = os.path.basename(filename)  # e.g., "my_template.dat"
-        
-        # Remove the .dat extension from base_name
-        record_name, _ = os.path.splitext(base_name)  # "my_template"
-        
-        # If necessary, sanitize record_name to remove spaces or other chars
-        # (WFDB only allows letters, numbers, and hyphens)
-        record_name = re.sub(r'[^A-Za-z0-9-]+', '-', record_name)
-        
-        # Reshape template
-        p_signal = template.reshape(-1, 1)
-
-        wfdb.wrsamp(
-            record_name=record_name,
-            fs=self.sample_rate,
-            sig_name=[channel_label],
+
+        writer = Wfdb212Writer(
+            filename,
+            sample_rate=self.sample_rate,
+            sig_names=[channel_label],
             units=["V"],
-            p_signal=p_signal,
-            fmt=["212"],
-            adc_gain=[200],
-            baseline=[0],
-            write_dir=dir_name
+            adc_gain=200,
+            baseline=0
         )
-        
-        print(f"Template saved as WFDB: {os.path.join(dir_name, record_name)}.dat + .hea")
+        writer.write_chunk(template)
+        writer.close()
+
+    def save_session(self, filename: str, channel_label="Template"):
+        template = self.get_template()
+        if template.size == 0:
+            print("No template to save.")
+            return
+
+        writer = SessionWriter(filename, sample_rate=self.sample_rate, channel_labels=[channel_label])
+        writer.write_chunk(template)
+        writer.close()
@@ -0,0 +1,133 @@
+import os
+import re
+import numpy as np
+
+from models.wfdb_writer import FMT212_NAN
+
+_GAIN_FIELD = re.compile(r"^(?P<gain>[-+0-9.eE]+)(?:\((?P<baseline>-?\d+)\))?(?:/(?P<units>\S+))?$")
+_FORMAT_FIELD = re.compile(r"^212(?:x\d+)?(?::\d+)?(?:\+(?P<offset>\d+))?$")
+
+def unpack_212(packed: np.ndarray) -> np.ndarray:
+    """
+    Decode format-212 bytes into a flat int16 array of 12-bit samples (two
+    samples per three bytes). A trailing two-byte partial triplet yields one sample.
+    """
+    packed = np.asarray(packed, dtype=np.uint8)
+    n_triplets, remainder = divmod(len(packed), 3)
+    if remainder:
+        packed = np.concatenate([packed, np.zeros(3 - remainder, dtype=np.uint8)])
+        n_triplets += 1
+    triplets = packed.reshape(n_triplets, 3).astype(np.int16)
+    samples = np.empty((n_triplets, 2), dtype=np.int16)
+    samples[:, 0] = triplets[:, 0] | ((triplets[:, 1] & 0x0F) << 8)
+    samples[:, 1] = triplets[:, 2] | ((triplets[:, 1] & 0xF0) << 4)
+    # Sign-extend the 12-bit values
+    samples[samples > 2047] -= 4096
+    samples = samples.reshape(-1)
+    # Two leftover bytes hold one complete sample, a single byte none
+    return samples[:len(samples) - (3 - remainder)] if remainder else samples
+
+def wfdb_header_path(file_path: str) -> str:
+    """The '.hea' belonging to a record, given its '.hea', '.dat' or bare record path."""
+    return os.path.splitext(file_path)[0] + ".hea"
+
+
+class WfdbRecordReader:
+    """
+    Random-access reader for single-file, format-212 WFDB records.
+
+    The '.dat' file is memory-mapped and only the byte range covering a
+    requested block is decoded, so multi-hour records can be played or
+    inspected without loading them. Read API mirrors the session readers
+    (read_raw / read / read_time / iter_blocks).
+    """
+
+    def __init__(self, file_path: str):
+        self.header_path = wfdb_header_path(file_path)
+        with open(self.header_path, "r") as f:
+            lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+        record = lines[0].split()
+        n_sig = int(record[1])
+        self.sample_rate = float(re.split(r"[/(]", record[2])[0]) if len(record) > 2 else 250.0
+
+        self.channel_labels, self.units, gains, baselines, files, offsets = [], [], [], [], [], []
+        for ch, line in enumerate(lines[1:1 + n_sig]):
+            fields = line.split(maxsplit=8)
+            format_match = _FORMAT_FIELD.match(fields[1])
+            if format_match is None:
+                raise ValueError(f"{self.header_path}: format {fields[1]} is not supported (only 212)")
+            gain_match = _GAIN_FIELD.match(fields[2]) if len(fields) > 2 else None
+            adc_zero = int(fields[4]) if len(fields) > 4 else 0
+            gain = float(gain_match["gain"]) if gain_match else 0.0
+            files.append(fields[0])
+            offsets.append(int(format_match["offset"] or 0))
+            gains.append(gain if gain != 0 else 200.0)
+            baselines.append(int(gain_match["baseline"]) if gain_match and gain_match["baseline"] else adc_zero)
+            self.units.append(gain_match["units"] if gain_match and gain_match["units"] else "mV")
+            self.channel_labels.append(fields[8] if len(fields) > 8 else f"Signal {ch}")
+        if len(set(files)) != 1 or len(set(offsets)) != 1:
+            raise ValueError(f"{self.header_path}: signals spread over several .dat files are not supported")
+        self.n_channels = n_sig
+        self.gain = np.array(gains)
+        self.baseline = np.array(baselines)
+
+        self.dat_path = os.path.join(os.path.dirname(self.header_path), files[0])
+        self._byte_offset = offsets[0]
+        data_bytes = max(0, os.path.getsize(self.dat_path) - self._byte_offset)
+        available = data_bytes * 2 // 3 // n_sig
+        self.n_samples = min(int(record[3]), available) if len(record) > 3 else available
+        self._data = np.memmap(self.dat_path, dtype=np.uint8, mode="r") if data_bytes else np.empty(0, np.uint8)
+
+    def __len__(self):
+        return self.n_samples
+
+    @property
+    def duration_s(self) -> float:
+        return self.n_samples / self.sample_rate
+
+    def channel_index(self, channel) -> int:
+        if isinstance(channel, str):
+            return self.channel_labels.index(channel)
+        return int(channel)
+
+    def read_raw(self, start: int = 0, stop: int = None, channel=None) -> np.ndarray:
+        """Digital samples [start, stop), (n, n_channels) or 1-D for one channel."""
+        start, stop, _ = slice(start, stop).indices(self.n_samples)
+        stop = max(start, stop)
+        # Samples are interleaved frame by frame and packed in pairs, so decode
+        # from the triplet holding the first wanted sample
+        first_flat, stop_flat = start * self.n_channels, stop * self.n_channels
+        first_pair = first_flat // 2
+        byte_start = self._byte_offset + first_pair * 3
+        byte_stop = self._byte_offset + -(-stop_flat // 2) * 3
+        flat = unpack_212(self._data[byte_start:byte_stop])
+        flat = flat[first_flat - 2 * first_pair:][:stop_flat - first_flat]
+        frames = flat.reshape(-1, self.n_channels)
+        return frames if channel is None else frames[:, self.channel_index(channel)]
+
+    def read(self, start: int = 0, stop: int = None, channel=None) -> np.ndarray:
+        """Samples [start, stop) in physical units; WFDB's NaN code becomes NaN."""
+        raw = self.read_raw(start, stop, channel)
+        if channel is None:
+            gain, baseline = self.gain, self.baseline
+        else:
+            index = self.channel_index(channel)
+            gain, baseline = self.gain[index], self.baseline[index]
+        physical = (raw - baseline) / gain
+        physical[raw == FMT212_NAN] = np.nan
+        return physical
+
+    def read_time(self, start_s: float, stop_s: float = None, channel=None) -> np.ndarray:
+        """Samples between two times (in seconds from the start of the record)."""
+        start = max(0, int(np.floor(start_s * self.sample_rate)))
+        stop = None if stop_s is None else max(start, int(np.ceil(stop_s * self.sample_rate)))
+        return self.read(start, stop, channel)
+
+    def iter_blocks(self, channel=0, start_s: float = 0.0, block_samples: int = 65536):
+        """Yield (time, signal) blocks of one channel from 'start_s' on, decoding lazily."""
+        start = min(self.n_samples, max(0, int(round(start_s * self.sample_rate))))
+        for block_start in range(start, self.n_samples, block_samples):
+            signal_data = self.read(block_start, block_start + block_samples, channel)
+            time_data = np.arange(block_start, block_start + len(signal_data)) / self.sample_rate
+            yield time_data, signal_data
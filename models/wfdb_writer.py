@@ -0,0 +1,165 @@
+import os
+import re
+import time
+import numpy as np
+
+from models.file_syncer import FileSyncer
+
+# Format 212 stores 12-bit two's complement samples; -2048 is reserved for NaN
+FMT212_MIN = -2047
+FMT212_MAX = 2047
+FMT212_NAN = -2048
+
+def wfdb_record_path(filename: str):
+    """
+    Split a user-chosen filename (e.g. "C:/data/my record.dat") into the
+    write directory and a WFDB-safe record name ("my-record").
+    """
+    dir_name = os.path.dirname(filename)
+    record_name, _ = os.path.splitext(os.path.basename(filename))
+    # WFDB only allows letters, numbers, and hyphens
+    record_name = re.sub(r'[^A-Za-z0-9-]+', '-', record_name)
+    return dir_name, record_name
+
+def pack_212(d_signal: np.ndarray) -> bytes:
+    """
+    Pack an even-length, flat array of 12-bit integer samples into format 212
+    byte triplets (two samples per three bytes, least significant byte first).
+    """
+    d = np.asarray(d_signal, dtype=np.int64) & 0xFFF
+    first = d[0::2]
+    second = d[1::2]
+    packed = np.empty((len(first), 3), dtype=np.uint8)
+    packed[:, 0] = first & 0xFF
+    packed[:, 1] = ((first >> 8) & 0x0F) | ((second >> 4) & 0xF0)
+    packed[:, 2] = second & 0xFF
+    return packed.tobytes()
+
+def _format_number(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Wfdb212Writer:
+    """
+    Incremental WFDB writer for format-212 records.
+
+    Chunks are digitized and appended to '<record>.dat' as they arrive; the
+    '.hea' header (sample count, initial values, checksums) is rewritten on
+    every flush and on close, so the record on disk is always readable with
+    wfdb.rdrecord. Output matches what wfdb.wrsamp writes for the same data.
+    Periodic flushes (fsync and header rewrite) run on a FileSyncer thread;
+    flush() and close() wait for them.
+    """
+
+    BLOCK_FRAMES = 65536
+
+    def __init__(self, filename: str, sample_rate: float, sig_names=("Signal",), units=None,
+                 adc_gain=200, baseline=0, flush_interval_s: float = 1.0):
+        self.dir_name, self.record_name = wfdb_record_path(filename)
+        self.sample_rate = sample_rate
+        self.sig_names = list(sig_names)
+        n_sig = len(self.sig_names)
+        self.units = list(units) if units is not None else ["V"] * n_sig
+        self.adc_gain = np.broadcast_to(np.asarray(adc_gain, dtype=np.float64), (n_sig,)).copy()
+        self.baseline = np.broadcast_to(np.asarray(baseline, dtype=np.int64), (n_sig,)).copy()
+        self.flush_interval_s = flush_interval_s
+
+        self._dat_path = os.path.join(self.dir_name, f"{self.record_name}.dat")
+        self._hea_path = os.path.join(self.dir_name, f"{self.record_name}.hea")
+        self._dat = open(self._dat_path, "wb")
+        self._n_frames = 0
+        self._checksums = np.zeros(n_sig, dtype=np.int64)
+        self._init_values = np.zeros(n_sig, dtype=np.int64)
+        # A single leftover sample waiting for its partner in the next triplet
+        self._pending = np.empty((0,), dtype=np.int64)
+        self._last_flush = time.monotonic()
+        self._write_header(self._header_text())
+        self._syncer = FileSyncer("Wfdb212Writer")
+
+    @property
+    def n_sig(self) -> int:
+        return len(self.sig_names)
+
+    @property
+    def n_frames(self) -> int:
+        return self._n_frames
+
+    def write_chunk(self, chunk: np.ndarray):
+        """Digitize and append physical samples, shape (n,) or (n, n_sig)."""
+        p_signal = np.asarray(chunk, dtype=np.float64).reshape(-1, self.n_sig)
+        for start in range(0, len(p_signal), self.BLOCK_FRAMES):
+            block = p_signal[start:start + self.BLOCK_FRAMES]
+            d_signal = np.round(block * self.adc_gain + self.baseline)
+            d_signal = np.clip(d_signal, FMT212_MIN, FMT212_MAX)
+            d_signal = np.where(np.isnan(block), FMT212_NAN, d_signal).astype(np.int64)
+            self.write_digital(d_signal)
+
+    def write_digital(self, d_signal: np.ndarray):
+        """Append already-digitized samples, shape (n,) or (n, n_sig)."""
+        if self._dat is None:
+            return
+        d_signal = np.asarray(d_signal, dtype=np.int64).reshape(-1, self.n_sig)
+        if len(d_signal) == 0:
+            return
+
+        if self._n_frames == 0:
+            self._init_values = d_signal[0].copy()
+        self._checksums += d_signal.sum(axis=0)
+        self._n_frames += len(d_signal)
+
+        flat = np.concatenate([self._pending, d_signal.ravel()])
+        n_even = len(flat) - (len(flat) % 2)
+        self._dat.write(pack_212(flat[:n_even]))
+        self._pending = flat[n_even:]
+
+        if time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self._syncer.request(self._sync_job())
+            self._last_flush = time.monotonic()
+
+    def flush(self):
+        if self._dat is None:
+            return
+        self._syncer.request(self._sync_job())
+        self._syncer.wait()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._dat is None:
+            return
+        if len(self._pending):
+            # An odd trailing sample only needs the first two bytes of its triplet
+            self._dat.write(pack_212(np.append(self._pending, 0))[:2])
+            self._pending = self._pending[:0]
+        try:
+            self._syncer.close(self._sync_job())
+        finally:
+            self._dat.close()
+            self._dat = None
+        print(f"WFDB record saved as {self.record_name}.dat + {self.record_name}.hea")
+
+    def _sync_job(self):
+        """Flush, fsync and rewrite the header; the header text is taken now, matching the data written so far."""
+        header_text = self._header_text()
+
+        def job():
+            self._dat.flush()
+            os.fsync(self._dat.fileno())
+            self._write_header(header_text)
+        return job
+
+    def _header_text(self) -> str:
+        lines = [f"{self.record_name} {self.n_sig} {_format_number(self.sample_rate)} {self._n_frames}"]
+        for ch in range(self.n_sig):
+            lines.append(
+                f"{self.record_name}.dat 212 "
+                f"{_format_number(self.adc_gain[ch])}({self.baseline[ch]})/{self.units[ch]} "
+                f"12 0 {self._init_values[ch]} {self._checksums[ch] % 65536} 0 {self.sig_names[ch]}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def _write_header(self, header_text: str):
+        tmp_path = self._hea_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(header_text)
+        os.replace(tmp_path, self._hea_path)
@@ -1,3 +1,4 @@
+import time
 import numpy as np
 from PyQt5.QtCore import QObject, pyqtSignal, QThread
 
@@ -6,7 +7,8 @@ from services.connection_interface import ConnectionInterface
 from services.bluetooth_connection import BluetoothConnection
 
 class AcquisitionService(QObject):
-    chunk_received = pyqtSignal(object)
+    # (samples, info) where info holds receive_time, seq, dropped_samples and crc_rejected
+    chunk_received = pyqtSignal(object, object)
     finished = pyqtSignal()
     error = pyqtSignal(str)
 
@@ -16,6 +18,7 @@ class AcquisitionService(QObject):
         self.connection = connection
         self._running = False
         self.chunk_buffer = []
+        self._seq = 0
         
         # Set up notification callback if using Bluetooth
         if hasattr(self.connection, 'set_notification_callback'):
@@ -29,6 +32,10 @@ class AcquisitionService(QObject):
         
         # bandpass filter
         response = self.connection.send_command(f"SET CIRC {self.model.circuit_id}")
+
+        # Raw ADC codes are only available from the Bluetooth notification path
+        if hasattr(self.connection, 'set_raw_output'):
+            self.connection.set_raw_output(self.model.acquire_raw_adc)
         if isinstance(self.connection, BluetoothConnection):
             print(f"response: {response}")
 
@@ -53,12 +60,25 @@ class AcquisitionService(QObject):
         """Handle incoming notification data from Bluetooth"""
         if self._running:
             # Convert to numpy array and emit
-            chunk = np.array(data)
-            self.chunk_received.emit(chunk)
+            self._emit_chunk(np.array(data))
         else:
             # Ignore chunks if acquisition is not running
             pass
 
+    def _emit_chunk(self, chunk: np.ndarray):
+        """Emit a chunk together with its receive time, sequence number and link losses"""
+        crc_rejected, dropped = 0, 0
+        if hasattr(self.connection, 'pop_link_counters'):
+            crc_rejected, dropped = self.connection.pop_link_counters()
+        info = {
+            "receive_time": time.time(),
+            "seq": self._seq,
+            "dropped_samples": dropped,
+            "crc_rejected": crc_rejected,
+        }
+        self._seq += 1
+        self.chunk_received.emit(chunk, info)
+
     def run_acquisition(self):
         """Main acquisition loop that collects data and emits chunks"""
         try:
@@ -94,8 +114,7 @@ class AcquisitionService(QObject):
                             
                             # When we have enough data for one second, emit the chunk
                             if len(self.chunk_buffer) >= samples_per_chunk:
-                                chunk = np.array(self.chunk_buffer[:samples_per_chunk])
-                                self.chunk_received.emit(chunk)
+                                self._emit_chunk(np.array(self.chunk_buffer[:samples_per_chunk]))
                                 # Keep any remaining data
                                 self.chunk_buffer = self.chunk_buffer[samples_per_chunk:]
                     
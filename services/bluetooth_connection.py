@@ -3,6 +3,7 @@ import threading
 from queue import Queue, Empty
 from bleak import BleakClient, BleakScanner
 from services.connection_interface import ConnectionInterface
+from models.adc import ADC_GAIN
 
 class BluetoothConnection(ConnectionInterface):
     """Bluetooth connection implementation using bleak library"""
@@ -20,6 +21,10 @@ class BluetoothConnection(ConnectionInterface):
         self._notification_callback = None
         self._data_buffer = []
         self._sampling_rate = 0
+        self._raw_output = False
+        # Link losses since the last pop_link_counters() call
+        self._crc_rejected = 0
+        self._dropped_samples = 0
         self._ble_thread = None
         self._command_queue = Queue()
         self._response_queue = Queue()
@@ -227,6 +232,17 @@ class BluetoothConnection(ConnectionInterface):
     def set_notification_callback(self, callback):
         """Set the callback function for notifications"""
         self._notification_callback = callback
+
+    def set_raw_output(self, raw: bool):
+        """Deliver raw ADC codes instead of voltages to the notification callback"""
+        self._raw_output = raw
+
+    def pop_link_counters(self):
+        """Return (crc_rejected_packets, dropped_samples) since the last call and reset them"""
+        counters = (self._crc_rejected, self._dropped_samples)
+        self._crc_rejected = 0
+        self._dropped_samples = 0
+        return counters
     
     async def _notification_handler(self, sender, data):
         """Handle incoming notifications from the device"""
@@ -242,22 +258,31 @@ class BluetoothConnection(ConnectionInterface):
             if len(parts) < 3:  # Need at least header, one value, and CRC
                 return
                 
-            # Extract CRC from packet
-            received_crc = int(parts[-1])
-            
-            # Calculate expected CRC
-            values = [int(val) for val in parts[1:-1]]  # Exclude header and CRC
+            try:
+                # Extract CRC from packet
+                received_crc = int(parts[-1])
+
+                # Calculate expected CRC
+                values = [int(val) for val in parts[1:-1]]  # Exclude header and CRC
+            except ValueError:
+                # Garbled packet: count its samples as lost
+                self._crc_rejected += 1
+                self._dropped_samples += len(parts) - 2
+                return
             calculated_crc = sum(values) % 256
             
             # Verify CRC
             if received_crc != calculated_crc:
+                self._crc_rejected += 1
+                self._dropped_samples += len(values)
                 return
             
-            # Convert ADC values to voltage: V = ADC * (3.3/4095)
-            voltages = [adc * (3.3/4095) for adc in values]
-            
-            # Add to buffer
-            self._data_buffer.extend(voltages)
+            if self._raw_output:
+                # Keep the integer codes; conversion happens when the data is viewed
+                self._data_buffer.extend(values)
+            else:
+                # Convert ADC values to voltage: V = ADC * (3.3/4095)
+                self._data_buffer.extend(adc / ADC_GAIN for adc in values)
             
             # If we have enough data for one second, emit it
             if len(self._data_buffer) >= self._sampling_rate:
@@ -279,6 +304,7 @@ class BluetoothConnection(ConnectionInterface):
             # Convert sampling rate to integer
             self._sampling_rate = int(sampling_rate)
             self._data_buffer = []
+            self.pop_link_counters()
             # Send command to start notifications through the command queue
             self._command_queue.put(("START_NOTIFY", self._sampling_rate))
             # Wait for confirmation
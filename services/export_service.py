@@ -0,0 +1,242 @@
+import os
+import threading
+from collections import deque
+from datetime import datetime
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from models.csv_stream_sink import CsvStreamSink
+from models.wfdb_writer import Wfdb212Writer, wfdb_record_path
+from models.session_file import SessionWriter, session_paths
+from models.compressed_session import CompressedSessionWriter, COMPRESSED_DATA_EXT
+from models.edf_writer import EdfWriter, EDF_DIGITAL_MIN, EDF_DIGITAL_MAX, physical_range as edf_physical_range
+from models.chunk_index import ChunkIndex, CHUNK_FIELDS, lossy_rows, loss_description
+from models.session_catalog import RecordingSummary
+
+class ExportJob:
+    """
+    One queued export: a snapshot of the samples plus where and how to write them.
+
+    'data' should be a view that will not change underneath the export, e.g.
+    SignalData.raw_frames (appends land past the end of the view) or a
+    template array. No copy is taken. When 'adc_scale' is given, 'data' holds
+    raw ADC codes, which are converted one block at a time (or written
+    untouched for WFDB and EDF). 'chunk_rows' (a ChunkIndex.rows() snapshot)
+    is written next to the data as '<name>.chunks.csv', and for EDF also
+    sets the start time and marks link losses as annotations. With a 'catalog'
+    (SessionCatalog), the finished file is recorded there as 'catalog_kind'.
+    'journal' (ChunkJournal) is the crash-recovery journal holding the same
+    samples; its chunk count is noted so it can be dropped once the file is saved.
+    """
+
+    def __init__(self, description: str, data: np.ndarray, sample_rate: float, filename: str,
+                 file_format: str, channel_labels=("Signal",), units=None, circuit_id=None,
+                 adc_scale=None, chunk_rows=None, catalog=None, catalog_kind="data", journal=None):
+        self.description = description
+        self.data = data
+        self.sample_rate = sample_rate
+        self.filename = filename
+        self.file_format = file_format
+        self.channel_labels = list(channel_labels)
+        self.units = units
+        self.circuit_id = circuit_id
+        self.adc_scale = adc_scale
+        self.chunk_rows = chunk_rows
+        self.catalog = catalog
+        self.catalog_kind = catalog_kind
+        self.journal = journal
+        self.journal_chunks = journal.n_chunks if journal is not None else 0
+        self.generation = 0
+
+    def create_writer(self):
+        if self.file_format == "csv":
+            return CsvStreamSink(self.filename, self.sample_rate, channel_labels=self.channel_labels)
+        if self.file_format == "wfdb":
+            if self.adc_scale is not None:
+                return Wfdb212Writer(self.filename, self.sample_rate, sig_names=self.channel_labels,
+                                     units=self.units, adc_gain=self.adc_scale.gain,
+                                     baseline=self.adc_scale.wfdb_baseline)
+            return Wfdb212Writer(self.filename, self.sample_rate, sig_names=self.channel_labels,
+                                 units=self.units)
+        if self.file_format == "session":
+            return SessionWriter(self.filename, self.sample_rate, channel_labels=self.channel_labels,
+                                 units=self.units, circuit_id=self.circuit_id)
+        if self.file_format == "zsession":
+            return CompressedSessionWriter(self.filename, self.sample_rate,
+                                           channel_labels=self.channel_labels, units=self.units,
+                                           circuit_id=self.circuit_id, adc_scale=self.adc_scale)
+        if self.file_format == "edf":
+            return self._create_edf_writer()
+        raise ValueError(f"Unsupported export format: {self.file_format}")
+
+    def _create_edf_writer(self):
+        if self.adc_scale is not None:
+            # Codes keep their resolution: digital samples are the shifted codes
+            physical_range, digital_range = self.adc_scale.edf_ranges()
+        else:
+            # EDF needs the physical range up front, so take it from the data
+            physical_range = edf_physical_range(self.data)
+            digital_range = (EDF_DIGITAL_MIN, EDF_DIGITAL_MAX)
+
+        start_datetime = None
+        if self.chunk_rows is not None and len(self.chunk_rows) and np.isfinite(self.chunk_rows[0, 0]):
+            start_datetime = datetime.fromtimestamp(self.chunk_rows[0, 0])
+        writer = EdfWriter(self.filename, self.sample_rate, channel_labels=self.channel_labels,
+                           units=self.units, physical_min=physical_range[0], physical_max=physical_range[1],
+                           digital_min=digital_range[0], digital_max=digital_range[1],
+                           start_datetime=start_datetime)
+        if self.chunk_rows is not None:
+            offset_column = CHUNK_FIELDS.index("sample_offset")
+            for row in lossy_rows(self.chunk_rows):
+                writer.add_annotation(row[offset_column] / self.sample_rate, loss_description(row))
+        return writer
+
+    def write_block(self, writer, block: np.ndarray):
+        if self.adc_scale is None or self.file_format == "zsession":
+            # Compressed sessions keep raw ADC codes as they are
+            writer.write_chunk(block)
+        elif self.file_format == "wfdb":
+            writer.write_digital(self.adc_scale.to_212(block))
+        elif self.file_format == "edf":
+            writer.write_digital(self.adc_scale.to_edf(block))
+        else:
+            writer.write_chunk(self.adc_scale.to_physical(block))
+
+    def physical(self, block: np.ndarray) -> np.ndarray:
+        return block if self.adc_scale is None else self.adc_scale.to_physical(block)
+
+    def catalog_path(self) -> str:
+        """The file a catalog entry points at (what the simulation loader opens)."""
+        return self.output_paths()[0]
+
+    def add_to_catalog(self, summary: RecordingSummary):
+        self.catalog.add(self.catalog_path(), self.catalog_kind, self.file_format, self.sample_rate,
+                         len(self.data), self.channel_labels, self.circuit_id, summary)
+
+    def chunk_index_path(self) -> str:
+        return os.path.splitext(self.filename)[0] + ".chunks.csv"
+
+    def write_chunk_index(self):
+        if self.chunk_rows is not None and len(self.chunk_rows):
+            ChunkIndex.write_csv(self.chunk_index_path(), self.chunk_rows)
+
+    def output_paths(self):
+        chunk_paths = [self.chunk_index_path()] if self.chunk_rows is not None else []
+        if self.file_format == "wfdb":
+            dir_name, record_name = wfdb_record_path(self.filename)
+            return [os.path.join(dir_name, f"{record_name}{ext}") for ext in (".dat", ".hea")] + chunk_paths
+        if self.file_format == "session":
+            return list(session_paths(self.filename)) + chunk_paths
+        if self.file_format == "zsession":
+            header_path, _ = session_paths(self.filename)
+            return [header_path, os.path.splitext(header_path)[0] + COMPRESSED_DATA_EXT] + chunk_paths
+        return [self.filename] + chunk_paths
+
+
+class ExportService(QObject):
+    """
+    Worker that writes queued ExportJobs back to back on its own thread,
+    reporting progress per block so the acquisition view stays responsive.
+    """
+    job_started = pyqtSignal(str)
+    progress = pyqtSignal(str, int)   # description, percent
+    job_finished = pyqtSignal(str)
+    job_saved = pyqtSignal(object)    # the finished ExportJob
+    job_cancelled = pyqtSignal(str)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    BLOCK_SAMPLES = 65536
+
+    def __init__(self):
+        super().__init__()
+        self._jobs = deque()
+        self._lock = threading.Lock()
+        # Bumped by cancel(); jobs queued before the bump are abandoned
+        self._generation = 0
+
+    def enqueue(self, job: ExportJob):
+        with self._lock:
+            job.generation = self._generation
+            self._jobs.append(job)
+
+    def has_pending_jobs(self) -> bool:
+        with self._lock:
+            return len(self._jobs) > 0
+
+    def cancel(self):
+        """Cancel the running export and drop everything still queued."""
+        with self._lock:
+            self._generation += 1
+            dropped = list(self._jobs)
+            self._jobs.clear()
+        for job in dropped:
+            self.job_cancelled.emit(job.description)
+
+    def run_exports(self):
+        """Drain the job queue, then emit finished."""
+        try:
+            while True:
+                with self._lock:
+                    if not self._jobs:
+                        break
+                    job = self._jobs.popleft()
+                self._run_job(job)
+        finally:
+            self.finished.emit()
+
+    def _is_cancelled(self, job: ExportJob) -> bool:
+        return job.generation != self._generation
+
+    def _run_job(self, job: ExportJob):
+        if self._is_cancelled(job):
+            self.job_cancelled.emit(job.description)
+            return
+
+        self.job_started.emit(job.description)
+        writer = None
+        try:
+            writer = job.create_writer()
+            n_samples = len(job.data)
+            summary = RecordingSummary(n_samples) if job.catalog is not None else None
+            last_percent = -1
+            for start in range(0, n_samples, self.BLOCK_SAMPLES):
+                if self._is_cancelled(job):
+                    writer.close()
+                    self._remove_outputs(job)
+                    self.job_cancelled.emit(job.description)
+                    return
+                block = job.data[start:start + self.BLOCK_SAMPLES]
+                job.write_block(writer, block)
+                if summary is not None:
+                    summary.update(start, job.physical(block))
+
+                percent = int(100 * min(n_samples, start + self.BLOCK_SAMPLES) / n_samples)
+                if percent != last_percent:
+                    self.progress.emit(job.description, percent)
+                    last_percent = percent
+
+            writer.close()
+            job.write_chunk_index()
+            if job.catalog is not None:
+                try:
+                    job.add_to_catalog(summary)
+                except Exception as e:
+                    # The file itself is fine; only the lookup entry is missing
+                    print(f"Could not add {job.catalog_path()} to the session catalog: {e}")
+            self.job_saved.emit(job)
+            self.job_finished.emit(job.description)
+        except Exception as e:
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+            self.error.emit(f"{job.description} failed: {str(e)}")
+
+    def _remove_outputs(self, job: ExportJob):
+        for path in job.output_paths():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
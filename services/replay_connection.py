@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+import numpy as np
+
+from services.connection_interface import ConnectionInterface
+from models.adc import ADC_GAIN, ADC_MAX_CODE
+from models.compressed_session import open_session
+from models.csv_stream_reader import iter_csv_blocks, resample_blocks
+from models.wfdb_reader import WfdbRecordReader
+
+def iter_recording_blocks(file_path: str, channel=0, block_samples: int = 65536):
+    """(time, signal) blocks of one channel of a saved CSV, session or WFDB recording."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in (".dat", ".hea"):
+        yield from WfdbRecordReader(file_path).iter_blocks(channel, block_samples=block_samples)
+    elif extension == ".json":
+        yield from open_session(file_path).iter_blocks(channel, block_samples=block_samples)
+    else:
+        yield from iter_csv_blocks(file_path, block_rows=block_samples)
+
+
+class ReplayConnection(ConnectionInterface):
+    """
+    Virtual device that plays a saved recording back through the acquisition path.
+
+    Behaves like BluetoothConnection towards AcquisitionService: commands get
+    canned responses, and after START ACQ the notification callback receives
+    one list of 'sampling_rate' samples per second of recording. The source
+    is resampled to the requested sampling rate and delivered at 'speed'
+    times real time, or as fast as possible when 'speed' is None, so a
+    session can be reproduced offline and deterministically.
+    """
+
+    def __init__(self, file_path: str, speed: float = 1.0, channel=0, loop: bool = False):
+        self.file_path = file_path
+        self.speed = speed
+        self.channel = channel
+        self.loop = loop
+        self._connected = False
+        self._notification_callback = None
+        self._sampling_rate = 0
+        self._raw_output = False
+        self._replay_thread = None
+        self._stop_event = threading.Event()
+
+    def connect(self):
+        """'Connect' by checking that the recording can be opened"""
+        try:
+            next(iter_recording_blocks(self.file_path, self.channel, block_samples=1), None)
+            self._connected = True
+        except Exception as e:
+            print(f"Replay source error: {e}")
+            self._connected = False
+        return self._connected
+
+    def disconnect(self):
+        self._stop_replay()
+        self._connected = False
+
+    def is_connected(self):
+        return self._connected
+
+    def send_command(self, command):
+        """Answer the device commands the app sends, as the firmware would"""
+        if not self.is_connected():
+            return "ERROR: Not connected"
+        command = command.strip()
+        if command.startswith("SET SAMPLE"):
+            self._sampling_rate = int(float(command.split()[-1]))
+            return "OK"
+        if command == "START ACQ":
+            self._start_replay()
+            return "Streaming started"
+        if command == "STOP ACQ":
+            self._stop_replay()
+            return "OK"
+        if command == "CHECK POWER":
+            return "POWER:100"
+        if command == "TEST TRANSMISSION":
+            return "OK"
+        return "OK"
+
+    def set_notification_callback(self, callback):
+        """Set the callback function for notifications"""
+        self._notification_callback = callback
+
+    def set_raw_output(self, raw: bool):
+        """Deliver ADC codes (the recording re-digitized at the device's scale) instead of voltages"""
+        self._raw_output = raw
+
+    def start_notifications(self, sampling_rate):
+        if not self.is_connected():
+            return False
+        self._sampling_rate = int(sampling_rate)
+        return True
+
+    def stop_notifications(self):
+        self._stop_replay()
+
+    def check_power(self):
+        return 100
+
+    def test_transmission(self):
+        return self.is_connected()
+
+    # --------------------------------------------------------------------------
+    # Replay thread
+    # --------------------------------------------------------------------------
+    def _start_replay(self):
+        self._stop_replay()
+        self._stop_event.clear()
+        self._replay_thread = threading.Thread(target=self._replay_loop, name="Replay", daemon=True)
+        self._replay_thread.start()
+
+    def _stop_replay(self):
+        self._stop_event.set()
+        if self._replay_thread is not None and self._replay_thread is not threading.current_thread():
+            self._replay_thread.join(timeout=1.0)
+        self._replay_thread = None
+
+    def _iter_chunks(self):
+        """Chunks of 'sampling_rate' resampled samples, i.e. one per second of recording."""
+        chunk_size = self._sampling_rate
+        pending = np.empty(0)
+        while True:
+            blocks = iter_recording_blocks(self.file_path, self.channel)
+            for block in resample_blocks(blocks, self._sampling_rate):
+                pending = np.concatenate([pending, block])
+                n_full = len(pending) // chunk_size * chunk_size
+                for start in range(0, n_full, chunk_size):
+                    yield pending[start:start + chunk_size]
+                pending = pending[n_full:]
+            if not self.loop:
+                return
+
+    def _replay_loop(self):
+        if self._sampling_rate <= 0:
+            print("Replay needs a sampling rate (SET SAMPLE) before START ACQ")
+            return
+        start_time = time.monotonic()
+        try:
+            for index, chunk in enumerate(self._iter_chunks()):
+                if self.speed:
+                    # Chunk k is 'acquired' once its second of signal has elapsed
+                    due = start_time + (index + 1) / self.speed
+                    if self._stop_event.wait(max(0.0, due - time.monotonic())):
+                        return
+                elif self._stop_event.is_set():
+                    return
+
+                chunk = np.nan_to_num(chunk, nan=0.0)
+                if self._raw_output:
+                    values = np.clip(np.rint(chunk * ADC_GAIN), 0, ADC_MAX_CODE).astype(int).tolist()
+                else:
+                    values = chunk.tolist()
+                if self._notification_callback:
+                    self._notification_callback(values)
+            print("Replay finished")
+        except Exception as e:
+            print(f"Replay error: {e}")
@@ -3,6 +3,7 @@ from enums.connection_type import ConnectionType
 from services.connection_interface import ConnectionFactory
 from models.model import Model
 from services.usb_connection import USBConnection
+from services.replay_connection import ReplayConnection
 
 class SystemCheckService(QObject):
     """
@@ -22,10 +23,18 @@ class SystemCheckService(QObject):
         self.model = model
         self.connection = None
         self.connection_type = None
+        # Recording and speed for ConnectionType.REPLAY
+        self.replay_file = None
+        self.replay_speed = 1.0
 
     def set_connection_type(self, connection_type: ConnectionType):
         """Set the connection type to use for the system check"""
         self.connection_type = connection_type
+
+    def set_replay_source(self, file_path: str, speed: float = 1.0):
+        """Set the recording played by the replay connection (speed None = as fast as possible)"""
+        self.replay_file = file_path
+        self.replay_speed = speed
         
     def delay(self, milliseconds):
         """Non-blocking delay using QTimer and QEventLoop"""
@@ -54,6 +63,12 @@ class SystemCheckService(QObject):
                 
                 # Try to connect to the first found Arduino port
                 self.connection = USBConnection(port=arduino_ports[0])
+            elif self.connection_type == ConnectionType.REPLAY:
+                if not self.replay_file:
+                    self.error.emit("No recording selected for replay")
+                    self.connection_checked.emit(False)
+                    return
+                self.connection = ReplayConnection(self.replay_file, speed=self.replay_speed)
             else:
                 self.connection = ConnectionFactory.create_connection(self.connection_type)
         except Exception as e:
@@ -0,0 +1,101 @@
+"""
+Benchmark the delta + zstd compressed session against the other recording formats.
+
+Usage (from the repository root):
+    python src/bench_compressed_session.py              # 10M samples (~2.8 h at 1 kHz)
+    python src/bench_compressed_session.py 1e6 1e8      # custom sizes
+
+The test signal is a synthetic EMG-like stream of 12-bit ADC codes (bursts of
+band-limited noise on a slowly drifting baseline). For each format it reports
+file size, write time and full decode time, plus the latency of reading one
+second from the middle of the compressed recording.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.adc import AdcScale
+from models.csv_encoder import write_csv
+from models.wfdb_writer import Wfdb212Writer
+from models.session_file import SessionWriter, SessionReader
+from models.compressed_session import CompressedSessionWriter, CompressedSessionReader, COMPRESSED_DATA_EXT
+
+SAMPLE_RATE = 1000.0
+
+def synthetic_emg_codes(n: int, rng) -> np.ndarray:
+    """12-bit codes: noise bursts (muscle activations) on a drifting baseline."""
+    t = np.arange(n) / SAMPLE_RATE
+    baseline = 2048 + 40 * np.sin(2 * np.pi * 0.05 * t)
+    envelope = 5 + 300 * (np.sin(2 * np.pi * 0.5 * t) > 0.6)
+    noise = np.convolve(rng.normal(size=n), np.ones(4) / 4, mode="same")
+    return np.clip(np.rint(baseline + envelope * noise), 0, 4095).astype(np.uint16)
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main():
+    sizes = [int(float(arg)) for arg in sys.argv[1:]] or [10_000_000]
+    rng = np.random.default_rng(0)
+    scale = AdcScale()
+
+    print(f"{'samples':>12} {'format':>12} {'file (MB)':>10} {'ratio':>7} {'write (s)':>10} {'decode (s)':>11}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n in sizes:
+            codes = synthetic_emg_codes(n, rng)
+            volts = scale.to_physical(codes)
+            results = []
+
+            path = os.path.join(tmp_dir, "data.csv")
+            write_s, _ = timed(lambda: write_csv(path, volts, SAMPLE_RATE))
+            decode_s, _ = timed(lambda: np.loadtxt(path, delimiter=",", skiprows=1, usecols=1)) \
+                if n <= 2_000_000 else (float("nan"), None)
+            results.append(("csv", os.path.getsize(path), write_s, decode_s))
+
+            path = os.path.join(tmp_dir, "data.dat")
+            def write_wfdb():
+                writer = Wfdb212Writer(path, SAMPLE_RATE, adc_gain=scale.gain, baseline=scale.wfdb_baseline)
+                writer.write_digital(scale.to_212(codes))
+                writer.close()
+            write_s, _ = timed(write_wfdb)
+            results.append(("wfdb-212", os.path.getsize(path), write_s, float("nan")))
+
+            path = os.path.join(tmp_dir, "plain.json")
+            def write_plain():
+                writer = SessionWriter(path, SAMPLE_RATE)
+                writer.write_chunk(volts)
+                writer.close()
+            write_s, _ = timed(write_plain)
+            decode_s, _ = timed(lambda: np.array(SessionReader(path).read()))
+            results.append(("session", os.path.getsize(path[:-5] + ".bin"), write_s, decode_s))
+
+            path = os.path.join(tmp_dir, "packed.json")
+            def write_compressed():
+                writer = CompressedSessionWriter(path, SAMPLE_RATE, adc_scale=scale)
+                # Feed it like the acquisition path does, one second at a time
+                for start in range(0, n, int(SAMPLE_RATE)):
+                    writer.write_chunk(codes[start:start + int(SAMPLE_RATE)])
+                writer.close()
+            write_s, _ = timed(write_compressed)
+            reader = CompressedSessionReader(path)
+            decode_s, decoded = timed(lambda: reader.read_raw())
+            assert np.array_equal(decoded[:, 0], codes), "compressed session is not lossless"
+            results.append(("zsession", os.path.getsize(path[:-5] + COMPRESSED_DATA_EXT), write_s, decode_s))
+
+            raw_size = results[2][1]
+            for name, size, write_s, decode_s in results:
+                print(f"{n:>12} {name:>12} {size / 1e6:>10.1f} {raw_size / size:>7.1f} "
+                      f"{write_s:>10.2f} {decode_s:>11.2f}")
+
+            reader = CompressedSessionReader(path)
+            middle = reader.duration_s / 2
+            read_s, _ = timed(lambda: reader.read_time(middle, middle + 1.0))
+            print(f"{'':>12} random 1 s read from the middle: {read_s * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark the block CSV encoder against the old pandas DataFrame path.
+
+Usage (from the repository root):
+    python src/bench_csv_encoder.py                 # 1M, 10M and 100M samples
+    python src/bench_csv_encoder.py 1e6 1e7         # custom sizes
+
+Reports wall time, output size and peak traced memory for each path. The
+pandas path at 100M samples needs several GB of RAM.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.csv_encoder import write_csv
+
+SAMPLE_RATE = 1000.0
+
+def pandas_save_csv(filename, data, sample_rate, channel_label="Signal"):
+    """The DataFrame-based save_csv implementation the encoder replaces."""
+    n_points = len(data)
+    times = np.linspace(0, (n_points - 1) / sample_rate, n_points)
+    df = pd.DataFrame({"Time_s": times, channel_label: data})
+    df.to_csv(filename, index=False)
+
+def measure(func, filename, data):
+    start = time.perf_counter()
+    func(filename, data, SAMPLE_RATE)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(filename)
+
+    tracemalloc.start()
+    func(filename, data, SAMPLE_RATE)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    os.remove(filename)
+    return elapsed, size, peak
+
+def main():
+    sizes = [int(float(arg)) for arg in sys.argv[1:]] or [1_000_000, 10_000_000, 100_000_000]
+    rng = np.random.default_rng(0)
+
+    print(f"{'samples':>12} {'path':>8} {'time (s)':>10} {'MB/s':>8} {'file (MB)':>10} {'peak mem (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n in sizes:
+            # 12-bit ADC codes converted to volts, like the Bluetooth path
+            data = rng.integers(0, 4096, size=n) * (3.3 / 4095)
+            for name, func in (("pandas", pandas_save_csv), ("encoder", write_csv)):
+                elapsed, size, peak = measure(func, os.path.join(tmp_dir, f"{name}.csv"), data)
+                print(f"{n:>12} {name:>8} {elapsed:>10.2f} {size / 1e6 / elapsed:>8.1f} "
+                      f"{size / 1e6:>10.1f} {peak / 1e6:>14.1f}")
+
+if __name__ == "__main__":
+    main()
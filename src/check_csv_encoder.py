@@ -0,0 +1,117 @@
+"""
+Check that the block CSV encoder is lossless.
+
+Usage (from the repository root):
+    python src/check_csv_encoder.py              # 200k random values per run
+    python src/check_csv_encoder.py 1e6          # more values
+
+Encodes float64 values of every kind (random bit patterns, NaN, +-inf,
++-0, subnormals, the largest finite values, and values next to powers of
+ten), parses each field back with float() and compares the bits (NaN is
+written as an empty field, like pandas, and only has to stay NaN). Also
+checks the 'Time_s,<label>' header, the time column, and that the output
+does not depend on the block size or on how a signal is split into chunks.
+Prints each failure and exits with status 1 if there is any.
+"""
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.csv_encoder import CsvEncoder, write_csv
+
+SAMPLE_RATE = 250.0
+
+def special_values() -> np.ndarray:
+    tiny = np.finfo(np.float64).tiny
+    values = [np.nan, np.inf, -np.inf, 0.0, -0.0, 5e-324, -5e-324, tiny, np.nextafter(tiny, 0),
+              np.finfo(np.float64).max, -np.finfo(np.float64).max, 1.0, 0.1, 0.5, 1 / 3, 2 ** 53, 2 ** 53 + 2]
+    for exponent in range(-323, 309):
+        power = float(f"1e{exponent}")
+        values += [power, np.nextafter(power, 0), np.nextafter(power, np.inf)]
+    values = np.array(values)
+    return np.concatenate([values, -values])
+
+def random_values(n: int, rng) -> np.ndarray:
+    bits = rng.integers(0, 2 ** 64, size=n, dtype=np.uint64).view(np.float64)
+    scaled = rng.normal(size=n) * 10.0 ** rng.integers(-30, 30, size=n)
+    subnormal = rng.integers(1, 2 ** 52, size=n // 10, dtype=np.int64).view(np.float64)
+    adc = np.round(rng.uniform(0, 4095, size=n)) * (3.3 / 4095)
+    return np.concatenate([bits, scaled, subnormal, -subnormal, adc])
+
+def parse(field: str) -> float:
+    # NaN is written as an empty field, like pandas
+    return float(field) if field else np.nan
+
+def same_bits(expected: np.ndarray, parsed: np.ndarray) -> np.ndarray:
+    # NaN payloads do not survive text, any NaN is fine
+    return (expected.view(np.uint64) == parsed.view(np.uint64)) | (np.isnan(expected) & np.isnan(parsed))
+
+def check_round_trip(values: np.ndarray, failures: list):
+    text = CsvEncoder(SAMPLE_RATE).encode(values).decode("ascii")
+    rows = text.splitlines()
+    if len(rows) != len(values):
+        failures.append(f"expected {len(values)} rows, got {len(rows)}")
+        return
+    fields = [row.split(",") for row in rows]
+    times = np.array([parse(f[0]) for f in fields])
+    parsed = np.array([parse(f[1]) for f in fields])
+
+    bad = np.flatnonzero(~same_bits(values, parsed))
+    for i in bad[:10]:
+        failures.append(f"value {values[i]!r} was written as {fields[i][1]!r}")
+    expected_times = np.arange(len(values)) / SAMPLE_RATE
+    bad_times = np.flatnonzero(~same_bits(expected_times, times))
+    for i in bad_times[:10]:
+        failures.append(f"time {expected_times[i]!r} was written as {fields[i][0]!r}")
+
+def check_header(failures: list):
+    for labels, expected in (("Signal", b"Time_s,Signal\n"), (["ECG I", "ECG II"], b"Time_s,ECG I,ECG II\n")):
+        if CsvEncoder.header(labels) != expected:
+            failures.append(f"header for {labels!r} is {CsvEncoder.header(labels)!r}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "check.csv")
+        write_csv(path, np.zeros((3, 2)), SAMPLE_RATE, channel_labels=["A", "B"])
+        with open(path, "rb") as f:
+            first_line = f.readline()
+    if first_line != b"Time_s,A,B\n":
+        failures.append(f"write_csv starts with {first_line!r}")
+
+def check_block_sizes(values: np.ndarray, failures: list):
+    reference = CsvEncoder(SAMPLE_RATE).encode(values)
+    for block_rows in (1, 7, 1000, 4096):
+        encoder = CsvEncoder(SAMPLE_RATE)
+        encoder.BLOCK_ROWS = block_rows
+        if encoder.encode(values) != reference:
+            failures.append(f"output differs with BLOCK_ROWS={block_rows}")
+
+    # A streaming sink encodes chunk by chunk with a running start index
+    encoder = CsvEncoder(SAMPLE_RATE)
+    buffer = io.BytesIO()
+    edges = [0, 1, 10, 333, 4097, len(values)]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        encoder.write(buffer, values[start:stop], start_index=start)
+    if buffer.getvalue() != reference:
+        failures.append("output differs when written in chunks")
+
+def main():
+    n = int(float(sys.argv[1])) if len(sys.argv) > 1 else 200_000
+    rng = np.random.default_rng(0)
+    failures = []
+
+    check_round_trip(special_values(), failures)
+    check_round_trip(random_values(n, rng), failures)
+    check_header(failures)
+    check_block_sizes(np.concatenate([special_values(), random_values(5000, rng)]), failures)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print(f"{len(failures)} failures")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -41,6 +41,35 @@ class AcquisitionOptionsWidget(BaseWidget):
         self.template_checkbox.setChecked(True)
         options_layout.addWidget(self.template_checkbox)
 
+        # ---------------------------
+        # CheckBox for "Record to Disk"
+        # ---------------------------
+        self.record_to_disk_checkbox = QCheckBox("Record to Disk (long sessions)")
+        self.record_to_disk_checkbox.setChecked(False)
+        options_layout.addWidget(self.record_to_disk_checkbox)
+
+        # ---------------------------
+        # CheckBox for raw ADC storage
+        # ---------------------------
+        self.raw_adc_checkbox = QCheckBox("Store Raw ADC Codes (Bluetooth)")
+        self.raw_adc_checkbox.setChecked(False)
+        options_layout.addWidget(self.raw_adc_checkbox)
+
+        # ---------------------------
+        # CheckBoxes for streaming exports
+        # ---------------------------
+        self.stream_csv_checkbox = QCheckBox("Stream CSV While Recording")
+        self.stream_csv_checkbox.setChecked(False)
+        options_layout.addWidget(self.stream_csv_checkbox)
+
+        self.stream_wfdb_checkbox = QCheckBox("Stream WFDB While Recording")
+        self.stream_wfdb_checkbox.setChecked(False)
+        options_layout.addWidget(self.stream_wfdb_checkbox)
+
+        self.stream_compressed_checkbox = QCheckBox("Stream Compressed Session While Recording")
+        self.stream_compressed_checkbox.setChecked(False)
+        options_layout.addWidget(self.stream_compressed_checkbox)
+
         # ---------------------------
         # Drop-down (ComboBox) for sampling rates
         # ---------------------------
@@ -112,7 +141,16 @@ class AcquisitionOptionsWidget(BaseWidget):
         sampling_rate = float(sampling_rate_str.split()[0])
 
         # Update state machine
-        self.state_machine.update_acquisition_options(self.template_checkbox.isChecked(), sampling_rate, self.circuit_group.checkedId())
+        self.state_machine.update_acquisition_options(
+            self.template_checkbox.isChecked(),
+            sampling_rate,
+            self.circuit_group.checkedId(),
+            self.record_to_disk_checkbox.isChecked(),
+            self.stream_csv_checkbox.isChecked(),
+            self.stream_wfdb_checkbox.isChecked(),
+            self.raw_adc_checkbox.isChecked(),
+            self.stream_compressed_checkbox.isChecked()
+        )
 
         # Finally start the acquisition
         self.device_controller.start_acquisition()
@@ -1,19 +1,26 @@
 from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QSpacerItem,
     QSizePolicy, QLabel, QFileDialog, QSpinBox, QDoubleSpinBox,
-    QRadioButton, QButtonGroup
+    QRadioButton, QButtonGroup, QProgressBar, QWidget, QComboBox, QCheckBox
 )
 from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QTransform
 import pyqtgraph as pg
 import numpy as np
 
 from views.common.base_widget import BaseWidget
+from services.export_service import ExportJob
+from enums.template_mode import TemplateMode
 
 
 class RunningAcquisitionWidget(BaseWidget):
+    CHANNEL_PENS = ['b', 'g', 'm', 'c', 'k', 'y']
+
     def _setup_ui(self):
 
         self.disconnecting = False
+        # Processor whose template_updated currently drives the template plot
+        self._template_processor = None
 
         main_layout = QVBoxLayout()
         main_layout.setAlignment(Qt.AlignCenter)
@@ -25,6 +32,7 @@ class RunningAcquisitionWidget(BaseWidget):
         self._setup_time_window_selector(main_layout)
         self._setup_template_plot(main_layout)
         self._setup_template_controls(main_layout)
+        self._setup_export_status(main_layout)
         self._setup_bottom_controls(main_layout)
         self.setLayout(main_layout)
 
@@ -50,9 +58,12 @@ class RunningAcquisitionWidget(BaseWidget):
         # Another expanding spacer
         layout.addSpacerItem(QSpacerItem(0, 0, QSizePolicy.Expanding, QSizePolicy.Minimum))
 
-        # --- Radio buttons: CSV vs. WFDB ---
+        # --- Radio buttons: CSV vs. WFDB vs. EDF+ vs. native session ---
         self.csv_radio = QRadioButton("CSV")
         self.wfdb_radio = QRadioButton("WFDB")
+        self.edf_radio = QRadioButton("EDF+")
+        self.session_radio = QRadioButton("Session")
+        self.compressed_radio = QRadioButton("Compressed")
 
         # Make sure one is checked by default
         self.csv_radio.setChecked(True)
@@ -61,10 +72,16 @@ class RunningAcquisitionWidget(BaseWidget):
         self.format_group = QButtonGroup()
         self.format_group.addButton(self.csv_radio)
         self.format_group.addButton(self.wfdb_radio)
+        self.format_group.addButton(self.edf_radio)
+        self.format_group.addButton(self.session_radio)
+        self.format_group.addButton(self.compressed_radio)
 
         # Add these radio buttons to the layout
         layout.addWidget(self.csv_radio)
         layout.addWidget(self.wfdb_radio)
+        layout.addWidget(self.edf_radio)
+        layout.addWidget(self.session_radio)
+        layout.addWidget(self.compressed_radio)
 
         return layout
 
@@ -73,7 +90,8 @@ class RunningAcquisitionWidget(BaseWidget):
         self.plot_widget.setBackground('w')
         self.plot_widget.setLabel('left', 'Amplitude', units='A')
         self.plot_widget.setLabel('bottom', 'Time', units='s')
-        self.curve = self.plot_widget.plot([], [], pen='b')
+        # One curve per acquired channel, created as channels appear
+        self.curves = []
         parent_layout.addWidget(self.plot_widget, stretch=1)
 
     def _setup_time_window_selector(self, parent_layout: QVBoxLayout):
@@ -82,7 +100,8 @@ class RunningAcquisitionWidget(BaseWidget):
         x_range_layout.addWidget(self.x_range_label)
 
         self.x_range_spinbox = QSpinBox()
-        self.x_range_spinbox.setRange(1, 60)
+        # The min/max pyramid keeps hour-long windows cheap to draw
+        self.x_range_spinbox.setRange(1, 3600)
         self.x_range_spinbox.valueChanged.connect(self.update_graph)
         x_range_layout.addWidget(self.x_range_spinbox)
 
@@ -117,6 +136,22 @@ class RunningAcquisitionWidget(BaseWidget):
     def _setup_template_controls(self, parent_layout: QVBoxLayout):
         controls_layout = QHBoxLayout()
 
+        # -- template_mode
+        self.template_mode_label = QLabel("Template Mode:")
+        controls_layout.addWidget(self.template_mode_label)
+
+        self.template_mode_combo = QComboBox()
+        for template_mode in TemplateMode:
+            self.template_mode_combo.addItem(template_mode.value, template_mode)
+        self.template_mode_combo.currentIndexChanged.connect(self._on_template_mode_changed)
+        controls_layout.addWidget(self.template_mode_combo)
+
+        # -- align_cycles
+        self.align_cycles_checkbox = QCheckBox("Align Cycles")
+        self.align_cycles_checkbox.setToolTip("Line cycles up by cross-correlation before averaging them")
+        self.align_cycles_checkbox.toggled.connect(self._on_align_cycles_toggled)
+        controls_layout.addWidget(self.align_cycles_checkbox)
+
         # -- look_back_time_s
         self.look_back_label = QLabel("Look Back (s):")
         controls_layout.addWidget(self.look_back_label)
@@ -148,6 +183,28 @@ class RunningAcquisitionWidget(BaseWidget):
 
         parent_layout.addLayout(controls_layout)
 
+    def _setup_export_status(self, parent_layout: QVBoxLayout):
+        """Row showing background export progress with a Cancel button."""
+        self.export_status_container = QWidget()
+        export_layout = QHBoxLayout()
+        export_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.export_status_label = QLabel("")
+        export_layout.addWidget(self.export_status_label)
+
+        self.export_progress_bar = QProgressBar()
+        self.export_progress_bar.setRange(0, 100)
+        export_layout.addWidget(self.export_progress_bar, stretch=1)
+
+        self.cancel_export_button = QPushButton("Cancel")
+        self.cancel_export_button.setObjectName("redButton")
+        self.cancel_export_button.clicked.connect(self.device_controller.cancel_exports)
+        export_layout.addWidget(self.cancel_export_button)
+
+        self.export_status_container.setLayout(export_layout)
+        self.export_status_container.hide()
+        parent_layout.addWidget(self.export_status_container)
+
     def _setup_bottom_controls(self, parent_layout: QVBoxLayout):
         """Add the bottom row with 'Disconnect' and 'Save Data' buttons."""
         bottom_layout = QHBoxLayout()
@@ -174,6 +231,15 @@ class RunningAcquisitionWidget(BaseWidget):
         self.state_machine.acquisition_chunk_received.connect(self.update_graph)
         self.device_controller.acquisitionThread.finished.connect(self._disconnect_acquisition_stopped)
 
+        export_service = self.device_controller.exportService
+        export_service.job_started.connect(self._on_export_started)
+        export_service.progress.connect(self._on_export_progress)
+        export_service.job_finished.connect(self._on_export_job_done)
+        export_service.job_saved.connect(self._on_export_saved)
+        export_service.job_cancelled.connect(self._on_export_job_done)
+        export_service.error.connect(self._on_export_job_done)
+        export_service.finished.connect(self._on_exports_finished)
+
     def reset_ui(self):
         """Reset the UI to its initial state."""
         self.disconnecting = False
@@ -183,7 +249,9 @@ class RunningAcquisitionWidget(BaseWidget):
         self.x_range_spinbox.setValue(5)
 
         # Clear the main plot
-        self.curve.setData([], [])
+        for curve in self.curves:
+            self.plot_widget.removeItem(curve)
+        self.curves = []
         self.plot_widget.setXRange(0, 5)
 
         # Acquisition status
@@ -209,10 +277,13 @@ class RunningAcquisitionWidget(BaseWidget):
         self.save_data_button.setObjectName("greyButton")
         self._update_button_style(self.save_data_button)
 
-        # Template plot
+        # Template plot, redrawn whenever this acquisition's processor publishes a template
         self.template_curve.setData([], [])
+        self._follow_template_processor(self.model.template_processor)
 
         # Reset spinboxes to match the model's initial values
+        self.template_mode_combo.setCurrentText(self.model.template_processor.template_mode.value)
+        self.align_cycles_checkbox.setChecked(self.model.template_processor.cycle_aligner is not None)
         self.look_back_spinbox.setValue(self.model.template_processor.look_back_time)
         self.update_interval_spinbox.setValue(self.model.template_processor.update_interval_s)
 
@@ -222,6 +293,14 @@ class RunningAcquisitionWidget(BaseWidget):
         # Show/hide all template-related widgets
         self._update_template_visibility()
 
+    def _follow_template_processor(self, template_processor):
+        if self._template_processor is template_processor:
+            return
+        if self._template_processor is not None:
+            self._template_processor.template_updated.disconnect(self._update_template_plot)
+        template_processor.template_updated.connect(self._update_template_plot)
+        self._template_processor = template_processor
+
     def _update_button_style(self, button: QPushButton):
         """Force a style refresh for a button that changes objectName."""
         button.style().unpolish(button)
@@ -232,6 +311,9 @@ class RunningAcquisitionWidget(BaseWidget):
         if self.model.get_template:
             self.template_label.show()
             self.template_plot_widget.show()
+            self.template_mode_label.show()
+            self.template_mode_combo.show()
+            self.align_cycles_checkbox.show()
             self.look_back_label.show()
             self.look_back_spinbox.show()
             self.update_interval_label.show()
@@ -240,6 +322,9 @@ class RunningAcquisitionWidget(BaseWidget):
         else:
             self.template_label.hide()
             self.template_plot_widget.hide()
+            self.template_mode_label.hide()
+            self.template_mode_combo.hide()
+            self.align_cycles_checkbox.hide()
             self.look_back_label.hide()
             self.look_back_spinbox.hide()
             self.update_interval_label.hide()
@@ -253,19 +338,28 @@ class RunningAcquisitionWidget(BaseWidget):
         signal_data = self.state_machine.model.signal_data
 
         file_format = self._get_selected_format()
-        if file_format == "csv":
-            filter_str = "CSV Files (*.csv)"
-        else:
-            filter_str = "WFDB Files (*.dat)"
+        filter_str = self._get_filter_string(file_format)
 
         filename, _ = QFileDialog.getSaveFileName(self, "Save Data", "", filter_str)
         if not filename:
             return
 
-        if file_format == "csv":
-            signal_data.save_csv(filename, channel_label="Signal")
-        else:
-            signal_data.save_wfdb(filename, channel_label="Signal")
+        # signal_data.raw_frames is a view that later appends never touch, so
+        # it can be exported on the worker thread without copying
+        self.device_controller.queue_export(ExportJob(
+            f"Data ({file_format.upper()})",
+            signal_data.raw_frames,
+            signal_data.sample_rate,
+            filename,
+            file_format,
+            channel_labels=signal_data.channel_labels,
+            units=signal_data.units,
+            circuit_id=self.model.circuit_id,
+            adc_scale=signal_data.adc_scale,
+            chunk_rows=signal_data.chunk_index.rows(),
+            catalog=self.model.catalog,
+            journal=self.model.journal
+        ))
 
     def toggle_acquisition(self):
         self.state_machine.toggle_acquisition()
@@ -297,46 +391,46 @@ class RunningAcquisitionWidget(BaseWidget):
         self._update_button_style(self.save_data_button)
 
     def update_graph(self):
-        """Main slot that updates both the main plot and the template plot."""
-        data = self.state_machine.model.signal_data.data
-        sample_rate = self.state_machine.model.signal_data.sample_rate
+        """Main slot that updates the main plot (the template plot follows template_updated)."""
+        signal_data = self.state_machine.model.signal_data
 
         # 1) Figure out which portion of the data is visible
-        t_visible, data_visible = self._prepare_visible_data(data, sample_rate)
+        t_start, t_step, data_visible = self._prepare_visible_data(signal_data)
 
         # 2) Update the main (acquisition) plot
-        self._update_main_plot(t_visible, data_visible)
-
-        # 3) Update the template plot
-        if self.model.get_template:
-            template = self.model.template_processor.get_template()
-            self._update_template_plot(template)
+        self._update_main_plot(t_start, t_step, data_visible)
 
     # -------------------------------------------------------------------------
     #  Helper methods for update_graph
     # -------------------------------------------------------------------------
-    def _prepare_visible_data(self, data: np.ndarray, sample_rate: float):
-        total_points = len(data)
+    def _prepare_visible_data(self, signal_data):
+        sample_rate = signal_data.sample_rate
+        total_points = len(signal_data)
         time_window = self.x_range_spinbox.value()
         visible_points = int(time_window * sample_rate)
 
-        if total_points > visible_points:
-            data_visible = data[-visible_points:]
-            t_start = (total_points - visible_points) / sample_rate
-            t_end = total_points / sample_rate
-            t_visible = np.linspace(t_start, t_end, visible_points, endpoint=False)
-        else:
-            data_visible = data
-            t_visible = np.linspace(0, total_points / sample_rate, total_points, endpoint=False)
-
-        return t_visible, data_visible
-
-    def _update_main_plot(self, t_visible: np.ndarray, data_visible: np.ndarray):
-        self.curve.setData(t_visible, data_visible)
+        # About two points per horizontal pixel: beyond that the plot comes
+        # from the min/max pyramid instead of the raw samples
+        max_points = 2 * max(self.plot_widget.width(), 100)
+        first_index, index_step, data_visible = signal_data.envelope(
+            total_points - visible_points, total_points, max_points
+        )
+
+        # The time axis stays implicit: first point's time plus a fixed step
+        return signal_data.time_at(first_index), index_step / sample_rate, data_visible
+
+    def _update_main_plot(self, t_start: float, t_step: float, data_visible: np.ndarray):
+        n_channels = data_visible.shape[1]
+        while len(self.curves) < n_channels:
+            pen = self.CHANNEL_PENS[len(self.curves) % len(self.CHANNEL_PENS)]
+            self.curves.append(self.plot_widget.plot([], [], pen=pen))
+        for ch, curve in enumerate(self.curves):
+            curve.setData(data_visible[:, ch])
+            self._set_implicit_x(curve, t_start, t_step)
 
         # X-axis range
         time_window = self.x_range_spinbox.value()
-        current_time = t_visible[-1] if len(t_visible) else 0
+        current_time = t_start + (len(data_visible) - 1) * t_step if len(data_visible) else 0
         if current_time < time_window:
             self.plot_widget.setXRange(0, time_window)
         else:
@@ -349,14 +443,13 @@ class RunningAcquisitionWidget(BaseWidget):
 
     def _update_template_plot(self, template: np.ndarray):
         if len(template) > 0:
-            # setup time axis for template
+            # Template samples are 1/sample_rate apart starting at 0 s
             sample_rate = self.model.template_processor.sample_rate
-            x_axis = np.linspace(0, len(template)/sample_rate, len(template))
-
-            self.template_curve.setData(x_axis, template)
+            self.template_curve.setData(template)
+            self._set_implicit_x(self.template_curve, 0.0, 1.0 / sample_rate)
 
             # Auto-scale X-range
-            x_end = x_axis[-1] if len(x_axis) > 0 else 1
+            x_end = (len(template) - 1) / sample_rate
             if x_end <= 0:
                 x_end = 1
             self.template_plot_widget.setXRange(0, x_end)
@@ -371,6 +464,15 @@ class RunningAcquisitionWidget(BaseWidget):
             self.template_plot_widget.setXRange(0, 1)
             self.template_plot_widget.setYRange(-1, 1)
 
+    @staticmethod
+    def _set_implicit_x(curve, x_start: float, x_step: float):
+        """
+        Place y-only curve data (plotted at x = 0, 1, 2, ...) at
+        x_start + i * x_step, so no x array has to be built per redraw.
+        """
+        curve.setTransform(QTransform.fromScale(x_step, 1.0))
+        curve.setPos(x_start, 0)
+
     def _compute_y_range(self, data: np.ndarray, margin_ratio: float = 0.05):
         min_val = np.min(data)
         max_val = np.max(data)
@@ -385,7 +487,13 @@ class RunningAcquisitionWidget(BaseWidget):
     #  Template Parameter Handlers
     # -------------------------------------------------------------------------
     def _on_look_back_changed(self, value: float):
-        self.model.template_processor.look_back_time = value
+        self.model.template_processor.set_look_back_time(value)
+
+    def _on_template_mode_changed(self, index: int):
+        self.model.template_processor.set_template_mode(self.template_mode_combo.itemData(index))
+
+    def _on_align_cycles_toggled(self, checked: bool):
+        self.model.template_processor.set_align_cycles(checked)
 
     def _on_update_interval_changed(self, value: float):
         self.model.template_processor.update_interval_s = value
@@ -397,22 +505,72 @@ class RunningAcquisitionWidget(BaseWidget):
         template_processor = self.model.template_processor
 
         file_format = self._get_selected_format()
-        if file_format == "csv":
-            filter_str = "CSV Files (*.csv)"
-        else:
-            filter_str = "WFDB Files (*.dat)"
+        filter_str = self._get_filter_string(file_format)
 
         filename, _ = QFileDialog.getSaveFileName(self, "Save Template", "", filter_str)
         if not filename:
             return
 
-        if file_format == "csv":
-            template_processor.save_csv(filename, channel_label="Template")
-        else:
-            template_processor.save_wfdb(filename, channel_label="Template")
+        template = template_processor.get_template()
+        if template.size == 0:
+            print("No template to save.")
+            return
+
+        self.device_controller.queue_export(ExportJob(
+            f"Template ({file_format.upper()})",
+            template,
+            template_processor.sample_rate,
+            filename,
+            file_format,
+            channel_labels=["Template"],
+            circuit_id=self.model.circuit_id,
+            catalog=self.model.catalog,
+            catalog_kind="template"
+        ))
+
+    # -------------------------------------------------------------------------
+    #  Background Export Progress
+    # -------------------------------------------------------------------------
+    def _on_export_started(self, description: str):
+        self.export_status_label.setText(f"Exporting {description}...")
+        self.export_progress_bar.setValue(0)
+        self.export_status_container.show()
+
+    def _on_export_progress(self, description: str, percent: int):
+        self.export_progress_bar.setValue(percent)
+
+    def _on_export_saved(self, job):
+        # The recording is safely on disk, so its crash-recovery journal can go
+        self.model.journal_saved(job.journal, job.journal_chunks)
+
+    def _on_export_job_done(self, description: str):
+        self.export_progress_bar.setValue(0)
+
+    def _on_exports_finished(self):
+        if not self.device_controller.exportService.has_pending_jobs():
+            self.export_status_container.hide()
 
     def _get_selected_format(self) -> str:
-        return "csv" if self.csv_radio.isChecked() else "wfdb"
+        if self.csv_radio.isChecked():
+            return "csv"
+        if self.wfdb_radio.isChecked():
+            return "wfdb"
+        if self.edf_radio.isChecked():
+            return "edf"
+        if self.compressed_radio.isChecked():
+            return "zsession"
+        return "session"
+
+    def _get_filter_string(self, file_format: str) -> str:
+        if file_format == "csv":
+            return "CSV Files (*.csv)"
+        if file_format == "wfdb":
+            return "WFDB Files (*.dat)"
+        if file_format == "edf":
+            return "EDF+ Files (*.edf)"
+        if file_format == "zsession":
+            return "Compressed Session Files (*.json)"
+        return "Session Files (*.json)"
 
     # -------------------------------------------------------------------------
     #  Disconnect Logic
@@ -1,10 +1,13 @@
-from PyQt5.QtWidgets import QVBoxLayout, QLabel, QPushButton
+from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QFileDialog
 from PyQt5.QtCore import Qt
 from enums.connection_type import ConnectionType
 
 from views.common.base_widget import BaseWidget
 
 class IdleWidget(BaseWidget):
+    # Replay speed (multiple of real time); None replays as fast as possible
+    REPLAY_SPEEDS = {"1x": 1.0, "2x": 2.0, "5x": 5.0, "10x": 10.0, "Max": None}
+
     def _setup_ui(self):
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignCenter)
@@ -23,6 +26,18 @@ class IdleWidget(BaseWidget):
         self.bt_button.clicked.connect(lambda: self.handle_connect_mcu(ConnectionType.BLUETOOTH))
         layout.addWidget(self.bt_button)
 
+        # Virtual device playing back a saved recording
+        replay_layout = QHBoxLayout()
+        self.replay_button = QPushButton("Replay Recording...")
+        self.replay_button.setObjectName("blueButton")
+        self.replay_button.clicked.connect(self.handle_replay)
+        replay_layout.addWidget(self.replay_button)
+
+        self.replay_speed_combo = QComboBox()
+        self.replay_speed_combo.addItems(self.REPLAY_SPEEDS.keys())
+        replay_layout.addWidget(self.replay_speed_combo)
+        layout.addLayout(replay_layout)
+
         self.setLayout(layout)
 
     def reset_ui(self):
@@ -30,3 +45,16 @@ class IdleWidget(BaseWidget):
 
     def handle_connect_mcu(self, connection_type: ConnectionType):
         self.device_controller.start_system_check(connection_type)
+
+    def handle_replay(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Recording to Replay",
+            "",
+            "Recordings (*.csv *.json *.hea *.dat);;CSV Files (*.csv);;Session Files (*.json);;"
+            "WFDB Records (*.hea *.dat)"
+        )
+        if not file_name:
+            return
+        speed = self.REPLAY_SPEEDS[self.replay_speed_combo.currentText()]
+        self.device_controller.start_replay(file_name, speed)
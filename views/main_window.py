@@ -1,4 +1,7 @@
-from PyQt5.QtWidgets import QMainWindow, QWidget, QStackedWidget, QVBoxLayout
+import os
+from datetime import datetime
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QMainWindow, QWidget, QStackedWidget, QVBoxLayout, QMessageBox, QFileDialog
 from enums.app_state import AppState
 from controllers.state_machine import StateMachine
 from controllers.device_controller import DeviceController
@@ -13,6 +16,7 @@ from views.simulation.running_simulation_widget import RunningSimulationWidget
 from views.stimulation.stimulation_options_widget import StimulationOptionsWidget
 from views.stimulation.running_stimulation_widget import RunningStimulationWidget
 from views.disconnect.graceful_disconnect_widget import GracefulDisconnectWidget
+from models.chunk_journal import find_journals, read_journal
 
 windowTitlePrefix = "BME70B App | "
 
@@ -64,6 +68,9 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout(central_widget)
         layout.addWidget(self.stacked_widget)
 
+        # Offer to recover sessions interrupted by a crash once the window is up
+        QTimer.singleShot(0, self.recover_journals)
+
         # DEBUG: set state and model for running simulation development
         # from enums.connection_type import ConnectionType
         # from enums.connection_status import ConnectionStatus
@@ -108,3 +115,67 @@ class MainWindow(QMainWindow):
             self.stacked_widget.setCurrentIndex(8)
         elif new_state == AppState.GRACEFUL_DISCONNECT:
             self.stacked_widget.setCurrentIndex(9)
+
+    def closeEvent(self, event):
+        # Close the journal cleanly so the next launch does not report a crash
+        self.state_machine.model.shutdown()
+        super().closeEvent(event)
+
+    # --------------------------------------------------------------------------
+    # CRASH RECOVERY
+    # --------------------------------------------------------------------------
+    def recover_journals(self):
+        for path in find_journals(self.state_machine.model.journal_dir):
+            try:
+                session = read_journal(path)
+            except Exception as e:
+                print(f"Could not read journal {path}: {e}")
+                continue
+            if session.n_samples == 0:
+                os.remove(path)
+                continue
+
+            started = datetime.fromtimestamp(os.path.getctime(path)).strftime("%Y-%m-%d %H:%M:%S")
+            if session.clean:
+                status = "was closed without being saved"
+            else:
+                status = "was not shut down cleanly"
+            message = (
+                f"An acquisition session from {started} {status}.\n\n"
+                f"Recovered {session.n_samples} samples ({session.duration_s:.1f} s) "
+                f"at {session.sample_rate} Hz from {session.n_chunks} chunks."
+            )
+            if session.error:
+                message += f"\nReading stopped early: {session.error}."
+            message += "\n\nSave the recovered data?"
+
+            choice = QMessageBox.question(
+                self, "Recover Session", message,
+                QMessageBox.Save | QMessageBox.Discard | QMessageBox.Ignore, QMessageBox.Save
+            )
+            if choice == QMessageBox.Save and self._save_recovered(session):
+                os.remove(path)
+            elif choice == QMessageBox.Discard:
+                # The user abandoned the session
+                os.remove(path)
+
+    def _save_recovered(self, session) -> bool:
+        filename, selected_filter = QFileDialog.getSaveFileName(
+            self, "Save Recovered Session", os.path.splitext(session.path)[0],
+            "Session Files (*.json);;CSV Files (*.csv);;WFDB Files (*.dat)"
+        )
+        if not filename:
+            return False
+
+        signal_data = session.to_signal_data()
+        try:
+            if selected_filter.startswith("CSV"):
+                signal_data.save_csv(filename if filename.endswith(".csv") else filename + ".csv")
+            elif selected_filter.startswith("WFDB"):
+                signal_data.save_wfdb(filename)
+            else:
+                signal_data.save_session(filename if filename.endswith(".json") else filename + ".json")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to save recovered session: {str(e)}")
+            return False
+        return True
@@ -1,15 +1,19 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QSpacerItem, 
     QSizePolicy, QLabel, QRadioButton, QComboBox, QButtonGroup,
-    QCheckBox, QFileDialog, QSpinBox
+    QCheckBox, QFileDialog, QSpinBox, QDoubleSpinBox, QLineEdit, QListWidget, QListWidgetItem
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFontMetrics
+import pyqtgraph as pg
 
 from views.common.base_widget import BaseWidget
 from enums.simulation_type import SimulationType
 
 class SimulationOptionsWidget(BaseWidget):
+    # Catalogued formats the full-signal loader can open
+    CATALOG_FORMATS = ("csv", "session", "zsession", "wfdb")
+
     def _setup_ui(self):
         self.template_model = self.state_machine.model.template_model
         self.signal_simulation = self.state_machine.model.signal_simulation
@@ -75,7 +79,7 @@ class SimulationOptionsWidget(BaseWidget):
 
         self.custom_signal_file = None
 
-        self.custom_signal_label = QLabel("Custom Signal CSV:")
+        self.custom_signal_label = QLabel("Custom Signal (CSV, Session or WFDB):")
         self.custom_signal_label.setAlignment(Qt.AlignCenter)
         self.custom_signal_layout.addWidget(self.custom_signal_label)
 
@@ -92,6 +96,23 @@ class SimulationOptionsWidget(BaseWidget):
         self.browse_button.clicked.connect(self.select_csv_file)
         self.custom_signal_layout.addWidget(self.browse_button)
 
+        # Channel and start offset, for multi-channel sources (sessions, WFDB records)
+        source_layout = QHBoxLayout()
+        source_layout.setAlignment(Qt.AlignCenter)
+        source_layout.addWidget(QLabel("Channel:"))
+        self.source_channel_combo = QComboBox()
+        self.source_channel_combo.setEnabled(False)
+        source_layout.addWidget(self.source_channel_combo)
+        source_layout.addWidget(QLabel("Start (s):"))
+        self.source_start_spinbox = QDoubleSpinBox()
+        self.source_start_spinbox.setDecimals(1)
+        self.source_start_spinbox.setRange(0.0, 0.0)
+        self.source_start_spinbox.setEnabled(False)
+        source_layout.addWidget(self.source_start_spinbox)
+        self.custom_signal_layout.addLayout(source_layout)
+
+        self._setup_catalog_browser(self.custom_signal_layout)
+
         self.custom_signal_container.setLayout(self.custom_signal_layout)
         options_layout.addWidget(self.custom_signal_container)
 
@@ -185,20 +206,107 @@ class SimulationOptionsWidget(BaseWidget):
     # Toggle the Custom Signal Container
     # ---------------------------
     def toggle_radio_layout(self, checked: bool):
+        if checked:
+            self.refresh_catalog()
         self.custom_signal_container.setVisible(checked)
         self.template_length_container.setVisible(not checked)
         self._update_start_button_state()
 
+    # ---------------------------
+    # Saved Recordings (session catalog)
+    # ---------------------------
+    def _setup_catalog_browser(self, parent_layout: QVBoxLayout):
+        catalog_label = QLabel("Or pick a saved recording:")
+        catalog_label.setAlignment(Qt.AlignCenter)
+        parent_layout.addWidget(catalog_label)
+
+        search_layout = QHBoxLayout()
+        self.catalog_search = QLineEdit()
+        self.catalog_search.setPlaceholderText("Search name, path or channel...")
+        self.catalog_search.textChanged.connect(self.refresh_catalog)
+        search_layout.addWidget(self.catalog_search)
+
+        self.catalog_kind_combo = QComboBox()
+        self.catalog_kind_combo.addItems(["All", "Data", "Templates"])
+        self.catalog_kind_combo.currentIndexChanged.connect(self.refresh_catalog)
+        search_layout.addWidget(self.catalog_kind_combo)
+        parent_layout.addLayout(search_layout)
+
+        self.catalog_list = QListWidget()
+        self.catalog_list.setFixedHeight(120)
+        self.catalog_list.currentItemChanged.connect(self._on_catalog_entry_selected)
+        parent_layout.addWidget(self.catalog_list)
+
+        # Preview comes from the catalog, the file itself is not opened
+        self.catalog_preview = pg.PlotWidget()
+        self.catalog_preview.setFixedHeight(80)
+        self.catalog_preview.setBackground('w')
+        self.catalog_preview.hideAxis('bottom')
+        self.catalog_preview.hideAxis('left')
+        self.catalog_preview.setMouseEnabled(x=False, y=False)
+        self.catalog_preview_curve = self.catalog_preview.plot([], [], pen='b')
+        parent_layout.addWidget(self.catalog_preview)
+
+        self.catalog_stats_label = QLabel("")
+        self.catalog_stats_label.setAlignment(Qt.AlignCenter)
+        self.catalog_stats_label.setStyleSheet("color: gray;")
+        parent_layout.addWidget(self.catalog_stats_label)
+
+    def refresh_catalog(self):
+        kind = {1: "data", 2: "template"}.get(self.catalog_kind_combo.currentIndex())
+        try:
+            entries = self.model.catalog.search(
+                text=self.catalog_search.text().strip(),
+                kind=kind,
+                file_formats=self.CATALOG_FORMATS
+            )
+        except Exception as e:
+            # A broken catalog only hides the list; files can still be picked directly
+            print(f"Could not search the session catalog: {e}")
+            entries = []
+        self.catalog_list.clear()
+        for entry in entries:
+            if not entry.exists:
+                continue
+            item = QListWidgetItem(entry.describe())
+            item.setData(Qt.UserRole, entry)
+            item.setToolTip(entry.path)
+            self.catalog_list.addItem(item)
+
+    def _on_catalog_entry_selected(self, item, _previous=None):
+        if item is None:
+            self.catalog_preview_curve.setData([], [])
+            self.catalog_stats_label.setText("")
+            return
+        entry = item.data(Qt.UserRole)
+        try:
+            self.catalog_preview_curve.setData(self.model.catalog.preview(entry.id))
+        except Exception as e:
+            print(f"Could not read the catalog preview: {e}")
+            self.catalog_preview_curve.setData([], [])
+        if entry.mean is not None:
+            self.catalog_stats_label.setText(
+                f"{entry.n_samples} samples | mean {entry.mean:.3g} | std {entry.std:.3g} | "
+                f"range {entry.min:.3g} to {entry.max:.3g}"
+            )
+        else:
+            self.catalog_stats_label.setText(f"{entry.n_samples} samples")
+        self._set_custom_signal_file(entry.path)
+
     # ---------------------------
     # File Dialog for Selecting a CSV
     # ---------------------------
     def select_csv_file(self):
         file_name, _ = QFileDialog.getOpenFileName(
             self,
-            "Select CSV File",
+            "Select Signal File",
             "",
-            "CSV Files (*.csv)"
+            "Signal Files (*.csv *.json *.hea *.dat);;CSV Files (*.csv);;Session Files (*.json);;"
+            "WFDB Records (*.hea *.dat)"
         )
+        self._set_custom_signal_file(file_name or None)
+
+    def _set_custom_signal_file(self, file_name):
         if file_name:
             self.custom_signal_file = file_name
             # Ellipsize long file paths
@@ -208,8 +316,23 @@ class SimulationOptionsWidget(BaseWidget):
             self.custom_signal_file = None
             self.custom_signal_path.setText("[None Selected]")
 
+        self._update_source_options()
         self._update_start_button_state()
 
+    def _update_source_options(self):
+        labels, duration_s = [], None
+        if self.custom_signal_file:
+            try:
+                labels, duration_s = self.signal_simulation.source_channels(self.custom_signal_file)
+            except Exception as e:
+                print(f"Could not read channels of {self.custom_signal_file}: {e}")
+        self.source_channel_combo.clear()
+        self.source_channel_combo.addItems(labels)
+        self.source_channel_combo.setEnabled(len(labels) > 1)
+        self.source_start_spinbox.setRange(0.0, duration_s or 0.0)
+        self.source_start_spinbox.setValue(0.0)
+        self.source_start_spinbox.setEnabled(bool(duration_s))
+
     # ---------------------------
     # Helper: Update "Start" Button State
     # ---------------------------
@@ -219,7 +342,7 @@ class SimulationOptionsWidget(BaseWidget):
         if full_signal_chosen and not self.custom_signal_file:
             # No file selected yet
             self.start_button.setEnabled(False)
-            self.start_button.setText("Select custom signal CSV file.")
+            self.start_button.setText("Select custom signal file.")
             self.start_button.setObjectName("greyButton")
         else:
             # Either Template mode or CSV is provided
@@ -269,7 +392,12 @@ class SimulationOptionsWidget(BaseWidget):
             self.template_model.set_duration_ms(self.template_length_spinbox.value())
         else:
             simulation_type = SimulationType.FULL_SIGNAL
-            self.signal_simulation.load_csv_data(self.custom_signal_file, transmission_rate)
+            self.signal_simulation.load_signal_file(
+                self.custom_signal_file,
+                transmission_rate,
+                channel=max(0, self.source_channel_combo.currentIndex()),
+                start_s=self.source_start_spinbox.value()
+            )
 
         self.signal_simulation.set_transmission_rate(transmission_rate)
 